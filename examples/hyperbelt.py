@@ -60,6 +60,7 @@ def main():
               results_path=args.results_dir,
               n_evaluations=50,
               max_iter=100,
+              model="GP",
               verbose=True,
               random_state=0)
 
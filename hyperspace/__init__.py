@@ -1,6 +1,8 @@
+from .hyperdrive import asha
 from .hyperdrive import hyperband
 from .hyperdrive import hyperbelt
 from .hyperdrive import hyperdrive
+from .hyperdrive import async_hyperdrive
 
 from .rover.latin_hypercube_sampler import sample_latin_hypercube
 from .rover.latin_hypercube_sampler import lhs_start
@@ -10,6 +12,7 @@ from .space.skopt.space import HyperReal
 from .space.skopt.space import HyperCategorical
 from .space.skopt.mapping_space import check_dimension
 from .space.skopt.mapping_space import create_hyperspace
+from .space.skopt.mapping_space import HyperspacePartition
 
 from .space.robo.space import RoboInteger
 from .space.robo.space import RoboReal
@@ -1,12 +1,16 @@
+from .hyperbelt.asha import asha
 from .hyperbelt.hyperband import hyperband
 from .hyperbelt.hyperbelt import hyperbelt
 from .skopt.hyperdrive import hyperdrive
+from .skopt.async_hyperdrive import async_hyperdrive
 #from .robo.hyperbayes import robodrive
 
 
 __all__ = (
+    "asha",
     "hyperband",
     "hyperbelt",
     "hyperdrive",
+    "async_hyperdrive",
 #    "robodrive"
 )
@@ -1,8 +1,12 @@
+from .asha import asha
 from .hyperband import hyperband
+from .hyperband import Continuation
 from .hyperbelt import hyperbelt
 
 
 __all__ = (
+    "asha",
+    "Continuation",
     "hyperband",
     "hyperbelt"
 )
@@ -0,0 +1,125 @@
+from hyperspace.space import HyperspacePartition
+from hyperspace.rover.asha import AsyncSuccessiveHalving
+from hyperspace.rover.asha import request_job
+from hyperspace.rover.evaluators import create_executor
+
+from concurrent.futures import wait
+from concurrent.futures import FIRST_COMPLETED
+from skopt import dump
+
+import os
+
+
+def asha(objective, hyperparameters, results_path, max_iter=100, eta=3, min_budget=1,
+         n_configs=100, verbose=True, random_state=0, n_workers=None, backend="mpi"):
+    """
+    Asynchronous successive halving (ASHA) over every subspace.
+
+    Unlike `hyperbelt`, rungs have no barrier: a coordinator keeps the
+    results of every rung and hands a job to each worker as soon as it is
+    free, either promoting a configuration to the next rung or starting a
+    new one on the lowest rung. See `AsyncSuccessiveHalving`.
+
+    Parameters
+    ----------
+    * `objective` [function]:
+        User defined function which calls a learner
+        and returns a metric of interest, called as `objective(x, budget)`.
+
+    * `hyperparameters` [list, shape=(n_hyperparameters,)]:
+
+    * `results_path` [string]
+        Path to save optimization results
+
+    * `max_iter` [int, default=100]
+        Budget of the highest rung.
+
+    * `eta` [int, default=3]
+        Reduction factor between rungs.
+
+    * `min_budget` [int, default=1]
+        Budget of the lowest rung.
+
+    * `n_configs` [int, default=100]
+        Number of configurations to start, drawn from each subspace in turn.
+
+    * `verbose` [bool, default=True]
+        Print each promotion.
+
+    * `random_state` [int, default=0]
+        Random state for reproducibility.
+
+    * `n_workers` [int, default=None]
+        Number of jobs run at the same time with `backend="processes"` or
+        `"threads"`. Defaults to the number of CPUs. Ignored with MPI,
+        where every rank but the coordinator is a worker.
+
+    * `backend` [str, default="mpi"]
+        - "mpi": rank 0 coordinates, the other ranks run the objective.
+          Needs at least two ranks.
+        - "processes" or "threads": a local pool of `n_workers` workers.
+          With processes, the objective has to be picklable.
+
+    Results of each subspace are saved to `results_path` as `hyperspaceNN`,
+    with the `trial_ids`, `rungs` and `budgets` of every evaluation.
+    """
+    if backend == "mpi":
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+        if comm.Get_size() < 2:
+            raise ValueError("asha with backend='mpi' needs at least 2 ranks, "
+                             "one coordinator and one worker.")
+    elif backend in ("processes", "threads"):
+        rank = 0
+    else:
+        raise ValueError("Invalid backend {}. Read the documentation for "
+                         "supported backends.".format(backend))
+
+    if rank != 0:
+        job = request_job(comm)
+        while job is not None:
+            job = request_job(comm, job, objective(job.x, job.budget))
+        return
+
+    if not os.path.exists(results_path):
+        os.makedirs(results_path, exist_ok=True)
+
+    hyperspace = HyperspacePartition(hyperparameters)
+    scheduler = AsyncSuccessiveHalving(hyperspace, max_iter, eta, min_budget, n_configs, random_state)
+
+    if backend == "mpi":
+        scheduler.serve(comm, verbose)
+    else:
+        if n_workers is None:
+            n_workers = os.cpu_count()
+        _run_local(objective, scheduler, create_executor(n_workers, backend), n_workers, verbose)
+
+    for subspace_id, result in scheduler.results().items():
+        dump(result, os.path.join(results_path, 'hyperspace{:02d}'.format(subspace_id)))
+
+
+def _run_local(objective, scheduler, executor, n_workers, verbose):
+    """
+    Keep `n_workers` jobs of `scheduler` running in `executor` until none is left.
+    """
+    running = {}
+    while True:
+        while len(running) < n_workers:
+            job = scheduler.next_job()
+            if job is None:
+                break
+            running[executor.submit(objective, job.x, job.budget)] = job
+
+        if not running:
+            break
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            job = running.pop(future)
+            scheduler.report(job, future.result())
+            if verbose and job.rung > 0:
+                print(f'Configuration {job.trial_id} on rung {job.rung}, '
+                      f'budget {job.budget}: {future.result()}')
+
+    executor.shutdown()
@@ -2,18 +2,39 @@ import numpy as np
 from math import log, ceil
 
 from skopt.space import Space
+from sklearn.utils import check_random_state
 from hyperspace.kepler import create_result
+from hyperspace.hyperdrive.skopt.models import create_optimizer
+
+
+# Surrogates that can propose the configurations of a bracket.
+MODELS = ("GP", "RF", "GBRT", "RAND")
 
 
 def hyperband(objective, space, max_iter=100, eta=3, random_state=0,
-              verbose=True, n_evaluations=None, rank=0):
+              verbose=True, n_evaluations=None, rank=0, evaluator=None, model=None,
+              min_points=None, continuation=False):
     """
     Hyperband algorithm as defined by Kevin Jamieson.
 
+    Runs every bracket of successive halving, from the most aggressive one
+    (many configurations, small budgets) to plain random search (few
+    configurations, the full budget). Within a bracket, each configuration
+    is evaluated on the rung's budget, and the best `1/eta` of them are
+    promoted to the next rung, with `eta` times the budget.
+
+    With a `model`, brackets draw their configurations as in BOHB: a
+    surrogate is fitted on the evaluations of the highest budget with at
+    least `min_points` of them, and proposes the configurations. Cheap
+    evaluations from earlier brackets then guide where the large budgets go.
+
+    With `continuation`, a promoted configuration resumes training from
+    where its previous rung stopped instead of starting over.
+
     Parameters:
     ----------
     * `objective`: [function]
-        Objective function to be minimized.
+        Objective function to be minimized, called as `objective(x, budget)`.
 
     * `space`: [hyperspace.space]
         Hyperparameter search space bounds.
@@ -23,43 +44,159 @@ def hyperband(objective, space, max_iter=100, eta=3, random_state=0,
 
     * `eta`: [int]
 
+    * `evaluator`: [SerialEvaluator, GroupEvaluator or similar, optional]
+        Evaluates the configurations of each rung with `evaluator.map`.
+        Defaults to evaluating them one after another.
+
+    * `model`: [str, optional]
+        Surrogate proposing the configurations of each bracket, as in
+        `create_optimizer`: "GP", "RF", "GBRT" or "RAND". Defaults to
+        drawing them at random, as in the original Hyperband.
+
+    * `min_points`: [int, optional]
+        Number of evaluations of a budget needed to fit the surrogate on
+        it. Defaults to the number of hyperparameters plus one. Brackets
+        draw at random until a budget has that many.
+
+    * `continuation`: [bool, default=False]
+        Call the objective as `objective(x, budget, state)`, returning
+        `(value, state)`. `state` is `None` on the lowest rung of a bracket
+        and otherwise what the objective returned for the same
+        configuration on the previous rung, e.g. a model or the path of a
+        checkpoint, so training can go on from the previous budget to
+        `budget`. States are dropped when their configuration is not
+        promoted, and are not part of the result. An `evaluator` then has
+        to be built around `Continuation(objective)`, and its states must
+        be picklable to cross processes or ranks.
+
     Returns:
     -------
     * `result` [`OptimizeResult`, scipy object]
+        Besides the usual fields, `brackets`, `rungs` and `budgets` hold the
+        bracket, rung and budget of every evaluation, in the order of
+        `x_iters`, or of `all_x_iters` when `n_evaluations` is given.
 
     Reference:
     ---------
     http://people.eecs.berkeley.edu/~kjamieson/hyperband.html
+
+    Falkner et al., "BOHB: Robust and Efficient Hyperparameter Optimization at Scale", ICML 2018.
     """
+    if model is not None and model not in MODELS:
+        raise ValueError("Invalid model {}. Read the documentation for "
+                         "supported models.".format(model))
+
     logeta = lambda x: log(x)/log(eta)
-    s_max = int(logeta(max_iter))  # number of unique executions of Successive Halving (minus one)
+    # number of unique executions of Successive Halving (minus one), guarding against log rounding
+    s_max = int(logeta(max_iter) + 1e-9)
     B = (s_max+1)*max_iter  # total number of iterations (without reuse) per execution of Succesive Halving (n,r)
     # If space is the original list of tuples, convert to Space()
     if isinstance(space, list):
         space = Space(space)
-    #### Begin Finite Horizon Hyperband outlerloop. Repeat indefinetely.
+    rng = check_random_state(random_state)
+
     yi = []
     Xi = []
+    brackets = []
+    rungs = []
+    budgets = []
+    observations = {}
     for s in reversed(range(s_max+1)):
-        n = int(ceil(int(B/max_iter/(s+1))*eta**s)) # initial number of configurations
+        n = int(ceil(B/max_iter/(s+1)*eta**s)) # initial number of configurations
         r = max_iter*eta**(-s) # initial number of iterations to run configurations for
         # Begin Finite Horizon Successive Halving with (n,r)
+        T = _sample(space, n, rng, observations, model, min_points)
+        states = [None] * len(T)
         for i in range(s+1):
             # Run each of the n_i configs for r_i iterations and keep best n_i/eta
-            n_i = ceil(n*eta**(-i))
-            r_i = ceil(r*eta**(i))
+            n_i = n*eta**(-i)
+            r_i = int(ceil(r*eta**(i)))
 
-            T = space.rvs(ceil(n_i), random_state)
-            iter_result = [objective(t, r_i) for t in T]
+            if continuation:
+                tasks = list(zip(T, states))
+                if evaluator is None:
+                    outputs = [Continuation(objective)(task, r_i) for task in tasks]
+                else:
+                    outputs = evaluator.map(tasks, r_i)
+                iter_result = [value for value, _ in outputs]
+                states = [state for _, state in outputs]
+            elif evaluator is None:
+                iter_result = [objective(t, r_i) for t in T]
+            else:
+                iter_result = evaluator.map(T, r_i)
             yi.append(iter_result)
             Xi.append(T)
-
-            # Get next hyperparameter configurations
-            T = [ T[i] for i in np.argsort(iter_result)[0:int( n_i/eta )] ]
+            brackets.extend([s] * len(T))
+            rungs.extend([i] * len(T))
+            budgets.extend([r_i] * len(T))
+            X_r, y_r = observations.setdefault(r_i, ([], []))
+            X_r.extend(T)
+            y_r.extend(_losses(iter_result).tolist())
 
             if verbose and rank == 0:
-                print(f'Iteration number: {i}, Epochs per config: {r_i}, Num configs: {n_i}, Incumbent: {min(iter_result)}')
+                print(f'Bracket: {s}, Iteration number: {i}, Epochs per config: {r_i}, '
+                      f'Num configs: {len(T)}, Incumbent: {min(_losses(iter_result))}')
 
-        result = create_result(Xi, yi, n_evaluations=n_evaluations, space=space, rng=random_state)
+            # Promote the best configurations to the next rung
+            order = np.argsort(_losses(iter_result), kind="mergesort")[0:int(n_i/eta)]
+            T = [T[j] for j in order]
+            states = [states[j] for j in order]
         # End Finite Horizon Successive Halving with (n,r)
-        return result
+
+    result = create_result(Xi, yi, n_evaluations=n_evaluations, space=space, rng=rng)
+    result.brackets = np.asarray(brackets)
+    result.rungs = np.asarray(rungs)
+    result.budgets = np.asarray(budgets)
+    return result
+
+
+class Continuation(object):
+    """
+    Objective of a `continuation` run, called with the (x, state) pairs of a rung.
+
+    Evaluators passed to `hyperband` with `continuation=True` evaluate rungs
+    through it, e.g. `PoolEvaluator(Continuation(objective), n_workers)`.
+    Picklable when the objective is, so evaluators can send it to their workers.
+
+    Parameters
+    ----------
+    * `objective` [function]:
+        Called as `objective(x, budget, state)`, returning `(value, state)`.
+    """
+    def __init__(self, objective):
+        self.objective = objective
+
+    def __call__(self, task, budget):
+        x, state = task
+        return self.objective(x, budget, state)
+
+
+def _losses(func_vals):
+    """
+    Objective values of a rung, dropping the times of objectives returning (loss, time).
+    """
+    func_vals = np.asarray(func_vals)
+    if np.ndim(func_vals) == 2:
+        return func_vals[:, 0]
+    return func_vals
+
+
+def _sample(space, n_configs, rng, observations, model=None, min_points=None):
+    """
+    Configurations starting a bracket.
+
+    Drawn at random without a model, or while no budget has `min_points`
+    evaluations. Otherwise proposed by the model fitted on the evaluations
+    of the highest budget that has.
+    """
+    if model is not None:
+        if min_points is None:
+            min_points = len(space.dimensions) + 1
+        fitted = [budget for budget, (X, _) in observations.items() if len(X) >= min_points]
+        if fitted:
+            X, y = observations[max(fitted)]
+            optimizer = create_optimizer(space, model, n_initial_points=len(X), random_state=rng)
+            optimizer.tell(list(X), list(y))
+            return optimizer.ask(n_configs)
+
+    return space.rvs(n_configs, random_state=rng)
@@ -1,17 +1,22 @@
-from hyperspace.space import create_hyperspace
-from hyperspace.space import create_hyperbounds
+from hyperspace.space import HyperspacePartition
+from hyperspace.rover.assignment import check_assignment
+from hyperspace.rover.evaluators import GroupEvaluator
+from hyperspace.rover.evaluators import PoolEvaluator
+from hyperspace.rover.evaluators import create_executor
 from hyperspace.rover.latin_hypercube_sampler import lhs_start
 from hyperspace.hyperdrive.hyperbelt.hyperband import hyperband
+from hyperspace.hyperdrive.hyperbelt.hyperband import Continuation
 
 from skopt.callbacks import DeadlineStopper
 from skopt import dump
 
 import os
-from mpi4py import MPI
 
 
 def hyperbelt(objective, hyperparameters, results_path, max_iter=100, eta=3,
-              verbose=True, n_evaluations=None, random_state=0):
+              verbose=True, n_evaluations=None, random_state=0, assignment="block",
+              n_workers=None, backend="mpi", model=None, min_points=None,
+              continuation=False):
     """
     Distributed HyperBand with SMBO - one hyperspace per node.
 
@@ -34,28 +39,106 @@ def hyperbelt(objective, hyperparameters, results_path, max_iter=100, eta=3,
 
     * `random_state` [int, default=0]
         Random state for reproducibility.
+
+    * `assignment` [str or SubspaceAssignment, default="block"]
+        How subspaces are mapped onto ranks. Ranks sharing a subspace
+        evaluate the configurations of each rung in parallel. See `hyperdrive`.
+
+    * `n_workers` [int, default=None]
+        Number of processes each rank uses, through a local process pool.
+        Defaults to 1 with `backend="mpi"`, and to the number of CPUs otherwise.
+        - If a rank has at least `n_workers` subspaces, it runs Hyperband
+          on `n_workers` of them at the same time.
+        - Otherwise it evaluates the configurations of each rung
+          `n_workers` at a time.
+        The objective has to be picklable.
+
+    * `backend` [str, default="mpi"]
+        "mpi", "processes" or "threads". See `hyperdrive`.
+
+    * `model` [str, default=None]
+        Surrogate proposing the configurations of each bracket, fitted on
+        the highest budget with enough evaluations: "GP", "RF", "GBRT" or
+        "RAND". By default every configuration is drawn at random. See `hyperband`.
+
+    * `min_points` [int, default=None]
+        Number of evaluations of a budget needed to fit the surrogate on it.
+        Defaults to the number of hyperparameters plus one.
+
+    * `continuation` [bool, default=False]
+        Call the objective as `objective(x, budget, state)` and hand each
+        promoted configuration the state it returned on the previous rung,
+        so training resumes rather than restarts. See `hyperband`. States
+        have to be picklable when rungs are spread over processes or ranks.
     """
-    comm = MPI.COMM_WORLD
-    rank = comm.Get_rank()
-    size = comm.Get_size()
-
-    # Setup savefile
-    if rank < 10:
-        # Ensure results are sorted by rank
-        filename = 'hyperspace' + str(0) + str(rank)
+    if backend == "mpi":
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+        size = comm.Get_size()
+    elif backend in ("processes", "threads"):
+        # A single local "rank" holding every subspace.
+        rank = 0
+        size = 1
     else:
-        filename = 'hyperspace' + str(rank)
+        raise ValueError("Invalid backend {}. Read the documentation for "
+                         "supported backends.".format(backend))
+
+    if n_workers is None:
+        n_workers = 1 if backend == "mpi" else os.cpu_count()
 
     if not os.path.exists(results_path):
         os.makedirs(results_path, exist_ok=True)
 
-    savefile = os.path.join(results_path, filename)
-
-    hyperspace = create_hyperspace(hyperparameters)
-    space = hyperspace[rank]
-
-    result = hyperband(objective, space, max_iter, eta,
-                       random_state, verbose, n_evaluations, rank)
-
-    # Each worker will independently write their results to disk
-    dump(result, savefile)
+    hyperspace = HyperspacePartition(hyperparameters)
+    assignment = check_assignment(assignment).assign(len(hyperspace), size)
+    subspaces = assignment.subspaces(rank)
+
+    pool = "threads" if backend == "threads" else "processes"
+    # Evaluators are handed the (x, state) pairs of each rung.
+    task_objective = Continuation(objective) if continuation else objective
+    executor = None
+    evaluator = None
+    if n_workers > 1 and len(subspaces) >= n_workers:
+        # Run Hyperband on several subspaces at the same time.
+        executor = create_executor(n_workers, pool)
+    elif n_workers > 1:
+        evaluator = PoolEvaluator(task_objective, n_workers, create_executor(n_workers, pool))
+
+    if size > len(hyperspace):
+        group_comm = comm.Split(color=subspaces[0], key=rank)
+        evaluator = GroupEvaluator(task_objective, group_comm, evaluator)
+        if group_comm.Get_rank() != 0:
+            evaluator.serve()
+            evaluator.local.close()
+            return
+
+    futures = []
+    for subspace_id in subspaces:
+        # Setup savefile. Ensure results are sorted by subspace.
+        filename = 'hyperspace{:02d}'.format(subspace_id)
+        savefile = os.path.join(results_path, filename)
+
+        space = hyperspace[subspace_id]
+
+        args = (objective, space, max_iter, eta, random_state,
+                verbose, n_evaluations, rank, evaluator, model, min_points, continuation)
+
+        if executor is not None:
+            futures.append((savefile, executor.submit(hyperband, *args)))
+            continue
+
+        result = hyperband(*args)
+
+        # Each worker will independently write their results to disk
+        dump(result, savefile)
+
+    for savefile, future in futures:
+        dump(future.result(), savefile)
+
+    if executor is not None:
+        executor.shutdown()
+    if evaluator is not None:
+        evaluator.close()
+        if isinstance(evaluator, GroupEvaluator):
+            evaluator.local.close()
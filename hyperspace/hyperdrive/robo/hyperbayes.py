@@ -1,14 +1,16 @@
 import os
 import pickle
+import warnings
 
 from hyperspace.space.robo import create_robospace
 from hyperspace.space.robo import convert_robospace
+from hyperspace.rover.assignment import check_assignment
 from robo.fmin import bayesian_optimization
 
 from mpi4py import MPI
 
 
-def robodrive(objective, hyperparameters, results_path, n_iterations=50):
+def robodrive(objective, hyperparameters, results_path, n_iterations=50, assignment="block"):
     """
     Distributed Bayesian optimization with Robo.
 
@@ -25,31 +27,39 @@ def robodrive(objective, hyperparameters, results_path, n_iterations=50):
 
     * `n_iterations` [int, default=50]
         Number of optimization iterations
+
+    * `assignment` [str or SubspaceAssignment, default="block"]
+        How subspaces are mapped onto ranks. See `hyperdrive`.
+        - RoBO evaluates one point at a time, so only the lowest rank
+          sharing a subspace optimizes it.
     """
     comm = MPI.COMM_WORLD
     rank = comm.Get_rank()
     size = comm.Get_size()
 
-    # Setup savefile
-    if rank < 10:
-        # Ensure results are sorted by rank
-        filename = 'hyperspace' + str(0) + str(rank)
-    else:
-        filename = 'hyperspace' + str(rank)
-
     if not os.path.exists(results_path):
         os.makedirs(results_path, exist_ok=True)
 
-    savefile = os.path.join(results_path, filename)
-
     robospace = create_robospace(hyperparameters)
     hyperspace = convert_robospace(robospace)
-    space = hyperspace[rank]
+    assignment = check_assignment(assignment).assign(len(hyperspace), size)
+
+    for subspace_id in assignment.subspaces(rank):
+        if assignment.ranks(subspace_id)[0] != rank:
+            warnings.warn("Rank {} shares subspace {} and has nothing to do: RoBO "
+                          "cannot evaluate points in parallel.".format(rank, subspace_id))
+            continue
+
+        # Setup savefile. Ensure results are sorted by subspace.
+        filename = 'hyperspace{:02d}'.format(subspace_id)
+        savefile = os.path.join(results_path, filename)
+
+        space = hyperspace[subspace_id]
 
-    lower = space[0]
-    upper = space[1]
+        lower = space[0]
+        upper = space[1]
 
-    results = bayesian_optimization(objective, lower, upper, num_iterations=n_iterations)
+        results = bayesian_optimization(objective, lower, upper, num_iterations=n_iterations)
 
-    with open(savefile, 'wb') as handle:
-        pickle.dump(results, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(savefile, 'wb') as handle:
+            pickle.dump(results, handle, protocol=pickle.HIGHEST_PROTOCOL)
@@ -1,3 +1,4 @@
+from .async_hyperdrive import async_hyperdrive
 from .dualdrive import dualdrive
 from .hyperdrive import hyperdrive
 
@@ -0,0 +1,250 @@
+from hyperspace.space import HyperspacePartition
+from hyperspace.rover.checkpoints import IncrementalCheckpointSaver
+from hyperspace.rover.assignment import check_assignment
+from hyperspace.kepler import load_checkpoints
+from hyperspace.hyperdrive.skopt.hyperdrive import _initial_points
+from hyperspace.hyperdrive.skopt.hyperdrive import _n_remaining
+from hyperspace.hyperdrive.skopt.hyperdrive import _flush_checkpoints
+from hyperspace.hyperdrive.skopt.models import create_optimizer
+from hyperspace.hyperdrive.skopt.models import ask_pending
+from hyperspace.hyperdrive.skopt.models import tell_recorded
+from hyperspace.hyperdrive.skopt.models import tell_resumed
+
+from skopt.callbacks import DeadlineStopper
+from skopt.callbacks import VerboseCallback
+from skopt.utils import eval_callbacks
+from skopt import dump
+
+import os
+import asyncio
+import warnings
+
+
+def async_hyperdrive(objective, hyperparameters, results_path, model="GP", n_iterations=50,
+                     verbose=False, checkpoints_path=None, deadline=None, sampler=None,
+                     n_samples=None, random_state=0, assignment="block", max_concurrency=8,
+                     strategy="cl_min", backend="mpi"):
+    """
+    Asynchronous optimization - one optimization per subspace, many
+    evaluations in flight.
+
+    Each rank runs one event loop holding all of its subspaces. A new point
+    is proposed as soon as a slot is free, so up to `max_concurrency`
+    evaluations are awaited at the same time across the rank's subspaces.
+    Suits objectives that spend their time waiting, e.g. on a training
+    job submitted to a queue.
+
+    Parameters
+    ----------
+    * `objective` [coroutine function or function]:
+        User defined `async def` function which calls a learner
+        and returns a metric of interest. A plain function is run
+        in the event loop's default executor.
+
+    * `hyperparameters` [list, shape=(n_hyperparameters,)]:
+
+    * `results_path` [string]
+        Path to save optimization results
+
+    * `max_concurrency` [int, default=8]
+        Maximum number of evaluations in flight on each rank.
+
+    * `strategy` [str, default="cl_min"]
+        Lie told to the optimizer for evaluations still in flight.
+        Options:
+        - "cl_min", "cl_mean", "cl_max": constant liar
+        - "kb": kriging believer
+
+    * `backend` [str, default="mpi"]
+        Options:
+        - "mpi": spread subspaces over the ranks of `MPI.COMM_WORLD`.
+        - "local": every subspace on a single event loop, no MPI needed.
+
+    See `hyperdrive` for the remaining parameters.
+
+    Notes
+    -----
+    * The optimizers run on the event loop, so fitting a surrogate
+      briefly holds up the other subspaces of the rank.
+    * Only the lowest rank sharing a subspace optimizes it.
+    """
+    if backend == "mpi":
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+        size = comm.Get_size()
+    elif backend == "local":
+        comm = None
+        rank = 0
+        size = 1
+    else:
+        raise ValueError("Invalid backend {}. Read the documentation for "
+                         "supported backends.".format(backend))
+
+    if checkpoints_path and sampler:
+        raise ValueError('Cannot use both a restart from a previous run and ' \
+                         'use latin hypercube sampling for initial search points!')
+
+    if sampler and not n_samples:
+        raise ValueError(f'Sampler requires n_samples > 0. Got {n_samples}')
+
+    if model not in ("GP", "RF", "GBRT", "RAND"):
+        raise ValueError("Invalid model {}. Read the documentation for "
+                         "supported models.".format(model))
+
+    if max_concurrency < 1:
+        raise ValueError('max_concurrency must be at least 1, got {}.'.format(max_concurrency))
+
+    if strategy not in ("cl_min", "cl_mean", "cl_max", "kb"):
+        raise ValueError("Invalid strategy {}. Read the documentation for "
+                         "supported strategies.".format(strategy))
+
+    hyperspace = HyperspacePartition(hyperparameters)
+    assignment = check_assignment(assignment).assign(len(hyperspace), size)
+
+    subspaces = []
+    for subspace_id in assignment.subspaces(rank):
+        if assignment.ranks(subspace_id)[0] != rank:
+            warnings.warn("Rank {} shares subspace {} and has nothing to do: raise "
+                          "max_concurrency instead of adding ranks.".format(rank, subspace_id))
+            continue
+        subspaces.append(subspace_id)
+
+    checkpoints = {}
+    if checkpoints_path:
+        checkpoints = load_checkpoints(checkpoints_path, len(hyperspace), rank, size, assignment, comm)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(_optimize_subspaces(
+            objective, hyperspace, subspaces, results_path, model, n_iterations,
+            verbose and rank == 0, checkpoints_path, deadline, sampler, n_samples,
+            random_state, max_concurrency, strategy, checkpoints, rank
+        ))
+    finally:
+        loop.close()
+
+
+async def _optimize_subspaces(objective, hyperspace, subspaces, results_path, model,
+                              n_iterations, verbose, checkpoints_path, deadline, sampler,
+                              n_samples, random_state, max_concurrency, strategy, checkpoints,
+                              rank=None):
+    """
+    Optimize the subspaces of a rank side by side, sharing `max_concurrency` slots.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    tasks = []
+    for subspace_id in subspaces:
+        # Setup savefile. Ensure results are sorted by subspace.
+        filename = 'hyperspace{:02d}'.format(subspace_id)
+        savefile = os.path.join(results_path, filename)
+
+        space = hyperspace[subspace_id]
+        init_points, init_response, n_rand, resume = _initial_points(hyperspace, subspace_id, sampler,
+                                                                     n_samples, checkpoints.get(subspace_id))
+
+        callbacks = []
+        if deadline:
+            callbacks.append(DeadlineStopper(deadline))
+
+        if checkpoints_path:
+            checkpoint_callback = IncrementalCheckpointSaver(checkpoints_path, filename, rank=rank,
+                                                             subspace_id=subspace_id)
+            callbacks.append(checkpoint_callback)
+
+        tasks.append(_optimize_subspace(objective, space, savefile, semaphore, model,
+                                        n_iterations, verbose, callbacks, init_points,
+                                        init_response, n_rand, random_state, strategy, resume))
+
+    await asyncio.gather(*tasks)
+
+
+async def _optimize_subspace(objective, space, savefile, semaphore, model, n_iterations,
+                             verbose, callbacks, init_points, init_response, n_rand,
+                             random_state, strategy, resume=None):
+    """
+    Ask-and-tell loop of one subspace, keeping as many evaluations in flight
+    as the shared `semaphore` allows.
+
+    Writes the result to `savefile` when done.
+    """
+    if init_points is None:
+        init_points = []
+    if resume is None:
+        resume = {'kernel': None, 'rng_state': None, 'tell_state': None}
+
+    n_iterations = _n_remaining(n_iterations, init_response)
+    optimizer = create_optimizer(space, model, n_rand + len(init_points), random_state,
+                                 resume['kernel'])
+
+    if verbose:
+        callbacks = callbacks + [VerboseCallback(n_init=len(init_points) if init_response is None else 0,
+                                                 n_random=n_rand, n_total=n_iterations)]
+
+    result = None
+    if init_points:
+        if init_response is None:
+            init_tasks = []
+            for x in init_points:
+                await semaphore.acquire()
+                init_tasks.append(_submit(objective, x, semaphore))
+            init_response = await asyncio.gather(*init_tasks)
+            n_iterations -= len(init_response)
+        result = tell_resumed(optimizer, init_points, list(init_response),
+                              resume['rng_state'], resume['tell_state'])
+        if eval_callbacks(callbacks, result):
+            n_iterations = 0
+
+    pending = {}
+    n_asked = 0
+    while n_asked < n_iterations or pending:
+        # Fill the free slots, waiting for one if none of our points are in flight.
+        while n_asked < n_iterations and (not pending or not semaphore.locked()):
+            await semaphore.acquire()
+            point = ask_pending(optimizer, list(pending.values()), strategy)
+            task = _submit(objective, point, semaphore)
+            pending[task] = point
+            n_asked += 1
+
+        done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+        points = []
+        func_vals = []
+        for task in done:
+            points.append(pending.pop(task))
+            func_vals.append(task.result())
+        result = tell_recorded(optimizer, points, func_vals)
+
+        if eval_callbacks(callbacks, result):
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+
+    _flush_checkpoints(callbacks)
+    if result is not None:
+        dump(result, savefile)
+
+    return result
+
+
+def _submit(objective, point, semaphore):
+    """
+    Evaluate `point` in a new task, which frees the slot held in `semaphore` once done.
+
+    The slot is freed by a done callback, so that it is also freed when
+    the task is cancelled before it starts running.
+    """
+    task = asyncio.ensure_future(_evaluate(objective, point))
+    task.add_done_callback(lambda _: semaphore.release())
+    return task
+
+
+async def _evaluate(objective, point):
+    """
+    Await the objective at `point`.
+    """
+    if asyncio.iscoroutinefunction(objective):
+        return await objective(point)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, objective, point)
@@ -1,21 +1,24 @@
-from hyperspace.space import create_hyperspace
-from hyperspace.space import create_hyperbounds
+from hyperspace.space import HyperspacePartition
+from hyperspace.rover.assignment import check_assignment
+from hyperspace.rover.evaluators import PoolEvaluator
+from hyperspace.rover.evaluators import create_executor
 from hyperspace.rover.latin_hypercube_sampler import lhs_start
+from hyperspace.hyperdrive.skopt.hyperdrive import _minimize_subspace
 
-from skopt import gp_minimize
-from skopt import gbrt_minimize
-from skopt import forest_minimize
-from skopt import dummy_minimize
 from skopt.callbacks import DeadlineStopper
 from skopt import dump
 
-from mpi4py import MPI
+import os
 
 
 def dualdrive(objective, hyperparameters, results_path, model="GP", n_iterations=50,
-              verbose=False, deadline=None, sampler=None, n_samples=None, random_state=0):
+              verbose=False, deadline=None, sampler=None, n_samples=None, random_state=0,
+              assignment="block", n_workers=None, backend="mpi"):
     """
-    Distributed optimization - two optimizations per node.
+    Distributed optimization - several optimizations per node.
+
+    Run with half as many ranks as subspaces for two optimizations per rank.
+    Any other number of ranks works as well, see `hyperdrive`.
 
     Parameters
     ----------
@@ -43,95 +46,111 @@ def dualdrive(objective, hyperparameters, results_path, model="GP", n_iterations
         Verbosity of optimization.
 
     * `deadline` [int, optional]
-        Deadline (seconds) for the optimization to finish within.
+        Deadline (seconds) for each subspace's optimization to finish within.
 
     * `random_state` [int, default=0]
         Random state for reproducibility.
-    """
-    comm = MPI.COMM_WORLD
-    rank = comm.Get_rank()
-    size = comm.Get_size()
-
-    if rank == 0:
-        hyperspace = create_hyperspace(hyperparameters)
-        hyperspace = [hyperspace[i:i+2] for i in range(0, len(hyperspace), 2)]
-
-        if sampler and not n_samples:
-            raise ValueError('Sampler requires n_samples > 0. Got {}'.format(n_samples))
-        elif sampler and n_samples:
-            hyperbounds = create_hyperbounds(hyperparameters)
-            hyperbounds = [hyperbounds[i:i+2] for i in range(0, len(hyperbounds), 2)]
-    else:
-        hyperspace = None
-        if sampler is not None:
-            hyperbounds = None
-
-    spaces = comm.scatter(hyperspace, root=0)
-    space0 = spaces[0]
-    space1 = spaces[1]
-
-    if sampler:
-        bounds = comm.scatter(hyperbounds, root=0)
-        bounds0 = bounds[0]
-        bounds1 = bounds[1]
-        # Get initial points in the obj. function domain via latin hypercube sampling
-        init_points0 = lhs_start(bounds0, n_samples)
-        init_points1 = lhs_start(bounds1, n_samples)
-        n_rand = 10 - len(init_points0)
-    else:
-        init_points0 = None
-        init_points1 = None
-        r_rand = 10
 
-    if deadline:
-        deadline = DeadlineStopper(deadline)
+    * `assignment` [str or SubspaceAssignment, default="block"]
+        How subspaces are mapped onto ranks. See `hyperdrive`.
 
-    # Thanks Guido for refusing to believe in switch statements.
-    # Case 0
-    if model == "GP":
-        # Verbose mode should only run on node 0.
-        if verbose and rank == 0:
-            result0 = gp_minimize(objective, space0, n_calls=n_iterations, verbose=verbose,
-                                 callback=deadline, x0=init_points0, n_random_starts=n_rand,
-                                 random_state=random_state)
-        # Also run on the second space
-        result1 = gp_minimize(objective, space1, n_calls=n_iterations,
-                             callback=deadline, x0=init_points1, n_random_starts=n_rand,
-                             random_state=random_state)
-    # Case 1
-    elif model == "RF":
-        if verbose and rank == 0:
-            result0 = forest_minimize(objective, space0, n_calls=n_iterations, verbose=verbose,
-                                      callback=deadline, x0=init_points0, n_random_starts=n_rand,
-                                      random_state=random_state)
-
-        result1 = forest_minimize(objective, space1, n_calls=n_iterations,
-                                  callback=deadline, x0=init_points1, n_random_starts=n_rand,
-                                  random_state=random_state)
-    # Case 2
-    elif model == "GRBRT":
-        if verbose and rank == 0:
-            result0 = gbrt_minimize(objective, space0, n_calls=n_iterations, verbose=verbose,
-                                    callback=deadline, x0=init_points0, n_random_starts=n_rand,
-                                    random_state=random_state)
-
-        result1 = gbrt_minimize(objective, space1, n_calls=n_iterations,
-                                callback=deadline, x0=init_points1, n_random_starts=n_rand,
-                                random_state=random_state)
-    # Case 3
-    elif model == "RAND":
-        if verbose and rank == 0:
-            result0 = dummy_minimize(objective, space0, n_calls=n_iterations, verbose=verbose,
-                                     callback=deadline, x0=init_points0, n_random_starts=n_rand,
-                                     random_state=random_state)
-
-        result1 = dummy_minimize(objective, space1, n_calls=n_iterations,
-                                 callback=deadline, x0=init_points1, n_random_starts=n_rand,
-                                 random_state=random_state)
-    else:
+    * `n_workers` [int, default=None]
+        Number of processes each rank uses. With `n_workers=2`, both
+        optimizations of a rank run at the same time. See `hyperdrive`.
+
+    * `backend` [str, default="mpi"]
+        "mpi", "processes" or "threads". The local backends run every
+        subspace in a pool of `n_workers` and name the results as an MPI
+        run with two subspaces per rank would. See `hyperdrive`.
+    """
+    if backend == "mpi":
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+        size = comm.Get_size()
+    elif backend not in ("processes", "threads"):
+        raise ValueError("Invalid backend {}. Read the documentation for "
+                         "supported backends.".format(backend))
+
+    if n_workers is None:
+        n_workers = 1 if backend == "mpi" else os.cpu_count()
+
+    if sampler and not n_samples:
+        raise ValueError('Sampler requires n_samples > 0. Got {}'.format(n_samples))
+
+    if model not in ("GP", "RF", "GBRT", "RAND"):
         raise ValueError("Invalid model {}. Read the documentation for "
                          "supported models.".format(model))
 
-    # Each worker will independently write their results to disk
-    dump(result0, results_path + '/hyperspace0' + '_rank' + str(rank))
-    dump(result1, results_path + '/hyperspace1' + '_rank' + str(rank))
+    # Each rank builds only its own hyperspaces.
+    hyperspace = HyperspacePartition(hyperparameters)
+    assignment = check_assignment(assignment)
+
+    group_comm = None
+    if backend == "mpi":
+        assignment.assign(len(hyperspace), size)
+        jobs = [(rank, index, subspace_id)
+                for index, subspace_id in enumerate(assignment.subspaces(rank))]
+
+        if size > len(hyperspace):
+            group_comm = comm.Split(color=jobs[0][2], key=rank)
+    else:
+        # Lay out the results as two subspaces per rank.
+        n_ranks = max(len(hyperspace) // 2, 1)
+        assignment.assign(len(hyperspace), n_ranks)
+        jobs = [(job_rank, index, subspace_id)
+                for job_rank in range(n_ranks)
+                for index, subspace_id in enumerate(assignment.subspaces(job_rank))]
+
+    pool = "threads" if backend == "threads" else "processes"
+    executor = None
+    local = None
+    if n_workers > 1 and len(jobs) >= n_workers:
+        # Optimize several subspaces at the same time.
+        executor = create_executor(n_workers, pool)
+    elif n_workers > 1:
+        # Evaluate several points of a subspace at the same time.
+        local = PoolEvaluator(objective, n_workers, create_executor(n_workers, pool))
+
+    futures = []
+    for job_rank, index, subspace_id in jobs:
+        space = hyperspace[subspace_id]
+
+        if sampler:
+            bounds = hyperspace.bounds(subspace_id)
+            # Get initial points in the obj. function domain via latin hypercube sampling
+            init_points = lhs_start(bounds, n_samples)
+            n_rand = 10 - len(init_points)
+        else:
+            init_points = None
+            n_rand = 10
+
+        callbacks = []
+        if deadline:
+            callbacks.append(DeadlineStopper(deadline))
+
+        savefile = results_path + '/hyperspace' + str(index) + '_rank' + str(job_rank)
+
+        # Verbose mode should only run on node 0.
+        args = (objective, space, group_comm, local, model, n_iterations,
+                verbose and job_rank == 0 and index == 0, callbacks,
+                init_points, None, n_rand, random_state)
+
+        if executor is not None:
+            futures.append((savefile, executor.submit(_minimize_subspace, *args)))
+            continue
+
+        result = _minimize_subspace(*args)
+        if result is None:
+            continue
+
+        # Each worker will independently write their results to disk
+        dump(result, savefile)
+
+    for savefile, future in futures:
+        dump(future.result(), savefile)
+
+    if executor is not None:
+        executor.shutdown()
+    if local is not None:
+        local.close()
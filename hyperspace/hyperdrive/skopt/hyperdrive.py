@@ -1,24 +1,52 @@
-from hyperspace.space import create_hyperspace
-from hyperspace.space import create_hyperbounds
+from hyperspace.space import HyperspacePartition
 from hyperspace.kepler import _load_checkpoint
-from hyperspace.rover.checkpoints import CheckpointSaver
+from hyperspace.kepler import load_checkpoints
+from hyperspace.rover.checkpoints import IncrementalCheckpointSaver
+from hyperspace.rover.checkpoints import CheckpointManifest
 from hyperspace.rover.latin_hypercube_sampler import lhs_start
+from hyperspace.rover.assignment import check_assignment
+from hyperspace.rover.evaluators import SerialEvaluator
+from hyperspace.rover.evaluators import GroupEvaluator
+from hyperspace.rover.evaluators import PoolEvaluator
+from hyperspace.rover.evaluators import create_executor
+from hyperspace.rover.scheduler import SubspaceScheduler
+from hyperspace.rover.scheduler import request_work
+from hyperspace.rover.exchange import IncumbentExchange
+from hyperspace.rover.exchange import NeighbourExchange
+from hyperspace.rover.cache import EvaluationCache
+from hyperspace.rover.cache import CachedObjective
+from hyperspace.hyperdrive.skopt.models import minimize
+from hyperspace.hyperdrive.skopt.models import batch_minimize
+from hyperspace.hyperdrive.skopt.models import create_optimizer
+from hyperspace.hyperdrive.skopt.models import ask_batch
+from hyperspace.hyperdrive.skopt.models import tell_recorded
+from hyperspace.hyperdrive.skopt.models import tell_resumed
+from hyperspace.hyperdrive.skopt.models import ModelRetention
+from hyperspace.hyperdrive.skopt.models import check_keep_models
+from hyperspace.hyperdrive.skopt.models import prune_models
 
-from skopt import gp_minimize
-from skopt import gbrt_minimize
-from skopt import forest_minimize
-from skopt import dummy_minimize
 from skopt.callbacks import DeadlineStopper
+from skopt.utils import create_result
+from skopt.utils import eval_callbacks
 from skopt import dump
 
 import os
-from mpi4py import MPI
+import numpy as np
 
 
 def hyperdrive(objective, hyperparameters, results_path, model="GP", n_iterations=50, verbose=False,
-               checkpoints_path=None, deadline=None, sampler=None, n_samples=None, random_state=0):
+               checkpoints_path=None, deadline=None, sampler=None, n_samples=None, random_state=0,
+               assignment="block", scheduler="static", chunk_size=10, n_workers=None,
+               batch_size=None, batch_strategy="cl_min", backend="mpi",
+               exchange_every=None, n_exchange=1, exchange_mode="incumbents", cache_path=None,
+               async_checkpoints=False, keep_models="all", compress=None):
     """
-    Distributed optimization - one optimization per node.
+    Distributed optimization - one optimization per subspace.
+
+    The 2**n_hyperparameters subspaces are spread over however many ranks
+    are available. With fewer ranks than subspaces, each rank works through
+    a queue of subspaces. With more ranks than subspaces, the ranks sharing
+    a subspace evaluate a batch of points in parallel at each iteration.
 
     Parameters
     ----------
@@ -33,6 +61,15 @@ def hyperdrive(objective, hyperparameters, results_path, model="GP", n_iteration
 
     * `checkpoint_path` [string]
         Path to previously saved results. Used to resume optimization.
+        Each subspace appends its new evaluations to `hyperspaceNN.log`
+        there at every iteration, see `IncrementalCheckpointSaver`, and records
+        where the log stands in the directory's `CheckpointManifest`. At the
+        end, rank 0 merges these entries into `manifest.json`.
+        A resumed subspace only runs what is left of its `n_iterations`, with
+        the random state of its optimizer and the kernel hyperparameters of
+        its latest surrogate restored. Checkpoints are named after subspaces,
+        so a search may resume on a different number of ranks than it was
+        checkpointed on, see `hyperspace.kepler.load_checkpoints`.
 
     * `model` [string, default="GP"]
         Probilistic learner used to model our objective function.
@@ -43,7 +80,8 @@ def hyperdrive(objective, hyperparameters, results_path, model="GP", n_iteration
         - "RAND": Random search
 
     * `n_iterations` [int, default=50]
-        Number of optimization iterations
+        Number of optimization iterations per subspace, including those
+        restored from `checkpoints_path`.
 
     * `verbose` [bool, default=False]
         Verbosity of optimization.
@@ -52,7 +90,8 @@ def hyperdrive(objective, hyperparameters, results_path, model="GP", n_iteration
         Whether to checkpoint at each step of the optimization.
 
     * `deadline` [int, optional]
-        Deadline (seconds) for the optimization to finish within.
+        Deadline (seconds) for each subspace's optimization to finish within.
+        - With `scheduler="dynamic"`, the deadline is per worker rank.
 
     * `sampler` [str, default=None]
         Random sampling scheme for optimizer's initial runs.
@@ -66,111 +105,491 @@ def hyperdrive(objective, hyperparameters, results_path, model="GP", n_iteration
 
     * `random_state` [int, default=0]
         Random state for reproducibility.
+
+    * `assignment` [str or SubspaceAssignment, default="block"]
+        How subspaces are mapped onto ranks.
+        Options:
+        - "block": contiguous blocks of subspaces (or ranks)
+        - "roundrobin": subspace i goes to rank i % size
+        - an instance of `hyperspace.rover.assignment.SubspaceAssignment`,
+          e.g. `CostWeightedAssignment(costs)`.
+
+    * `scheduler` [str, default="static"]
+        How work is handed out.
+        Options:
+        - "static": each rank runs the subspaces given by `assignment`.
+        - "dynamic": rank 0 coordinates and hands out work units of
+          `chunk_size` evaluations on one subspace to the other ranks as they
+          become free. `assignment` sets each worker's initial queue, and idle
+          workers steal pending subspaces from the others. The optimizer
+          state moves with each work unit. Requires at least two ranks.
+
+    * `chunk_size` [int, default=10]
+        Number of evaluations per work unit with `scheduler="dynamic"`.
+
+    * `n_workers` [int, default=None]
+        Number of processes each rank uses, through a local process pool.
+        Defaults to 1 with `backend="mpi"`, and to the number of CPUs otherwise.
+        - If a rank has at least `n_workers` subspaces, it optimizes
+          `n_workers` of them at the same time.
+        - Otherwise it evaluates batches of `n_workers` points per subspace
+          at the same time.
+        The objective has to be picklable, e.g. a function defined at the
+        top level of a module.
+
+    * `batch_size` [int, default=None]
+        Number of points proposed per subspace per iteration. Defaults to
+        the number of processes evaluating the subspace: `n_workers` times
+        the number of ranks sharing it. Larger batches than that are
+        evaluated in turns. `n_iterations` still counts evaluations.
+
+    * `batch_strategy` [str, default="cl_min"]
+        How a batch is proposed.
+        Options:
+        - "cl_min", "cl_mean", "cl_max": constant liar
+        - "kb": kriging believer
+
+    * `backend` [str, default="mpi"]
+        Where subspaces run.
+        Options:
+        - "mpi": spread over the ranks of `MPI.COMM_WORLD`.
+        - "processes": every subspace in a local process pool of `n_workers`,
+          no MPI needed. Results and checkpoints are laid out as with MPI.
+        - "threads": as "processes", with a thread pool.
+
+    * `exchange_every` [int, default=None]
+        If given, the ranks share their `n_exchange` best points every
+        `exchange_every` iterations. Each rank adds the received points
+        that fall inside its own subspace to its observations, which
+        improves its surrogate at no extra objective cost. The shared
+        points show up in the results. Requires `backend="mpi"` and
+        `scheduler="static"`, and runs one subspace at a time per rank.
+
+    * `n_exchange` [int, default=1]
+        Number of best points each rank shares. See `exchange_every`.
+
+    * `exchange_mode` [str, default="incumbents"]
+        What is shared every `exchange_every` iterations.
+        Options:
+        - "incumbents": the `n_exchange` best points of each rank, with
+          every other rank.
+        - "neighbours": every observation lying in the overlap of two
+          subspaces differing in a single hyperparameter split, sent point
+          to point between the two ranks. Needs at least one rank per subspace.
+
+    * `cache_path` [string, default=None]
+        Directory of an evaluation cache shared by all ranks, e.g. on
+        `/dev/shm` for ranks of one node or on a shared file system.
+        Configurations already evaluated by any rank, for instance in the
+        overlap of two subspaces, are looked up instead of evaluated again.
+        Objective values have to be picklable.
+
+    * `async_checkpoints` [bool, default=False]
+        Write checkpoints on a background thread, so the optimization never
+        waits on the file system. Pending writes are flushed when each
+        subspace finishes, at exit and on SIGTERM or SIGINT.
+
+    * `keep_models` [str or int, default="all"]
+        Fitted surrogates kept in memory, in the results and in the checkpoints.
+        Options:
+        - "all": one model per iteration
+        - "last": the latest model
+        - "none": no model. The latest one is kept until the subspace is done.
+        - an int `N`: the `N` latest models
+
+    * `compress` [int, default=None]
+        Compression level from 0 to 9 of the dumped results, see `skopt.dump`.
     """
-    comm = MPI.COMM_WORLD
-    rank = comm.Get_rank()
-    size = comm.Get_size()
+    if backend == "mpi":
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+        size = comm.Get_size()
+    elif backend in ("processes", "threads"):
+        # A single local "rank" holding every subspace.
+        comm = None
+        rank = 0
+        size = 1
+        if scheduler != "static":
+            raise ValueError('The {} backend hands out subspaces on demand already, '
+                             'use scheduler="static".'.format(backend))
+    else:
+        raise ValueError("Invalid backend {}. Read the documentation for "
+                         "supported backends.".format(backend))
+
+    if n_workers is None:
+        n_workers = 1 if backend == "mpi" else os.cpu_count()
 
     if checkpoints_path and sampler:
         raise ValueError('Cannot use both a restart from a previous run and ' \
                          'use latin hypercube sampling for initial search points!')
 
-    # Setup savefile
-    if rank < 10:
-        # Ensure results are sorted by rank
-        filename = 'hyperspace' + str(0) + str(rank)
-    else:
-        filename = 'hyperspace' + str(rank)
+    if sampler and not n_samples:
+        raise ValueError(f'Sampler requires n_samples > 0. Got {n_samples}')
 
-    savefile = os.path.join(results_path, filename)
+    if model not in ("GP", "RF", "GBRT", "RAND"):
+        raise ValueError("Invalid model {}. Read the documentation for "
+                         "supported models.".format(model))
+
+    if n_workers < 1:
+        raise ValueError('n_workers must be at least 1, got {}.'.format(n_workers))
+
+    if batch_size is not None and batch_size < 1:
+        raise ValueError('batch_size must be at least 1, got {}.'.format(batch_size))
+
+    if batch_strategy not in ("cl_min", "cl_mean", "cl_max", "kb"):
+        raise ValueError("Invalid batch_strategy {}. Read the documentation for "
+                         "supported strategies.".format(batch_strategy))
+
+    n_keep = check_keep_models(keep_models)
+    dump_options = {'compress': compress} if compress else {}
+
+    if exchange_every is not None and (backend != "mpi" or scheduler != "static"):
+        raise ValueError('Sharing incumbents between ranks requires backend="mpi" '
+                         'and scheduler="static".')
+
+    if exchange_mode not in ("incumbents", "neighbours"):
+        raise ValueError("Invalid exchange_mode {}. Read the documentation for "
+                         "supported modes.".format(exchange_mode))
+
+    if cache_path:
+        objective = CachedObjective(objective, EvaluationCache(cache_path))
+
+    hyperspace = HyperspacePartition(hyperparameters)
+
+    if exchange_every is not None and exchange_mode == "neighbours" and size < len(hyperspace):
+        raise ValueError('Exchanging with neighbours needs at least one rank per subspace, '
+                         'got {} ranks for {} subspaces.'.format(size, len(hyperspace)))
+
+    if scheduler == "dynamic":
+        if size < 2:
+            raise ValueError('The dynamic scheduler needs at least two ranks, got {}.'.format(size))
+
+        # Rank 0 coordinates, the remaining ranks are workers.
+        assignment = check_assignment(assignment).assign(len(hyperspace), size - 1)
+        if rank == 0:
+            SubspaceScheduler(comm, assignment, n_iterations).serve()
+            if checkpoints_path:
+                _compact_manifest(comm, checkpoints_path)
+            return
+
+        callbacks = [ModelRetention(keep_models)]
+        if deadline:
+            callbacks.append(DeadlineStopper(deadline))
+
+        local = PoolEvaluator(objective, n_workers) if n_workers > 1 else None
+        unit = request_work(comm)
+        while unit is not None:
+            _run_work_unit(objective, hyperspace, unit, local, model, chunk_size, verbose, callbacks,
+                           results_path, checkpoints_path, sampler, n_samples, random_state,
+                           batch_size, batch_strategy, async_checkpoints, dump_options, n_keep, rank)
+            unit = request_work(comm, unit)
+
+        if local is not None:
+            local.close()
+        if checkpoints_path:
+            _compact_manifest(comm, checkpoints_path)
+        return
+    elif scheduler != "static":
+        raise ValueError("Invalid scheduler {}. Read the documentation for "
+                         "supported schedulers.".format(scheduler))
+
+    assignment = check_assignment(assignment).assign(len(hyperspace), size)
+    subspaces = assignment.subspaces(rank)
+
+    # Ranks sharing a subspace evaluate its points together.
+    group_comm = None
+    if size > len(hyperspace):
+        group_comm = comm.Split(color=subspaces[0], key=rank)
+
+    # The ranks leading a subspace share their observations.
+    exchange = None
+    if exchange_every is not None:
+        leader = assignment.ranks(subspaces[0])[0] == rank
+        exchange_comm = comm.Split(color=0 if leader else 1, key=rank)
+        if leader and exchange_mode == "neighbours":
+            exchange = NeighbourExchange(exchange_comm, hyperspace, subspaces[0], exchange_every)
+        elif leader:
+            exchange = IncumbentExchange(exchange_comm, exchange_every, n_exchange)
+
+    pool = "threads" if backend == "threads" else "processes"
+    executor = None
+    local = None
+    if n_workers > 1 and len(subspaces) >= n_workers and exchange_every is None:
+        # Optimize several subspaces at the same time.
+        executor = create_executor(n_workers, pool)
+    elif n_workers > 1:
+        # Evaluate several points of a subspace at the same time.
+        local = PoolEvaluator(objective, n_workers, create_executor(n_workers, pool))
+
+    # Checkpoints are per subspace, whatever number of ranks wrote them.
+    checkpoints = {}
+    if checkpoints_path:
+        checkpoints = load_checkpoints(checkpoints_path, len(hyperspace), rank, size, assignment, comm)
+
+    futures = []
+    for subspace_id in subspaces:
+        # Setup savefile. Ensure results are sorted by subspace.
+        filename = 'hyperspace{:02d}'.format(subspace_id)
+        savefile = os.path.join(results_path, filename)
+
+        # Create the hyperspace, and either sampling bounds or checkpoints
+        space = hyperspace[subspace_id]
+        init_points, init_response, n_rand, resume = _initial_points(hyperspace, subspace_id, sampler,
+                                                                     n_samples, checkpoints.get(subspace_id))
+
+        subspace_callbacks = [ModelRetention(keep_models)]
+        if deadline:
+            subspace_callbacks.append(DeadlineStopper(deadline))
+
+        if checkpoints_path:
+            checkpoint_callback = IncrementalCheckpointSaver(checkpoints_path, filename,
+                                                             asynchronous=async_checkpoints, rank=rank,
+                                                             subspace_id=subspace_id)
+            subspace_callbacks.append(checkpoint_callback)
+
+        # Verbose mode should only run on node 0.
+        args = (objective, space, group_comm, local, model,
+                _n_remaining(n_iterations, init_response),
+                verbose and rank == 0, subspace_callbacks,
+                init_points, init_response, n_rand, random_state,
+                batch_size, batch_strategy, exchange, resume)
+
+        if executor is not None:
+            futures.append((subspace_id, savefile, executor.submit(_minimize_subspace, *args)))
+            continue
+
+        result = _minimize_subspace(*args)
+        if result is None:
+            continue
 
-    # Create hyperspaces, and either sampling bounds or checkpoints
-    hyperspace = create_hyperspace(hyperparameters)
-    space = hyperspace[rank]
+        # Each worker will independently write their results to disk
+        prune_models(result.models, n_keep)
+        dump(result, savefile, **dump_options)
 
+    for subspace_id, savefile, future in futures:
+        result = future.result()
+        prune_models(result.models, n_keep)
+        dump(result, savefile, **dump_options)
+
+    if checkpoints_path:
+        _compact_manifest(comm, checkpoints_path)
+
+    if exchange is not None:
+        exchange.finish()
+    if executor is not None:
+        executor.shutdown()
+    if local is not None:
+        local.close()
+
+
+def _compact_manifest(comm, checkpoints_path):
+    """
+    Once every rank is done checkpointing, merge the recorded manifest entries on rank 0.
+    """
+    if comm is not None:
+        comm.Barrier()
+        if comm.Get_rank() != 0:
+            return
+
+    CheckpointManifest(checkpoints_path).compact()
+
+
+def _initial_points(hyperspace, subspace_id, sampler, n_samples, checkpoint=None):
+    """
+    Initial points of a subspace, either sampled or from its `checkpoint`,
+    see `load_checkpoints`.
+
+    Returns
+    -------
+    * `init_points` [list of lists or None]
+
+    * `init_response` [list or None]:
+        Evaluations of `init_points` when resuming from a checkpoint.
+
+    * `n_rand` [int]:
+        Number of random starts left.
+
+    * `resume` [dict or None]:
+        When resuming, the optimizer state saved with the checkpoint:
+        "kernel", the latest fitted kernel, "tell_state", the state of the
+        optimizer at its last tell, see `tell_resumed`, and "rng_state", the state of
+        the random number generator. Either may be `None`.
+    """
     # Latin hypercube sampling
-    if sampler and not n_samples:
-        raise ValueError(f'Sampler requires n_samples > 0. Got {n_samples}')
-    elif sampler and n_samples:
-        hyperbounds = create_hyperbounds(hyperparameters)
-        bounds = hyperbounds[rank]
+    if sampler:
+        bounds = hyperspace.bounds(subspace_id)
         # Get initial points in domain via latin hypercube sampling
         init_points = lhs_start(bounds, n_samples)
         init_response = None
-        n_rand = 10 - len(init_points)
+        n_rand = max(10 - len(init_points), 0)
     else:
         init_points = None
         init_response = None
         n_rand = 10
+    resume = None
 
     # Resuming from checkpoint
-    if checkpoints_path:
-        checkpoint = _load_checkpoint(checkpoints_path, rank)
-        try:
-            init_points = checkpoint.x_iters
-            init_response = checkpoint.func_vals
-            n_rand = 10 - len(init_points)
-        except AttributeError:
-            # Missing saves won't have initial values.
-            init_points = None
-            init_response = None
-            n_rand = 10
-
-    callbacks = []
-    if deadline:
-        deadline = DeadlineStopper(deadline)
-        callbacks.append(deadline)
+    if checkpoint is not None:
+        init_points = checkpoint.x_iters
+        init_response = checkpoint.func_vals
+        n_rand = max(10 - len(init_points), 0)
+        resume = _resume_state(checkpoint)
+
+    return init_points, init_response, n_rand, resume
+
+
+def _resume_state(checkpoint):
+    """
+    Kernel and random state to resume the optimizer of `checkpoint` with.
+    """
+    kernel = checkpoint.get('kernel')
+    if kernel is None and checkpoint.get('models'):
+        kernel = getattr(checkpoint.models[-1], 'kernel_', None)
+
+    rng = checkpoint.get('random_state')
+    rng_state = rng.get_state() if isinstance(rng, np.random.RandomState) else None
+    return {'kernel': kernel, 'rng_state': rng_state, 'tell_state': checkpoint.get('tell_state')}
+
+
+def _n_remaining(n_iterations, init_response):
+    """
+    Evaluations left of the budget of `n_iterations`, counting those of a checkpoint.
+    """
+    if init_response is None:
+        return n_iterations
+    return max(n_iterations - len(init_response), 0)
+
+
+def _run_work_unit(objective, hyperspace, unit, local, model, chunk_size, verbose, callbacks,
+                   results_path, checkpoints_path, sampler, n_samples, random_state,
+                   batch_size=None, batch_strategy="cl_min", async_checkpoints=False,
+                   dump_options=None, n_keep=None, rank=None):
+    """
+    Run one chunk of evaluations of a work unit from the dynamic scheduler.
+
+    Creates the optimizer on the unit's first chunk, and writes the
+    result to disk once the unit's evaluations are used up. Batches of
+    `batch_size` points are proposed at a time, by default `local.n_workers`.
+    """
+    filename = 'hyperspace{:02d}'.format(unit.subspace_id)
+    savefile = os.path.join(results_path, filename)
 
+    unit_callbacks = list(callbacks)
     if checkpoints_path:
-        checkpoint_callback = CheckpointSaver(checkpoints_path, filename)
-        callbacks.append(checkpoint_callback)
+        checkpoint_callback = IncrementalCheckpointSaver(checkpoints_path, filename,
+                                                         asynchronous=async_checkpoints, rank=rank,
+                                                         subspace_id=unit.subspace_id)
+        unit_callbacks.append(checkpoint_callback)
 
-    # Thanks Guido for refusing to believe in switch statements.
-    # Case 0
-    if model == "GP":
-        # Verbose mode should only run on node 0.
-        if verbose and rank == 0:
-            result = gp_minimize(objective, space, n_calls=n_iterations, verbose=verbose,
-                                 callback=callbacks, x0=init_points, y0=init_response,
-                                 n_random_starts=n_rand, random_state=random_state)
-        else:
-            result = gp_minimize(objective, space, n_calls=n_iterations,
-                                 callback=callbacks, x0=init_points, y0=init_response,
-                                 n_random_starts=n_rand, random_state=random_state)
-
-    # Case 1
-    elif model == "RF":
-        if verbose and rank == 0:
-            result = forest_minimize(objective, space, n_calls=n_iterations, verbose=verbose,
-                                     callback=callbacks, x0=init_points, y0=init_response,
-                                     n_random_starts=n_rand, random_state=random_state)
-        else:
-            result = forest_minimize(objective, space, n_calls=n_iterations,
-                                     callback=callbacks, x0=init_points, y0=init_response,
-                                     n_random_starts=n_rand, random_state=random_state)
-    # Case 2
-    elif model == "GBRT":
-        if verbose and rank == 0:
-            result = gbrt_minimize(objective, space, n_calls=n_iterations, verbose=verbose,
-                                   callback=callbacks, x0=init_points, y0=init_response,
-                                   n_random_starts=n_rand, random_state=random_state)
-        else:
-            result = gbrt_minimize(objective, space, n_calls=n_iterations,
-                                   callback=callbacks, x0=init_points, y0=init_response,
-                                   n_random_starts=n_rand, random_state=random_state)
-    # Case 3
-    elif model == "RAND":
-        if verbose and rank == 0:
-            result = dummy_minimize(objective, space, n_calls=n_iterations, verbose=verbose,
-                                    callback=callbacks, x0=init_points, y0=init_response,
-                                    random_state=random_state)
-        else:
-            result = dummy_minimize(objective, space, n_calls=n_iterations,
-                                    callback=callbacks, x0=init_points, y0=init_response,
-                                    random_state=random_state)
+    if local is None:
+        local = SerialEvaluator(objective)
+
+    n_evaluated = 0
+    if unit.optimizer is None:
+        space = hyperspace[unit.subspace_id]
+        checkpoint = _load_checkpoint(checkpoints_path, unit.subspace_id) if checkpoints_path else None
+        init_points, init_response, n_rand, resume = _initial_points(hyperspace, unit.subspace_id, sampler,
+                                                                     n_samples, checkpoint)
+        if init_points is None:
+            init_points = []
+        if resume is None:
+            resume = {'kernel': None, 'rng_state': None, 'tell_state': None}
+
+        unit.n_remaining = _n_remaining(unit.n_remaining, init_response)
+        unit.optimizer = create_optimizer(space, model, n_rand + len(init_points), random_state,
+                                          resume['kernel'])
+        if init_points:
+            if init_response is None:
+                # The sampler's points are this chunk's first evaluations.
+                init_response = local.map(init_points)
+                n_evaluated = len(init_response)
+                unit.n_remaining -= n_evaluated
+            result = tell_resumed(unit.optimizer, init_points, list(init_response),
+                                  resume['rng_state'], resume['tell_state'])
+            if eval_callbacks(unit_callbacks, result):
+                unit.n_remaining = 0
+
+    optimizer = unit.optimizer
+    n_chunk = max(min(chunk_size, unit.n_remaining + n_evaluated) - n_evaluated, 0)
+    n_points = batch_size or local.n_workers
+    while n_chunk > 0:
+        n_batch = min(n_points, n_chunk)
+        next_xs = ask_batch(optimizer, n_batch, batch_strategy)
+        next_ys = local.map(next_xs)
+        result = tell_recorded(optimizer, next_xs, next_ys)
+        n_chunk -= n_batch
+        unit.n_remaining -= n_batch
+        if eval_callbacks(unit_callbacks, result):
+            unit.n_remaining = 0
+            break
+
+    # The next chunk may run on another rank.
+    _flush_checkpoints(unit_callbacks)
+
+    unit.n_chunks += 1
+    if verbose and optimizer.yi:
+        print(f'Subspace {unit.subspace_id}: chunk {unit.n_chunks}, '
+              f'{len(optimizer.yi)} evaluations, incumbent {min(optimizer.yi)}')
+
+    if unit.n_remaining <= 0:
+        result = create_result(optimizer.Xi, optimizer.yi, optimizer.space,
+                               optimizer.rng, models=optimizer.models)
+        # Whichever worker finishes the subspace writes its results to disk
+        prune_models(result.models, n_keep)
+        dump(result, savefile, **(dump_options or {}))
+
+
+def _minimize_subspace(objective, space, group_comm, local, model, n_iterations, verbose,
+                       callbacks, init_points, init_response, n_rand, random_state,
+                       batch_size=None, batch_strategy="cl_min", exchange=None, resume=None):
+    """
+    Optimize a single subspace, sharing evaluations with the ranks of `group_comm`
+    and with the `local` evaluator, if given.
+
+    Proposes batches of points when evaluations are shared or a `batch_size`
+    is given, and runs the usual one point at a time loop otherwise. Shares
+    incumbents with other ranks through `exchange`, if given. Restores the
+    optimizer state of a checkpoint from `resume`, if given.
+
+    Returns the result on the rank leading the subspace and `None` on
+    the other ranks of the group.
+    """
+    if group_comm is not None and group_comm.Get_size() > 1:
+        evaluator = GroupEvaluator(objective, group_comm, local)
+        if group_comm.Get_rank() != 0:
+            evaluator.serve()
+            return None
+    elif local is not None:
+        evaluator = local
+    elif batch_size is not None or exchange is not None or resume is not None:
+        evaluator = SerialEvaluator(objective)
     else:
-        raise ValueError("Invalid model {}. Read the documentation for "
-                         "supported models.".format(model))
+        result = minimize(objective, space, model=model, n_calls=n_iterations,
+                          verbose=verbose, callback=callbacks,
+                          x_init=init_points, y_init=init_response,
+                          n_random_starts=n_rand, random_state=random_state)
+        _flush_checkpoints(callbacks)
+        return result
+
+    result = batch_minimize(evaluator, space, model=model, n_calls=n_iterations,
+                            n_points=batch_size, verbose=verbose, callback=callbacks,
+                            x_init=init_points, y_init=init_response, n_random_starts=n_rand,
+                            strategy=batch_strategy, random_state=random_state,
+                            exchange=exchange, **(resume or {}))
+
+    if isinstance(evaluator, GroupEvaluator):
+        evaluator.close()
+
+    _flush_checkpoints(callbacks)
+    return result
 
-    # Each worker will independently write their results to disk
-    dump(result, savefile)
+
+def _flush_checkpoints(callbacks):
+    """
+    Wait for the background writes of the checkpoint savers among `callbacks`,
+    and record their logs in the manifest.
+    """
+    for callback in callbacks:
+        if hasattr(callback, 'flush'):
+            callback.flush()
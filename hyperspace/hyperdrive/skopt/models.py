@@ -1,37 +1,415 @@
+import numpy as np
+
+from skopt import Optimizer
 from skopt import gp_minimize
 from skopt import gbrt_minimize
 from skopt import forest_minimize
 from skopt import dummy_minimize
+from skopt.callbacks import check_callback
+from skopt.callbacks import VerboseCallback
+from skopt.utils import cook_estimator
+from skopt.utils import create_result
+from skopt.utils import eval_callbacks
+from sklearn.utils import check_random_state
+from sklearn.gaussian_process.kernels import Sum
+from sklearn.gaussian_process.kernels import WhiteKernel
 
 
 def minimize(objective, space, model="GP", n_calls=50, verbose=False,
              deadline=None, x_init=None, n_random_starts=None,
-             sampler=None, n_samples=None, hyperbounds=None, name=None, random_state=0):
+             sampler=None, n_samples=None, hyperbounds=None, name=None, random_state=0,
+             y_init=None, callback=None):
     """
     Surrogate models for objective functions.
+
+    * `y_init` [list, optional]:
+        Evaluations of `x_init`, e.g. when resuming from a checkpoint.
+
+    * `callback` [callable or list of callables, optional]:
+        Called after each evaluation. Takes precedence over `deadline`.
     """
+    if callback is None:
+        callback = deadline
+
     # Thanks Guido for refusing to believe in switch statements.
     # Case 0
     if model == "GP":
         result = gp_minimize(objective, space, n_calls=n_calls, verbose=verbose,
-                             callback=deadline, x0=x_init, n_random_starts=n_random_starts,
-                             random_state=random_state)
+                             callback=callback, x0=x_init, y0=y_init,
+                             n_random_starts=n_random_starts, random_state=random_state)
     # Case 1
     elif model == "RF":
         result = forest_minimize(objective, space, n_calls=n_calls, verbose=verbose,
-                                 callback=deadline, x0=x_init, n_random_starts=n_random_starts,
-                                 random_state=random_state)
+                                 callback=callback, x0=x_init, y0=y_init,
+                                 n_random_starts=n_random_starts, random_state=random_state)
     # Case 2
-    elif model == "GRBRT":
+    elif model == "GBRT":
         result = gbrt_minimize(objective, space, n_calls=n_calls, verbose=verbose,
-                               callback=deadline, x0=x_init, n_random_starts=n_random_starts,
-                               random_state=random_state)
+                               callback=callback, x0=x_init, y0=y_init,
+                               n_random_starts=n_random_starts, random_state=random_state)
     # Case 3
     elif model == "RAND":
         result = dummy_minimize(objective, space, n_calls=n_calls, verbose=verbose,
-                                callback=deadline, x0=x_init, random_state=random_state)
+                                callback=callback, x0=x_init, y0=y_init,
+                                random_state=random_state)
     else:
         raise ValueError("Invalid model {}. Read the documentation for "
                          "supported models.".format(model))
 
     return result
+
+
+def create_optimizer(space, model="GP", n_initial_points=10, random_state=0, kernel=None):
+    """
+    Ask-and-tell optimizer matching the surrogate of `minimize`.
+
+    Parameters
+    ----------
+    * `space` [Space]:
+        Search space.
+
+    * `model` [string, default="GP"]
+        Probilistic learner used to model our objective function.
+        Options: "GP", "RF", "GBRT", "RAND".
+
+    * `n_initial_points` [int, default=10]:
+        Number of points sampled at random before fitting the surrogate,
+        including any initial points told to the optimizer.
+
+    * `random_state` [int or RandomState, default=0]
+        Random state for reproducibility.
+
+    * `kernel` [Kernel, optional]
+        Fitted kernel of an earlier Gaussian process on `space`, e.g. from a
+        checkpoint. Its hyperparameters are where the fits of the surrogate
+        start from, instead of the defaults. Ignored by the other models.
+
+    Returns
+    -------
+    * `optimizer` [skopt.Optimizer]
+    """
+    rng = check_random_state(random_state)
+
+    if model == "GP":
+        base_estimator = cook_estimator("GP", space=space, noise="gaussian",
+                                        random_state=rng.randint(0, np.iinfo(np.int32).max))
+        if kernel is not None:
+            # The noise term is added back on each fit.
+            if isinstance(kernel, Sum) and isinstance(kernel.k2, WhiteKernel):
+                kernel = kernel.k1
+            base_estimator.set_params(kernel=kernel)
+        acq_func = "gp_hedge"
+    elif model == "RF":
+        base_estimator = "ET"
+        acq_func = "EI"
+    elif model == "GBRT":
+        base_estimator = cook_estimator("GBRT", random_state=rng, n_jobs=1)
+        acq_func = "EI"
+    elif model == "RAND":
+        base_estimator = "dummy"
+        acq_func = "EI"
+    else:
+        raise ValueError("Invalid model {}. Read the documentation for "
+                         "supported models.".format(model))
+
+    return Optimizer(space, base_estimator, n_initial_points=max(n_initial_points, 0),
+                     acq_func=acq_func, random_state=rng)
+
+
+def batch_minimize(evaluator, space, model="GP", n_calls=50, n_points=None, verbose=False,
+                   callback=None, x_init=None, y_init=None, n_random_starts=10,
+                   strategy="cl_min", random_state=0, exchange=None, kernel=None,
+                   rng_state=None, tell_state=None):
+    """
+    Ask-and-tell minimization proposing a batch of points per iteration.
+
+    Follows the conventions of `minimize`: `n_calls` counts objective
+    evaluations, and `x_init` without `y_init` is evaluated first.
+
+    Parameters
+    ----------
+    * `evaluator` [SerialEvaluator, GroupEvaluator or similar]:
+        Evaluates the objective at a list of points with `evaluator.map`.
+
+    * `space` [Space]:
+        Search space.
+
+    * `n_points` [int, default=None]:
+        Number of points proposed per iteration. Defaults to `evaluator.n_workers`.
+
+    * `strategy` [string, default="cl_min"]:
+        Strategy used to propose a batch. See `ask_batch`.
+
+    * `exchange` [IncumbentExchange, optional]:
+        Shares the best observations with the optimizers of other ranks
+        after each iteration. See `hyperspace.rover.exchange`.
+
+    * `kernel` [Kernel, optional]:
+        Starting hyperparameters of the Gaussian process, see `create_optimizer`.
+
+    * `rng_state` [tuple, optional]:
+        State of the optimizer's random number generator once `x_init` is
+        told, e.g. when resuming from a checkpoint.
+
+    * `tell_state` [dict, optional]:
+        State of the optimizer when the last evaluation of `x_init` was
+        told, see `tell_resumed`. Takes precedence over `rng_state`.
+
+    See `minimize` for the remaining parameters.
+
+    Returns
+    -------
+    * `result` [`OptimizeResult`, scipy object]
+    """
+    if n_points is None:
+        n_points = evaluator.n_workers
+
+    if x_init is None:
+        x_init = []
+
+    optimizer = create_optimizer(space, model, n_random_starts + len(x_init), random_state, kernel)
+
+    callbacks = check_callback(callback)
+    if verbose:
+        callbacks.append(VerboseCallback(n_init=len(x_init) if y_init is None else 0,
+                                         n_random=n_random_starts, n_total=n_calls))
+
+    result = None
+    if x_init:
+        if y_init is None:
+            y_init = evaluator.map(x_init)
+            n_calls -= len(y_init)
+        result = tell_resumed(optimizer, x_init, list(y_init), rng_state, tell_state)
+        if eval_callbacks(callbacks, result):
+            return result
+
+    n_evaluated = 0
+    while n_evaluated < n_calls:
+        n_batch = min(n_points, n_calls - n_evaluated)
+        points = ask_batch(optimizer, n_batch, strategy)
+        func_vals = evaluator.map(points)
+        result = tell_recorded(optimizer, points, func_vals)
+        n_evaluated += n_batch
+        if exchange is not None and exchange.step(optimizer):
+            result = create_result(optimizer.Xi, optimizer.yi, optimizer.space,
+                                   optimizer.rng, models=optimizer.models)
+        if eval_callbacks(callbacks, result):
+            break
+
+    return result
+
+
+def ask_batch(optimizer, n_points, strategy="cl_min"):
+    """
+    Propose `n_points` points to evaluate in parallel.
+
+    Each point is proposed after telling a copy of the optimizer a "lie"
+    for the points already in the batch, approximating the multi-point
+    expected improvement (q-EI) one point at a time.
+
+    Parameters
+    ----------
+    * `optimizer` [skopt.Optimizer]
+
+    * `n_points` [int]:
+        Number of points in the batch.
+
+    * `strategy` [string, default="cl_min"]:
+        - "cl_min", "cl_mean", "cl_max": constant liar, the lie is the
+          minimum, mean or maximum of the observations so far.
+        - "kb": kriging believer, the lie is the latest surrogate's
+          prediction at the point. Falls back to "cl_min" before the
+          surrogate is first fit.
+
+    Returns
+    -------
+    * `points` [list of lists, shape=(n_points, n_dims)]
+    """
+    if n_points == 1:
+        return [optimizer.ask()]
+
+    if strategy != "kb":
+        return optimizer.ask(n_points=n_points, strategy=strategy)
+
+    # The copy refits the surrogate, even if the optimizer's models were dropped.
+    opt = optimizer.copy(random_state=optimizer.rng.randint(0, np.iinfo(np.int32).max))
+    if not opt.models:
+        return optimizer.ask(n_points=n_points, strategy="cl_min")
+
+    points = []
+    for _ in range(n_points):
+        point = opt.ask()
+        points.append(point)
+        model = opt.models[-1]
+        y_lie = float(model.predict(opt.space.transform([point]))[0])
+        opt._tell(point, y_lie)
+
+    return points
+
+
+def ask_pending(optimizer, pending, strategy="cl_min"):
+    """
+    Propose a point while `pending` points are still being evaluated.
+
+    A copy of the optimizer is told a "lie" for each pending point, as in
+    `ask_batch`, so that the new point is not proposed twice.
+
+    Parameters
+    ----------
+    * `optimizer` [skopt.Optimizer]
+
+    * `pending` [list of lists, shape=(n_pending, n_dims)]:
+        Points proposed earlier whose evaluations have not been told yet.
+
+    * `strategy` [string, default="cl_min"]:
+        Lie told for the pending points. See `ask_batch`.
+
+    Returns
+    -------
+    * `point` [list, shape=(n_dims,)]
+    """
+    if strategy not in ("cl_min", "cl_mean", "cl_max", "kb"):
+        raise ValueError("Invalid strategy {}. Read the documentation for "
+                         "supported strategies.".format(strategy))
+
+    if not pending:
+        return optimizer.ask()
+
+    opt = optimizer.copy(random_state=optimizer.rng.randint(0, np.iinfo(np.int32).max))
+    if strategy == "kb" and opt.models:
+        model = opt.models[-1]
+        y_lies = [float(y) for y in model.predict(opt.space.transform(pending))]
+    elif not optimizer.yi:
+        # Still sampling at random, the lie is never used by a surrogate.
+        y_lies = [0.0] * len(pending)
+    elif strategy in ("cl_min", "kb"):
+        y_lies = [float(np.min(optimizer.yi))] * len(pending)
+    elif strategy == "cl_mean":
+        y_lies = [float(np.mean(optimizer.yi))] * len(pending)
+    else:
+        y_lies = [float(np.max(optimizer.yi))] * len(pending)
+
+    opt._tell(list(pending), y_lies)
+    return opt.ask()
+
+
+def tell_recorded(optimizer, x, y):
+    """
+    Tell `optimizer` new evaluations, keeping what it takes to replay the tell.
+
+    The result's `tell_state` holds the state of the random number
+    generator before the tell, and the gains of the acquisition functions
+    after it with "gp_hedge". Checkpoint savers save it, so that
+    `tell_resumed` can leave a resumed optimizer as this one is now.
+
+    Returns
+    -------
+    * `result` [`OptimizeResult`, scipy object]
+    """
+    rng_state = optimizer.rng.get_state()
+    result = optimizer.tell(x, y)
+    gains = getattr(optimizer, 'gains_', None)
+    result.tell_state = {'rng_state': rng_state, 'gains': None if gains is None else np.copy(gains)}
+    return result
+
+
+def tell_resumed(optimizer, x, y, rng_state=None, tell_state=None):
+    """
+    Tell a resumed optimizer the evaluations of its checkpoint.
+
+    With the `tell_state` of the checkpoint's last tell, see
+    `tell_recorded`, the tell is replayed from the same random state and
+    gains, so the surrogate is refit and the next point proposed as the
+    checkpointed optimizer would have. Otherwise, the random state after
+    the tell is set to `rng_state` if given.
+
+    Returns
+    -------
+    * `result` [`OptimizeResult`, scipy object]
+    """
+    if tell_state is None:
+        result = tell_recorded(optimizer, x, y)
+        if rng_state is not None:
+            optimizer.rng.set_state(rng_state)
+            result.tell_state = None
+        return result
+
+    optimizer.rng.set_state(tell_state['rng_state'])
+    if tell_state['gains'] is not None:
+        optimizer.gains_ = np.copy(tell_state['gains'])
+    result = optimizer.tell(x, y)
+    result.tell_state = tell_state
+    return result
+
+
+class ModelRetention(object):
+    """
+    Callback bounding the number of fitted surrogates kept in memory.
+
+    Results share their list of models with the optimizer, so pruning
+    the result passed to the callback also frees the optimizer's models,
+    and everything dumped afterwards is smaller. Place it before any
+    checkpoint saver. The optimizer needs its latest model to propose
+    points, so it is kept until the optimization is over: call
+    `prune_models(result.models, n_keep)` on the final result.
+
+    Parameters
+    ----------
+    * `keep_models` [str or int, default="last"]:
+        - "all": keep every model.
+        - "last": keep the latest model.
+        - "none": keep no model.
+        - an int `N`: keep the `N` latest models.
+    """
+    def __init__(self, keep_models="last"):
+        self.keep_models = keep_models
+        self.n_keep = check_keep_models(keep_models)
+
+    def __call__(self, res):
+        """
+        Parameters
+        ----------
+        * `res` [`OptimizeResult`, scipy object]:
+            The optimization as a OptimizeResult object.
+        """
+        if self.n_keep is not None:
+            prune_models(res.models, max(self.n_keep, 1))
+
+
+def check_keep_models(keep_models):
+    """
+    Number of models to keep, `None` for all of them.
+
+    Parameters
+    ----------
+    * `keep_models` [str or int]:
+        See `ModelRetention`.
+    """
+    if keep_models == "all":
+        return None
+    elif keep_models == "last":
+        return 1
+    elif keep_models == "none":
+        return 0
+    elif isinstance(keep_models, int) and not isinstance(keep_models, bool) and keep_models >= 0:
+        return keep_models
+    else:
+        raise ValueError("Invalid keep_models {}. Use \"all\", \"last\", \"none\" "
+                         "or a number of models.".format(keep_models))
+
+
+def prune_models(models, n_keep):
+    """
+    Drop all but the `n_keep` latest models, in place.
+
+    Parameters
+    ----------
+    * `models` [list or None]
+
+    * `n_keep` [int or None]:
+        `None` keeps every model.
+    """
+    if models is None or n_keep is None:
+        return
+
+    del models[:max(len(models) - n_keep, 0)]
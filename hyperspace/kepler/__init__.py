@@ -1,15 +1,27 @@
 from .data_utils import load_results
+from .data_utils import LazyResult
 from .data_utils import load_json_results
 from .data_utils import _load_checkpoint
+from .data_utils import load_checkpoints
 from .data_utils import load_roboresults
 from .data_utils import convert_roboresults
 from .data_utils import create_result
+from .study import export_study
+from .study import load_study
+from .study import open_study
+from .study import StudyTable
 
 
 __all__ = (
     "load_results",
+    "LazyResult",
     "load_json_results",
     "_load_checkpoint",
+    "load_checkpoints",
     "load_roboresults",
-    "convert_roboresults"
+    "convert_roboresults",
+    "export_study",
+    "load_study",
+    "open_study",
+    "StudyTable"
 )
@@ -1,36 +1,202 @@
 import os
 import re
-import json
 import itertools
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 
 import pickle
 from skopt import load
 
+from hyperspace.rover.checkpoints import CheckpointManifest
+from hyperspace.rover.checkpoints import CHECKPOINT_SUFFIXES
+from hyperspace.rover.checkpoints import load_checkpoint
+from hyperspace.rover.checkpoints import load_json_checkpoint
+from hyperspace.rover.checkpoints import iter_json_lines
+from hyperspace.rover.checkpoints import load_checkpoint_log
+from hyperspace.rover.checkpoints import load_checkpoint_state
+from hyperspace.rover.assignment import check_assignment
+
 import numpy as np
 from scipy.optimize import OptimizeResult
 
 
-def _load_checkpoint(results_path, rank):
+def _load_checkpoint(results_path, subspace_id, entry=None):
     """
     Loads checkpoint to resume optimization.
 
+    Looks the checkpoint up in the directory's manifest if there is one,
+    and tries `hyperspaceNN.log` then `hyperspaceNN` otherwise. A log is
+    read up to the offset of its manifest entry.
+
     * `results_path` [str]
         Path to the previously saved results.
 
-    * `rank` [int]
-        Rank to which the saved results belong.
+    * `subspace_id` [int]
+        Subspace to which the saved results belong.
+
+    * `entry` [dict, optional]
+        Manifest entry of the subspace, if already looked up, see `_checkpoint_entries`.
     """
-    files = _listfiles(results_path)
-    for file in files:
-        saved_rank = re.findall(r'\d+', file)
-        if rank == int(saved_rank[0]):
-            filepath = os.path.join(results_path, file)
-            checkpoint = load(str(filepath))
-            print(f'loading checkpoint for rank {int(saved_rank[0])}')
-            return checkpoint
+    if entry is None:
+        entry = CheckpointManifest(results_path).lookup(subspace_id)
+    offset = None
+    if entry is not None:
+        candidates = [entry['file']]
+        offset = entry['offset']
+    else:
+        filename = 'hyperspace{:02d}'.format(subspace_id)
+        candidates = [filename + '.log', filename]
+
+    for file in candidates:
+        filepath = os.path.join(results_path, file)
+        if not os.path.exists(filepath):
+            continue
+
+        print(f'loading checkpoint for subspace {subspace_id}')
+        if file.endswith('.log'):
+            return _rebuild_checkpoint(filepath, offset)
+        return load_checkpoint(filepath)
+
+
+def _rebuild_checkpoint(logfile, offset=None):
+    """
+    Rebuild an `OptimizeResult` from the log of an `IncrementalCheckpointSaver`.
+
+    The saved random state, state at the last tell and latest fitted
+    kernel, if any, are restored as `random_state`, `tell_state` and `kernel`.
+
+    * `logfile` [str]
+        Path to the `.log` file.
+
+    * `offset` [int, optional]
+        Only read the records before this offset.
+    """
+    records = load_checkpoint_log(logfile, offset)
+    if not records:
+        return None
+
+    Xi = [record['x'] for record in records]
+    yi = [record['y'] for record in records]
+
+    models = None
+    snapshotfile = logfile[:-len('.log')] + '.models'
+    if os.path.exists(snapshotfile):
+        models = load(snapshotfile)['models']
+
+    best = int(np.argmin(yi))
+    result = OptimizeResult(
+      x=Xi[best],
+      fun=yi[best],
+      func_vals=np.asarray(yi),
+      x_iters=Xi,
+      models=models,
+      timestamps=np.asarray([record['timestamp'] for record in records]),
+      eval_seconds=np.asarray([record['eval_seconds'] for record in records])
+    )
+
+    state = load_checkpoint_state(logfile[:-len('.log')] + '.state')
+    if state is not None:
+        if state['rng_state'] is not None:
+            result.random_state = np.random.RandomState()
+            result.random_state.set_state(state['rng_state'])
+        result.tell_state = state.get('tell_state')
+        result.kernel = state['kernel']
+
+    return result
+
+
+def load_checkpoints(checkpoints_path, n_subspaces, rank=0, size=1, assignment="block", comm=None):
+    """
+    Checkpoints a rank resumes from, whatever number of ranks wrote them.
+
+    Checkpoints are named after subspaces rather than ranks, so a search
+    checkpointed on some number of ranks can resume on any other. The
+    subspaces are assigned over the `size` ranks resuming, as `hyperdrive`
+    does: with fewer ranks than before, each rank loads the histories of
+    all the subspaces in its queue. With more ranks than subspaces, the
+    ranks sharing a subspace split into groups, and only the lowest rank of
+    each group, which runs the subspace's optimizer, loads its history.
+
+    Parameters
+    ----------
+    * `checkpoints_path` [str]
+        Path to the previously saved checkpoints.
+
+    * `n_subspaces` [int]
+        Number of subspaces of the search, `len(HyperspacePartition(hyperparameters))`.
+
+    * `rank` [int, default=0]
+        Rank resuming.
+
+    * `size` [int, default=1]
+        Number of ranks resuming.
+
+    * `assignment` [str or SubspaceAssignment, default="block"]
+        How subspaces are mapped onto ranks, see `hyperdrive`.
+
+    * `comm` [mpi4py.MPI.Comm, optional]
+        Communicator of the ranks resuming. Only its rank 0 then reads the
+        manifest, or lists the checkpoint directory without one, and
+        broadcasts where each checkpoint is. Other ranks only open the
+        checkpoints they load.
+
+    Returns
+    -------
+    * `checkpoints` [dict]:
+        Checkpoint of each subspace the rank leads, by subspace id, `None`
+        for subspaces without one.
+    """
+    if comm is None:
+        checkpointed = _checkpoint_entries(checkpoints_path)
+    else:
+        checkpointed = _checkpoint_entries(checkpoints_path) if comm.Get_rank() == 0 else None
+        checkpointed = comm.bcast(checkpointed, root=0)
+
+    if checkpointed and max(checkpointed) >= n_subspaces:
+        raise ValueError('Checkpoints in {} include subspace {}, but the search only has {} '
+                         'subspaces.'.format(checkpoints_path, max(checkpointed), n_subspaces))
+
+    assignment = check_assignment(assignment).assign(n_subspaces, size)
+
+    checkpoints = {}
+    for subspace_id in assignment.subspaces(rank):
+        if assignment.ranks(subspace_id)[0] != rank:
+            continue
+        entry = checkpointed.get(subspace_id)
+        checkpoints[subspace_id] = _load_checkpoint(checkpoints_path, subspace_id, entry) if entry else None
+
+    return checkpoints
+
+
+def _checkpoint_entries(checkpoints_path):
+    """
+    Manifest entry of each subspace with a checkpoint, by subspace id.
+
+    Without a manifest, entries for the files named after subspaces,
+    preferring logs.
+    """
+    entries = CheckpointManifest(checkpoints_path).current()
+    if entries:
+        return entries
+
+    if not os.path.isdir(checkpoints_path):
+        return entries
+
+    for file in sorted(os.listdir(checkpoints_path)):
+        match = re.fullmatch(r'hyperspace(\d+)(\.log)?', file)
+        if match:
+            subspace_id = int(match.group(1))
+            if subspace_id not in entries or file.endswith('.log'):
+                entries[subspace_id] = {'file': file, 'offset': None, 'iteration': None}
+
+    return entries
+
+
+# Fields of a result that are cheap to hold for every subspace of a large study.
+LIGHT_FIELDS = ('x', 'fun', 'func_vals', 'x_iters')
 
 
-def load_results(results_path, sort=False, reverse_sort=False):
+def load_results(results_path, sort=False, reverse_sort=False, fields=None, n_jobs=1, lazy=False):
     """
     Loads results from distributed run with Scikit-Optimize.
 
@@ -46,30 +212,108 @@ def load_results(results_path, sort=False, reverse_sort=False):
         Sort results by objective function minimum (highest first.)
         - `sort` must be set to True.
 
+    * `fields` [list of str, default=None]
+        Fields of each result to keep, e.g. `["x", "fun"]`. Other fields,
+        such as the fitted `models`, are dropped as soon as a file is read.
+        Defaults to every field, or to `LIGHT_FIELDS` when `lazy`.
+        - `fun` is also kept when sorting.
+
+    * `n_jobs` [int, default=1]
+        Number of processes reading files at the same time. -1 uses every CPU.
+
+    * `lazy` [Bool, default=False]
+        Return `LazyResult`s holding only `fields`, which load the whole
+        result from disk the first time another field is accessed.
+
     Returns
     -------
     * results [list]
     """
-    files = _listfiles(results_path)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
 
-    ranks = []
-    results = []
-    for file in files:
-        rank = re.findall(r'\d+', file)
-        rank = int(rank[0])
-        ranks.append(rank)
-        full_path = os.path.join(results_path, file)
-        results.append(load(str(full_path)))
+    if n_jobs < 1:
+        raise ValueError('n_jobs must be at least 1 or -1, got {}.'.format(n_jobs))
 
     if reverse_sort and not sort:
         sort = True
 
+    if fields is None and lazy:
+        fields = LIGHT_FIELDS
+
+    if fields is not None:
+        fields = list(fields)
+        if sort and 'fun' not in fields:
+            fields.append('fun')
+
+    paths = [os.path.join(results_path, file) for file in _listfiles(results_path)]
+
+    if n_jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(min(n_jobs, len(paths))) as executor:
+            results = list(executor.map(_load_fields, paths, itertools.repeat(fields)))
+    else:
+        results = [_load_fields(path, fields) for path in paths]
+
+    if lazy:
+        results = [LazyResult(path, result) for path, result in zip(paths, results)]
+
     if sort:
-        results = sorted(results, key=lambda result: result.fun)
+        results = sorted(results, key=lambda result: result.fun, reverse=reverse_sort)
 
     return results
 
 
+def _load_fields(path, fields=None):
+    """
+    Load the result in `path`, keeping only `fields` if given.
+    """
+    result = load(str(path))
+    if fields is None:
+        return result
+
+    return OptimizeResult({field: result[field] for field in fields if field in result})
+
+
+class LazyResult(OptimizeResult):
+    """
+    Result holding a few fields, loading the rest from disk on first access.
+
+    Behaves as the `OptimizeResult` saved in `path`. Accessing a field it
+    does not hold, as an attribute or an item, loads the whole result once.
+    Until then, `keys()` and `in` only see the fields held.
+
+    Parameters
+    ----------
+    * `path` [str]:
+        File the result was saved to with `skopt.dump`.
+
+    * `fields` [dict]:
+        Fields already loaded.
+    """
+    def __init__(self, path, fields):
+        super(LazyResult, self).__init__(fields)
+        object.__setattr__(self, 'path', path)
+        object.__setattr__(self, 'loaded', False)
+
+    def __missing__(self, key):
+        if not self.loaded:
+            self.load()
+            if key in self:
+                return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def load(self):
+        """
+        Load every field of the result.
+        """
+        result = load(str(self.path))
+        for key, value in result.items():
+            # Fields already held may have been changed since.
+            self.setdefault(key, value)
+        object.__setattr__(self, 'loaded', True)
+        return self
+
+
 def load_roboresults(results_path, sort=False):
     """
     Loads results from distributed run with RoBO.
@@ -113,6 +357,9 @@ def _listfiles(results_path):
     """
     files = []
     for file in os.listdir(results_path):
+        # Skip checkpoints sharing the directory, and the manifest.
+        if file.endswith(CHECKPOINT_SUFFIXES) or file in (CheckpointManifest.filename, CheckpointManifest.journal):
+            continue
         # Sort files by MPI rank: used for checkpointing.
         files.append(file)
 
@@ -268,6 +515,9 @@ def create_result(Xi, yi, n_evaluations=None, space=None, rng=None, specs=None,
 def load_json_results(results_path, sort=False, reverse_sort=False):
     """
     Loads results from distributed run with Scikit-Optimize.
+
+    Files named `*.jsonl`, written by `JsonLinesCheckpointSaver`, are
+    streamed line by line into arrays, see `load_json_lines_result`.
     
     Parameters
     ----------
@@ -276,6 +526,7 @@ def load_json_results(results_path, sort=False, reverse_sort=False):
         
     * `sort` [Bool, default=False]
         Sorts results by objective function minimum (lowest first).
+        Results without evaluations come last.
         
     * `reverse_sort` [Bool, defaul=False]
         Sort results by objective function minimum (highest first.)
@@ -284,26 +535,91 @@ def load_json_results(results_path, sort=False, reverse_sort=False):
     Returns
     -------
     * results [list]
+        Files without a valid checkpoint are skipped with a warning.
     """
     files = _listfiles(results_path)
 
     results = []
     for file in files:
         savefile = os.path.join(results_path, file)
-        with open(savefile, 'r') as infile:
-            results.append(json.load(infile))
+        if file.endswith('.jsonl'):
+            result = load_json_lines_result(savefile)
+        else:
+            checkpoint = load_json_checkpoint(savefile)
+            if checkpoint is None:
+                warnings.warn("Skipping {}, which holds no valid JSON checkpoint.".format(savefile))
+                continue
+            result = _convert_json(checkpoint)
+        results.append(result)
             
     if reverse_sort and not sort:
         sort = True
 
     if sort:
-        results = sorted(results, key=lambda result: result['fun'])
-        
-    results = _convert_json_results(results)
+        empty = [result for result in results if result['fun'] is None]
+        results = sorted([result for result in results if result['fun'] is not None],
+                         key=lambda result: result['fun'], reverse=reverse_sort)
+        results.extend(empty)
 
     return results
 
 
+def load_json_lines_result(savefile):
+    """
+    Stream a file written by `JsonLinesCheckpointSaver` into an `OptimizeResult`.
+
+    Parameters
+    ----------
+    * `savefile` [str]
+
+    Returns
+    -------
+    * `result` [scipy.optimize.OptimizeResult]:
+        With `func_vals`, `timestamps` and `iterations` as arrays, and
+        `x_iters` as a list of points whose numbers are numpy scalars, as
+        in the results `hyperdrive` dumps. `x` and `fun` are `None` for an
+        empty file.
+    """
+    x_iters = []
+    func_vals = []
+    timestamps = []
+    iterations = []
+    for record, _ in iter_json_lines(savefile):
+        x_iters.append(_typed_point(record['x']))
+        func_vals.append(record['y'])
+        timestamps.append(record['timestamp'])
+        iterations.append(record['iteration'])
+
+    func_vals = np.asarray(func_vals, dtype=float)
+    best = int(np.argmin(func_vals)) if len(func_vals) else None
+    return OptimizeResult(
+      x=x_iters[best] if best is not None else None,
+      fun=func_vals[best] if best is not None else None,
+      func_vals=func_vals,
+      x_iters=x_iters,
+      timestamps=np.asarray(timestamps, dtype=float),
+      iterations=np.asarray(iterations, dtype=int),
+    )
+
+
+def _typed_point(values):
+    """
+    Point read from JSON, with its numbers as the numpy scalars skopt gives.
+    """
+    typed = []
+    for value in values:
+        if isinstance(value, bool):
+            typed.append(value)
+        elif isinstance(value, int):
+            typed.append(np.int64(value))
+        elif isinstance(value, float):
+            typed.append(np.float64(value))
+        else:
+            typed.append(value)
+
+    return typed
+
+
 def _convert_json(result):
     """
     Convert results from json to scipy.OptimizeResult.
@@ -327,8 +643,3 @@ def _convert_json(result):
     )
 
     return optresult
-
-
-def _convert_json_results(results):
-    """Convert all json results to  scipy.OptimizeResults."""
-    return [_convert_json(x) for x in results]
\ No newline at end of file
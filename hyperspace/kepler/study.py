@@ -0,0 +1,356 @@
+"""
+Whole studies as columnar tables.
+
+Every evaluation of every subspace becomes one row, with one typed array
+per hyperparameter next to the objective and where the evaluation came
+from, so that analysis runs as vectorised numpy rather than loops over
+per-subspace results.
+"""
+import os
+import re
+import json
+
+import numpy as np
+from skopt.space import Real
+from skopt.space import Integer
+
+from hyperspace.rover.checkpoints import CheckpointManifest
+from hyperspace.rover.checkpoints import load_checkpoint_log
+from hyperspace.kepler.data_utils import _listfiles
+from hyperspace.kepler.data_utils import _load_fields
+
+
+# Columns every study has, after the hyperparameters.
+STUDY_COLUMNS = ('y', 'rank', 'subspace_id', 'iteration', 'timestamp', 'eval_seconds')
+
+
+def export_study(results_path, savefile, checkpoints_path=None):
+    """
+    Merge the evaluations of every subspace into one columnar table on disk.
+
+    Each hyperparameter gets a column named after its dimension, or `xN`
+    for unnamed dimensions: float for real, int for integer and the type
+    of the categories for categorical hyperparameters. The columns in
+    `STUDY_COLUMNS` follow. `rank`, `timestamp` and `eval_seconds` come
+    from the checkpoint logs in `checkpoints_path`, and are -1, NaN and
+    NaN without them.
+
+    Parameters
+    ----------
+    * `results_path` [str]
+        Path where results from the distributed run is stored.
+
+    * `savefile` [str]
+        A `.npz` file, or a directory that gets one `.npy` file per
+        column, which `load_study` can memory-map.
+
+    * `checkpoints_path` [str, default=None]
+        Path to the checkpoints of the run.
+
+    Returns
+    -------
+    * `study` [StudyTable]
+    """
+    hyperparameters = None
+    dimensions = None
+    rows = {column: [] for column in STUDY_COLUMNS}
+    points = []
+    for file in _listfiles(results_path):
+        match = re.fullmatch(r'hyperspace(\d+)', file)
+        if not match:
+            continue
+        subspace_id = int(match.group(1))
+
+        result = _load_fields(os.path.join(results_path, file), ['x_iters', 'func_vals', 'space'])
+        if dimensions is None:
+            dimensions = result.space.dimensions
+            hyperparameters = [dimension.name or 'x{}'.format(i) for i, dimension in enumerate(dimensions)]
+
+        records = []
+        if checkpoints_path:
+            records = _checkpoint_records(checkpoints_path, subspace_id)
+
+        n_evaluations = len(result.func_vals)
+        points.extend(result.x_iters)
+        rows['y'].append(np.asarray(result.func_vals, dtype=float))
+        rows['subspace_id'].append(np.full(n_evaluations, subspace_id, dtype=int))
+        rows['iteration'].append(np.arange(n_evaluations))
+
+        # Evaluations told after the last checkpoint have no record.
+        rank = np.full(n_evaluations, -1, dtype=int)
+        timestamp = np.full(n_evaluations, np.nan)
+        eval_seconds = np.full(n_evaluations, np.nan)
+        for i, record in enumerate(records[:n_evaluations]):
+            if record.get('rank') is not None:
+                rank[i] = record['rank']
+            timestamp[i] = record['timestamp']
+            eval_seconds[i] = record['eval_seconds']
+        rows['rank'].append(rank)
+        rows['timestamp'].append(timestamp)
+        rows['eval_seconds'].append(eval_seconds)
+
+    if dimensions is None:
+        raise ValueError('No results found in {}.'.format(results_path))
+
+    if set(hyperparameters) & set(STUDY_COLUMNS):
+        raise ValueError('Hyperparameter names {} are reserved for other '
+                         'columns.'.format(sorted(set(hyperparameters) & set(STUDY_COLUMNS))))
+
+    columns = {}
+    for i, (name, dimension) in enumerate(zip(hyperparameters, dimensions)):
+        columns[name] = _typed_column([point[i] for point in points], dimension)
+
+    for column in STUDY_COLUMNS:
+        columns[column] = np.concatenate(rows[column])
+
+    study = StudyTable(columns, hyperparameters)
+    study.save(savefile)
+    return study
+
+
+def load_study(savefile, mmap=False):
+    """
+    Load a table written by `export_study`.
+
+    Parameters
+    ----------
+    * `savefile` [str]
+        The `.npz` file or the directory of `.npy` files.
+
+    * `mmap` [bool, default=False]
+        Memory-map the columns of a directory rather than reading them,
+        see `numpy.load`. Columns of categories other than numbers or
+        strings are always read.
+
+    Returns
+    -------
+    * `study` [StudyTable]
+    """
+    X = None
+    if os.path.isdir(savefile):
+        with open(os.path.join(savefile, StudyTable.metafile), 'r') as infile:
+            meta = json.load(infile)
+        columns = {}
+        for column in meta['columns']:
+            path = os.path.join(savefile, column + '.npy')
+            try:
+                columns[column] = np.load(path, mmap_mode='r' if mmap else None)
+            except ValueError:
+                # Object arrays cannot be mapped.
+                columns[column] = np.load(path, allow_pickle=True)
+        if os.path.exists(os.path.join(savefile, StudyTable.matrixfile)):
+            X = np.load(os.path.join(savefile, StudyTable.matrixfile), mmap_mode='r' if mmap else None)
+    else:
+        with np.load(savefile, allow_pickle=True) as data:
+            meta = json.loads(str(data[StudyTable.metakey]))
+            columns = {column: data[column] for column in meta['columns']}
+
+    return StudyTable(columns, meta['hyperparameters'], X, meta.get('categories'))
+
+
+def open_study(path, mmap=True):
+    """
+    Open a study directory written by `export_study` without reading it into memory.
+
+    `X` and `y` of the returned table are `numpy.memmap` views of fixed
+    width files, so processes analysing the same study on a node share
+    the page cache rather than each holding a copy.
+
+    Parameters
+    ----------
+    * `path` [str]
+        Directory given to `export_study`.
+
+    * `mmap` [bool, default=True]
+        Memory-map the files. Read them into memory otherwise.
+
+    Returns
+    -------
+    * `study` [StudyTable]:
+        - `study.X` [array, shape=(n_evaluations, n_hyperparameters)]:
+          hyperparameters as floats, categorical ones dictionary-encoded.
+        - `study.y` [array, shape=(n_evaluations,)]
+        - `study.categories` [dict]: categories of each categorical
+          hyperparameter, indexed by their code in `X`.
+    """
+    if not os.path.exists(os.path.join(path, StudyTable.matrixfile)):
+        raise ValueError('{} is not a study directory written by export_study.'.format(path))
+
+    return load_study(path, mmap)
+
+
+class StudyTable(object):
+    """
+    Evaluations of a whole study, one array per column.
+
+    Rows are ordered by subspace, then by iteration. Columns are accessed
+    by name, e.g. `study['y']`.
+
+    Parameters
+    ----------
+    * `columns` [dict]:
+        Arrays of equal length by column name, hyperparameters first.
+
+    * `hyperparameters` [list of str]:
+        Names of the hyperparameter columns, in the order of the dimensions.
+
+    * `X` [array, shape=(n_evaluations, n_hyperparameters), optional]:
+        Hyperparameters as one float matrix, see `encode`. Computed if not given.
+
+    * `categories` [dict, optional]:
+        Categories of the categorical hyperparameters encoded in `X`.
+    """
+    metafile = 'columns.json'
+    metakey = '__columns__'
+    matrixfile = 'X.npy'
+
+    def __init__(self, columns, hyperparameters, X=None, categories=None):
+        self.columns = columns
+        self.hyperparameters = list(hyperparameters)
+        self._X = X
+        self._categories = categories
+
+    @property
+    def X(self):
+        if self._X is None:
+            self._X, self._categories = self.encode()
+        return self._X
+
+    @property
+    def y(self):
+        return self.columns['y']
+
+    @property
+    def categories(self):
+        if self._categories is None:
+            self._X, self._categories = self.encode()
+        return self._categories
+
+    def __len__(self):
+        return len(self.columns['y'])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __repr__(self):
+        return "StudyTable(n_evaluations={}, hyperparameters={})".format(len(self), self.hyperparameters)
+
+    def top(self, k=10):
+        """
+        The `k` best evaluations of the study, best first.
+
+        Parameters
+        ----------
+        * `k` [int, default=10]
+
+        Returns
+        -------
+        * `columns` [dict]:
+            Arrays of the `k` best rows, by column name.
+        """
+        k = min(k, len(self))
+        order = np.argpartition(self.columns['y'], k - 1)[:k] if k < len(self) else np.arange(len(self))
+        order = order[np.argsort(self.columns['y'][order], kind="mergesort")]
+        return {column: values[order] for column, values in self.columns.items()}
+
+    def incumbents(self):
+        """
+        Best objective value found so far at each iteration of each subspace.
+
+        Returns
+        -------
+        * `incumbents` [dict]:
+            Running minimum of `y`, by subspace id.
+        """
+        subspace_ids = self.columns['subspace_id']
+        incumbents = {}
+        for subspace_id in np.unique(subspace_ids):
+            incumbents[int(subspace_id)] = np.minimum.accumulate(self.columns['y'][subspace_ids == subspace_id])
+        return incumbents
+
+    def encode(self):
+        """
+        Hyperparameters as one float matrix, categorical columns dictionary-encoded.
+
+        Returns
+        -------
+        * `X` [array, shape=(n_evaluations, n_hyperparameters)]
+
+        * `categories` [dict]:
+            Categories of each categorical hyperparameter, by name. The
+            code of a category in `X` is its index in the list.
+        """
+        X = np.empty((len(self), len(self.hyperparameters)))
+        categories = {}
+        for i, name in enumerate(self.hyperparameters):
+            values = self.columns[name]
+            if values.dtype.kind in 'biuf':
+                X[:, i] = values
+            else:
+                categories[name], X[:, i] = _dictionary_encode(values)
+        return X, categories
+
+    def save(self, savefile):
+        """
+        Write the table to a `.npz` file, or to a directory of `.npy` files.
+
+        A directory also gets `X.npy`, the hyperparameters as one matrix
+        for `open_study`, see `encode`.
+
+        Parameters
+        ----------
+        * `savefile` [str]
+        """
+        meta = {'hyperparameters': self.hyperparameters, 'columns': list(self.columns)}
+        if savefile.endswith('.npz'):
+            np.savez(savefile, **{self.metakey: np.asarray(json.dumps(meta))}, **self.columns)
+            return
+
+        meta['categories'] = self.categories
+        os.makedirs(savefile, exist_ok=True)
+        for column, values in self.columns.items():
+            np.save(os.path.join(savefile, column + '.npy'), values)
+        np.save(os.path.join(savefile, self.matrixfile), self.X)
+        with open(os.path.join(savefile, self.metafile), 'w') as outfile:
+            json.dump(meta, outfile, default=str)
+
+
+def _typed_column(values, dimension):
+    """
+    Array of the values of a hyperparameter, typed after its dimension.
+    """
+    if isinstance(dimension, Real):
+        return np.asarray(values, dtype=float)
+    elif isinstance(dimension, Integer):
+        return np.asarray(values, dtype=int)
+
+    column = np.asarray(values)
+    if column.dtype.kind not in 'biufU':
+        column = np.asarray(values, dtype=object)
+    return column
+
+
+def _dictionary_encode(values):
+    """
+    Categories of `values`, and the code of each value.
+    """
+    try:
+        categories, codes = np.unique(values, return_inverse=True)
+        return categories.tolist(), codes
+    except TypeError:
+        # Categories of mixed types cannot be sorted, keep them in order of appearance.
+        categories = list(dict.fromkeys(values.tolist()))
+        lookup = {category: code for code, category in enumerate(categories)}
+        return categories, np.asarray([lookup[value] for value in values.tolist()])
+
+
+def _checkpoint_records(checkpoints_path, subspace_id):
+    """
+    Records of the checkpoint log of a subspace, empty if it has none.
+    """
+    entry = CheckpointManifest(checkpoints_path).lookup(subspace_id)
+    filename = entry['file'] if entry is not None else 'hyperspace{:02d}.log'.format(subspace_id)
+    if not filename.endswith('.log'):
+        return []
+    offset = entry['offset'] if entry is not None else None
+    return load_checkpoint_log(os.path.join(checkpoints_path, filename), offset)
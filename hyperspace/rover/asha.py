@@ -0,0 +1,267 @@
+"""Asynchronous successive halving, coordinated from one rank"""
+from math import log, ceil
+
+import numpy as np
+from sklearn.utils import check_random_state
+
+from hyperspace.kepler import create_result
+
+
+# MPI message tags
+REPORT = 14
+JOB = 15
+
+
+class Job(object):
+    """
+    One evaluation of a configuration on the budget of a rung.
+
+    Parameters
+    ----------
+    * `trial_id` [int]:
+        Index of the configuration, in the order configurations were started.
+
+    * `subspace_id` [int]:
+        Subspace the configuration was drawn from.
+
+    * `x` [list, shape=(n_dims,)]:
+        The configuration.
+
+    * `rung` [int]:
+        Rung the configuration is evaluated on, 0 for the lowest.
+
+    * `budget` [int]:
+        Budget passed to the objective.
+    """
+    def __init__(self, trial_id, subspace_id, x, rung, budget):
+        self.trial_id = trial_id
+        self.subspace_id = subspace_id
+        self.x = x
+        self.rung = rung
+        self.budget = budget
+
+    def __repr__(self):
+        return "Job(trial_id={}, rung={}, budget={})".format(self.trial_id, self.rung, self.budget)
+
+
+class AsyncSuccessiveHalving(object):
+    """
+    Bookkeeping of asynchronous successive halving (ASHA).
+
+    Rung `k` evaluates configurations on a budget of `min_budget * eta**k`,
+    up to `max_iter`. Whenever a worker is free, it gets the best
+    configuration of the highest rung that is in the top `1/eta` of its
+    rung and has not been promoted yet. Without one, it starts a new
+    configuration on the lowest rung. Rungs never wait for each other, so
+    workers are never left idle while there is something to evaluate.
+
+    New configurations are drawn from each subspace in turn.
+
+    Parameters
+    ----------
+    * `hyperspace` [HyperspacePartition]:
+        Subspaces to draw configurations from.
+
+    * `max_iter` [int, default=100]:
+        Budget of the highest rung.
+
+    * `eta` [int, default=3]:
+        Reduction factor between rungs.
+
+    * `min_budget` [int, default=1]:
+        Budget of the lowest rung.
+
+    * `n_configs` [int, default=100]:
+        Number of configurations to start. Promotions go on until none is
+        left to make.
+
+    * `random_state` [int or RandomState, default=0]
+
+    Reference
+    ---------
+    Li et al., "A System for Massively Parallel Hyperparameter Tuning", MLSys 2020.
+    """
+    def __init__(self, hyperspace, max_iter=100, eta=3, min_budget=1, n_configs=100, random_state=0):
+        if eta < 2:
+            raise ValueError('eta must be at least 2, got {}.'.format(eta))
+
+        if not 0 < min_budget <= max_iter:
+            raise ValueError('min_budget must be in (0, max_iter], got {}.'.format(min_budget))
+
+        self.hyperspace = hyperspace
+        self.eta = eta
+        self.n_configs = n_configs
+        self.rng = check_random_state(random_state)
+
+        # Guard against log rounding, e.g. log(1000) / log(10) < 3.
+        n_rungs = int(log(max_iter / min_budget) / log(eta) + 1e-9) + 1
+        self.budgets = [int(ceil(min_budget * eta**rung)) for rung in range(n_rungs)]
+
+        self.trials = []
+        self.rungs = [{} for _ in self.budgets]
+        self.promoted = [set() for _ in self.budgets]
+        self.history = []
+        self.n_pending = 0
+
+    def next_job(self):
+        """
+        Next job to hand to a free worker.
+
+        Returns
+        -------
+        * `job` [Job or None]:
+            `None` if there is nothing to do until a pending job is reported.
+        """
+        for rung in reversed(range(len(self.budgets) - 1)):
+            trial_id = self._promotable(rung)
+            if trial_id is not None:
+                self.promoted[rung].add(trial_id)
+                return self._start(trial_id, rung + 1)
+
+        if len(self.trials) < self.n_configs:
+            subspace_id = len(self.trials) % len(self.hyperspace)
+            x = self.hyperspace[subspace_id].rvs(1, random_state=self.rng)[0]
+            self.trials.append((subspace_id, x))
+            return self._start(len(self.trials) - 1, 0)
+
+        return None
+
+    def report(self, job, value):
+        """
+        Record the objective value of a finished job.
+
+        Parameters
+        ----------
+        * `job` [Job]
+
+        * `value` [float or (float, float)]:
+            Value returned by the objective. Objectives returning
+            (loss, time) are ranked by loss.
+        """
+        self.n_pending -= 1
+        loss = value[0] if np.ndim(value) == 1 else value
+        self.rungs[job.rung][job.trial_id] = float(loss)
+        self.history.append((job, value))
+
+    @property
+    def finished(self):
+        """
+        Whether every configuration was started and no job is left to run.
+        """
+        if self.n_pending or len(self.trials) < self.n_configs:
+            return False
+        return all(self._promotable(rung) is None for rung in range(len(self.budgets) - 1))
+
+    def results(self):
+        """
+        Evaluations of each subspace, in the order they were reported.
+
+        Returns
+        -------
+        * `results` [dict]:
+            `OptimizeResult` by subspace id, for subspaces with evaluations.
+            `trial_ids`, `rungs` and `budgets` hold the configuration, rung
+            and budget of each evaluation.
+        """
+        results = {}
+        for subspace_id in range(len(self.hyperspace)):
+            history = [(job, value) for job, value in self.history if job.subspace_id == subspace_id]
+            if not history:
+                continue
+
+            result = create_result([job.x for job, _ in history], [value for _, value in history],
+                                   space=self.hyperspace[subspace_id], rng=self.rng)
+            result.trial_ids = np.asarray([job.trial_id for job, _ in history])
+            result.rungs = np.asarray([job.rung for job, _ in history])
+            result.budgets = np.asarray([job.budget for job, _ in history])
+            results[subspace_id] = result
+
+        return results
+
+    def _promotable(self, rung):
+        """
+        Best configuration of `rung` in its top `1/eta` and not promoted yet.
+        """
+        losses = self.rungs[rung]
+        n_top = len(losses) // self.eta
+        if n_top == 0:
+            return None
+
+        top = sorted(losses, key=lambda trial_id: (losses[trial_id], trial_id))[:n_top]
+        for trial_id in top:
+            if trial_id not in self.promoted[rung]:
+                return trial_id
+        return None
+
+    def _start(self, trial_id, rung):
+        self.n_pending += 1
+        subspace_id, x = self.trials[trial_id]
+        return Job(trial_id, subspace_id, x, rung, self.budgets[rung])
+
+    def serve(self, comm, verbose=False):
+        """
+        Hand out jobs to the worker ranks of `comm` until none is left.
+
+        Runs on rank 0. Workers call `request_job` in a loop. A worker
+        asking while nothing can be started waits for a pending job to be
+        reported.
+
+        Parameters
+        ----------
+        * `comm` [mpi4py.MPI.Comm]:
+            Communicator. The coordinator is rank 0, workers are ranks 1 to size - 1.
+
+        * `verbose` [bool, default=False]:
+            Print each promotion.
+        """
+        from mpi4py import MPI
+
+        n_active = comm.Get_size() - 1
+        waiting = []
+        while n_active > 0:
+            status = MPI.Status()
+            report = comm.recv(source=MPI.ANY_SOURCE, tag=REPORT, status=status)
+            if report is not None:
+                job, value = report
+                self.report(job, value)
+                if verbose and job.rung > 0:
+                    print(f'Configuration {job.trial_id} on rung {job.rung}, '
+                          f'budget {job.budget}: {value}')
+            waiting.append(status.Get_source())
+
+            while waiting:
+                job = self.next_job()
+                if job is not None:
+                    comm.send(job, dest=waiting.pop(0), tag=JOB)
+                elif self.n_pending == 0:
+                    # Nothing left to run, and nothing running that could change that.
+                    for worker in waiting:
+                        comm.send(None, dest=worker, tag=JOB)
+                    n_active -= len(waiting)
+                    waiting = []
+                else:
+                    break
+
+
+def request_job(comm, job=None, value=None):
+    """
+    Report a finished job to the coordinator and ask for the next one.
+
+    Parameters
+    ----------
+    * `comm` [mpi4py.MPI.Comm]:
+        Communicator whose rank 0 runs `AsyncSuccessiveHalving.serve`.
+
+    * `job` [Job, optional]:
+        The job just run, if any.
+
+    * `value`:
+        The objective value of `job`.
+
+    Returns
+    -------
+    * `job` [Job or None]:
+        Next job, or `None` when there is nothing left to do.
+    """
+    comm.send(None if job is None else (job, value), dest=0, tag=REPORT)
+    return comm.recv(source=0, tag=JOB)
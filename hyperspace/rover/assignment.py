@@ -0,0 +1,210 @@
+"""Mapping hyperspaces onto MPI ranks"""
+import heapq
+import numpy as np
+
+
+class SubspaceAssignment(object):
+    """
+    Base class for all subspace assignments.
+
+    An assignment maps `n_subspaces` hyperspaces onto `size` ranks.
+    - If `size <= n_subspaces`, each rank works through a queue of subspaces.
+    - If `size > n_subspaces`, each rank gets a single subspace and the ranks
+      sharing a subspace evaluate points for it in parallel.
+
+    Example usage:
+        assignment = check_assignment("block").assign(len(hyperspace), size)
+        for subspace_id in assignment.subspaces(rank):
+            ...
+    """
+    def __init__(self):
+        self.n_subspaces = None
+        self.size = None
+        self.queues = None
+        self.groups = None
+
+    def __repr__(self):
+        return "{}(n_subspaces={}, size={})".format(type(self).__name__,
+                                                    self.n_subspaces, self.size)
+
+    def assign(self, n_subspaces, size):
+        """
+        Assign subspaces to ranks.
+
+        Parameters
+        ----------
+        * `n_subspaces` [int]:
+            Number of hyperspaces, usually 2**n_hyperparameters.
+
+        * `size` [int]:
+            Number of ranks.
+
+        Returns
+        -------
+        * `self` [SubspaceAssignment]
+        """
+        if n_subspaces < 1 or size < 1:
+            raise ValueError("Need at least one subspace and one rank. "
+                             "Got {} and {} respectively.".format(n_subspaces, size))
+
+        self.n_subspaces = n_subspaces
+        self.size = size
+
+        if size <= n_subspaces:
+            self.queues = self._assign_queues(n_subspaces, size)
+        else:
+            groups = self._assign_groups(n_subspaces, size)
+            self.queues = [[] for _ in range(size)]
+            for subspace_id, ranks in enumerate(groups):
+                for rank in ranks:
+                    self.queues[rank].append(subspace_id)
+
+        self.groups = [[] for _ in range(n_subspaces)]
+        for rank, queue in enumerate(self.queues):
+            for subspace_id in queue:
+                self.groups[subspace_id].append(rank)
+
+        return self
+
+    def subspaces(self, rank):
+        """
+        Queue of subspace ids a rank works through, in order.
+
+        Parameters
+        ----------
+        * `rank` [int]
+        """
+        self._check_assigned()
+        return list(self.queues[rank])
+
+    def ranks(self, subspace_id):
+        """
+        Ranks sharing a subspace, lowest rank first.
+
+        Parameters
+        ----------
+        * `subspace_id` [int]
+        """
+        self._check_assigned()
+        return list(self.groups[subspace_id])
+
+    def _check_assigned(self):
+        if self.queues is None:
+            raise RuntimeError("Call `assign(n_subspaces, size)` before querying the assignment.")
+
+    def _assign_queues(self, n_subspaces, size):
+        """
+        Queues of subspace ids for each rank when `size <= n_subspaces`.
+        """
+        raise NotImplementedError("You should implement this!")
+
+    def _assign_groups(self, n_subspaces, size):
+        """
+        Group of ranks for each subspace when `size > n_subspaces`.
+        """
+        raise NotImplementedError("You should implement this!")
+
+
+class BlockAssignment(SubspaceAssignment):
+    """
+    Static block assignment.
+
+    Each rank gets a contiguous block of subspace ids, or each subspace gets
+    a contiguous block of ranks. With `size == n_subspaces`, rank `i` works
+    on subspace `i`.
+    """
+    def _assign_queues(self, n_subspaces, size):
+        return [list(range(rank*n_subspaces // size, (rank + 1)*n_subspaces // size))
+                for rank in range(size)]
+
+    def _assign_groups(self, n_subspaces, size):
+        return [list(range(subspace*size // n_subspaces, (subspace + 1)*size // n_subspaces))
+                for subspace in range(n_subspaces)]
+
+
+class RoundRobinAssignment(SubspaceAssignment):
+    """
+    Round-robin assignment.
+
+    Subspace `i` goes to rank `i % size`, or rank `i` works on
+    subspace `i % n_subspaces`.
+    """
+    def _assign_queues(self, n_subspaces, size):
+        return [list(range(rank, n_subspaces, size)) for rank in range(size)]
+
+    def _assign_groups(self, n_subspaces, size):
+        return [list(range(subspace, size, n_subspaces)) for subspace in range(n_subspaces)]
+
+
+class CostWeightedAssignment(SubspaceAssignment):
+    """
+    Cost-weighted assignment.
+
+    - If `size <= n_subspaces`, subspaces are handed out greedily, most expensive
+      first, to the rank with the least total cost (longest processing time first).
+    - If `size > n_subspaces`, spare ranks go to the subspaces with the largest cost
+      per rank.
+
+    Parameters
+    ----------
+    * `costs` [array-like, shape=(n_subspaces,)]:
+        Relative cost estimate of optimizing each subspace.
+    """
+    def __init__(self, costs):
+        super().__init__()
+        self.costs = np.asarray(costs, dtype=float)
+
+        if np.any(self.costs <= 0):
+            raise ValueError("Subspace costs must be positive.")
+
+    def _check_costs(self, n_subspaces):
+        if len(self.costs) != n_subspaces:
+            raise ValueError("Expected {} subspace costs, got {}.".format(n_subspaces, len(self.costs)))
+
+    def _assign_queues(self, n_subspaces, size):
+        self._check_costs(n_subspaces)
+        queues = [[] for _ in range(size)]
+        loads = [(0.0, rank) for rank in range(size)]
+        # Stable sort so that ties keep their subspace order.
+        for subspace in np.argsort(-self.costs, kind="mergesort"):
+            load, rank = heapq.heappop(loads)
+            queues[rank].append(int(subspace))
+            heapq.heappush(loads, (load + self.costs[subspace], rank))
+
+        return queues
+
+    def _assign_groups(self, n_subspaces, size):
+        self._check_costs(n_subspaces)
+        n_ranks = np.ones(n_subspaces, dtype=int)
+        for _ in range(size - n_subspaces):
+            n_ranks[np.argmax(self.costs / n_ranks)] += 1
+
+        offsets = np.concatenate(([0], np.cumsum(n_ranks)))
+        return [list(range(offsets[i], offsets[i + 1])) for i in range(n_subspaces)]
+
+
+def check_assignment(assignment):
+    """
+    Turn an assignment description into a `SubspaceAssignment`.
+
+    Parameters
+    ----------
+    * `assignment` [str or SubspaceAssignment]:
+        - "block": static block assignment.
+        - "roundrobin": round-robin assignment.
+        - an instance of `SubspaceAssignment`, e.g. `CostWeightedAssignment(costs)`.
+
+    Returns
+    -------
+    * `assignment` [SubspaceAssignment]
+    """
+    if isinstance(assignment, SubspaceAssignment):
+        return assignment
+
+    if assignment == "block":
+        return BlockAssignment()
+    elif assignment in ("roundrobin", "round-robin"):
+        return RoundRobinAssignment()
+    else:
+        raise ValueError("Invalid assignment {}. Read the documentation for "
+                         "supported assignments.".format(assignment))
@@ -0,0 +1,156 @@
+"""Sharing objective evaluations between ranks"""
+import os
+import json
+import pickle
+import hashlib
+import numbers
+import tempfile
+
+
+def config_key(point, *args):
+    """
+    Canonical encoding of a configuration.
+
+    Numpy scalars and their python counterparts encode the same, so a point
+    proposed by any rank maps to the same key.
+
+    Parameters
+    ----------
+    * `point` [list, shape=(n_dims,)]:
+        Configuration passed to the objective.
+
+    * `args`:
+        Extra positional arguments passed to the objective, e.g. a budget.
+
+    Returns
+    -------
+    * `key` [str]
+    """
+    return json.dumps([_encode_values(point), _encode_values(args)])
+
+
+def _encode_values(values):
+    """
+    Convert numpy types to JSON serializable python objects.
+    """
+    encoded = []
+    for value in values:
+        if isinstance(value, (bool, str)) or value is None:
+            encoded.append(value)
+        elif isinstance(value, numbers.Integral):
+            encoded.append(int(value))
+        elif isinstance(value, numbers.Real):
+            # repr round-trips, so distinct floats never collide.
+            encoded.append(repr(float(value)))
+        else:
+            encoded.append(repr(value))
+
+    return encoded
+
+
+class EvaluationCache(object):
+    """
+    Evaluations shared through a directory, one file per configuration.
+
+    Point `path` at node-local shared memory (e.g. `/dev/shm/...`) to share
+    between the ranks of a node, or at a shared file system to share
+    between every rank. Files are written to a temporary name and renamed,
+    so readers never see a partial record. Lookups are kept in memory
+    once read.
+
+    Parameters
+    ----------
+    * `path` [str]:
+        Directory holding the cache. Created if missing.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.memory = {}
+        os.makedirs(path, exist_ok=True)
+
+    def _filename(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest + ".pkl")
+
+    def lookup(self, key):
+        """
+        Recorded value of `key`.
+
+        Parameters
+        ----------
+        * `key` [str]:
+            Encoded configuration, see `config_key`.
+
+        Returns
+        -------
+        * `found` [bool]
+
+        * `value`:
+            Recorded value, `None` if not `found`.
+        """
+        if key in self.memory:
+            return True, self.memory[key]
+
+        try:
+            with open(self._filename(key), "rb") as handle:
+                record_key, value = pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+        if record_key != key:
+            return False, None
+
+        self.memory[key] = value
+        return True, value
+
+    def record(self, key, value):
+        """
+        Record the value of `key` for every rank sharing the cache.
+
+        Parameters
+        ----------
+        * `key` [str]:
+            Encoded configuration, see `config_key`.
+
+        * `value`:
+            Value of the objective. Has to be picklable.
+        """
+        self.memory[key] = value
+        fd, tmpfile = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            pickle.dump((key, value), handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpfile, self._filename(key))
+
+
+class CachedObjective(object):
+    """
+    Objective looking up each configuration in a cache before evaluating it.
+
+    Two ranks asking for the same configuration at the same time may both
+    evaluate it. The wrapper is picklable as long as `objective` is.
+
+    Parameters
+    ----------
+    * `objective` [function]:
+        User defined function which calls a learner
+        and returns a metric of interest.
+
+    * `cache` [EvaluationCache]
+    """
+    def __init__(self, objective, cache):
+        self.objective = objective
+        self.cache = cache
+        self.n_hits = 0
+        self.n_misses = 0
+
+    def __call__(self, point, *args):
+        key = config_key(point, *args)
+        found, value = self.cache.lookup(key)
+        if found:
+            self.n_hits += 1
+            return value
+
+        self.n_misses += 1
+        value = self.objective(point, *args)
+        self.cache.record(key, value)
+        return value
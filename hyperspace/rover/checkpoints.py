@@ -1,11 +1,182 @@
+import io
 import os
 import json
+import time
+import atexit
+import pickle
+import shutil
+import signal
+import struct
+import hashlib
 import numbers
+import weakref
+import tempfile
+import threading
 
+import numpy as np
 from skopt.utils import dump
+from skopt.utils import load
+from scipy.optimize import OptimizeResult
 
 
-class CheckpointSaver(object):
+# Extensions of the files checkpoints leave next to results: logs, optimizer
+# states, surrogate snapshots, previous generations and unfinished writes.
+CHECKPOINT_SUFFIXES = ('.log', '.state', '.models', '.prev', '.tmp')
+
+# Background writers with writes possibly pending, flushed on exit and on signals.
+_WRITERS = weakref.WeakSet()
+_PREVIOUS_HANDLERS = {}
+
+
+class BackgroundWriter(object):
+    """
+    Write checkpoints on a background thread.
+
+    `submit` hands over a payload and returns at once. Payloads submitted
+    while the thread is busy are merged with `coalesce`, which by default
+    keeps only the newest, so the thread never falls behind.
+
+    Parameters
+    ----------
+    * `write` [callable]:
+        Called on the background thread with each payload.
+
+    * `coalesce` [callable, optional]:
+        Called with the pending and the new payload, returns the payload to write.
+    """
+    def __init__(self, write, coalesce=None):
+        self.write = write
+        self.coalesce = coalesce
+        self._condition = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._error = None
+        self._thread = None
+
+    def submit(self, payload):
+        """
+        Schedule `payload` to be written.
+        """
+        with self._condition:
+            if self._pending is not None and self.coalesce is not None:
+                payload = self.coalesce(self._pending, payload)
+            self._pending = payload
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+                _track(self)
+            self._condition.notify_all()
+
+    def flush(self):
+        """
+        Wait until every submitted payload is written.
+        """
+        with self._condition:
+            while self._pending is not None or self._busy:
+                self._condition.wait()
+
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+
+    def close(self):
+        """
+        Flush and stop the background thread.
+        """
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                payload, self._pending = self._pending, None
+                self._busy = True
+
+            try:
+                self.write(payload)
+            except Exception as error:
+                self._error = error
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+
+def flush_checkpoints():
+    """
+    Wait for every background checkpoint write to finish.
+    """
+    for writer in list(_WRITERS):
+        writer.flush()
+
+
+def _track(writer):
+    """
+    Flush `writer` on exit and on SIGTERM or SIGINT.
+    """
+    _WRITERS.add(writer)
+    if _PREVIOUS_HANDLERS or threading.current_thread() is not threading.main_thread():
+        return
+
+    atexit.register(flush_checkpoints)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        _PREVIOUS_HANDLERS[signum] = signal.signal(signum, _flush_on_signal)
+
+
+def _flush_on_signal(signum, frame):
+    flush_checkpoints()
+
+    previous = _PREVIOUS_HANDLERS.get(signum)
+    if callable(previous):
+        previous(signum, frame)
+    elif previous == signal.SIG_DFL:
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+
+class _AsyncSaver(object):
+    """
+    Hands writes to a `BackgroundWriter` when `asynchronous` is set.
+
+    Subclasses implement `_write(payload)`, and `_coalesce(pending, payload)`
+    if pending payloads should be merged rather than replaced.
+    """
+    _coalesce = None
+
+    def _submit(self, payload):
+        if not self.asynchronous:
+            self._write(payload)
+            return
+
+        if self._writer is None:
+            self._writer = BackgroundWriter(self._write, self._coalesce)
+        self._writer.submit(payload)
+
+    def flush(self):
+        """
+        Wait for the pending checkpoint writes to finish.
+        """
+        if self._writer is not None:
+            self._writer.flush()
+
+    def __getstate__(self):
+        # Threads do not travel to other processes.
+        state = self.__dict__.copy()
+        state['_writer'] = None
+        return state
+
+
+class CheckpointSaver(_AsyncSaver):
     """
     Save current state after each iteration with `skopt.dump`.
 
@@ -19,14 +190,33 @@ class CheckpointSaver(object):
     * `checkpoint_path`:
         location where checkpoint will be saved to;
 
+    * `asynchronous` [bool, default=False]:
+        Write on a background thread, keeping only the newest pending checkpoint.
+        Call `flush` to wait for the writes.
+
+    * `fsync` [str or float, default="never"]:
+        When to force checkpoints to disk: "always", "never", or at most
+        once every `fsync` seconds. See `write_atomic`.
+
     * `dump_options`:
         options to pass on to `skopt.dump`, like `compress=9`
+
+    Each checkpoint is written to a temporary file and renamed over the
+    previous one, which is kept as `<filename>.prev`. It ends with a
+    trailer holding a sequence number and a checksum, after the `skopt.dump`
+    stream. Read it back with `load_checkpoint`, which picks the newest
+    valid one and loads it without the trailer. `skopt.load` cannot read
+    the file directly when it is compressed.
     """
-    def __init__(self, checkpoint_path, filename, **dump_options):
+    def __init__(self, checkpoint_path, filename, asynchronous=False, fsync="never", **dump_options):
         self.checkpoint_path = checkpoint_path
         self.filename = filename
         self.savefile = os.path.join(self.checkpoint_path, self.filename)
+        self.asynchronous = asynchronous
+        self.fsync = FsyncPolicy(fsync)
         self.dump_options = dump_options
+        self._writer = None
+        self.seq = max([_read_trailer(path)[0] for path in _generations(self.savefile)] + [0])
 
     def __call__(self, res):
         """
@@ -35,10 +225,31 @@ class CheckpointSaver(object):
         * `res` [`OptimizeResult`, scipy object]:
             The optimization as a OptimizeResult object.
         """
-        dump(res, self.savefile, **self.dump_options)
+        if self.asynchronous:
+            # The optimizer keeps growing its lists of points and models.
+            res = OptimizeResult(res)
+            res.x_iters = list(res.x_iters)
+            if res.get('models') is not None:
+                res.models = list(res.models)
+
+        self._submit(res)
 
+    def _write(self, res):
+        self.seq += 1
 
-class JsonCheckpointSaver(object):
+        def write(tmpfile):
+            dump(res, tmpfile, **self.dump_options)
+            with open(tmpfile, 'rb') as handle:
+                body = handle.read()
+            trailer = json.dumps({'seq': self.seq, 'sha256': hashlib.sha256(body).hexdigest()})
+            with open(tmpfile, 'ab') as handle:
+                handle.write(trailer.encode('utf-8'))
+                handle.write(struct.pack('>Q', len(trailer)))
+
+        write_atomic(self.savefile, write, self.fsync())
+
+
+class JsonCheckpointSaver(_AsyncSaver):
     """
     Save current state after each iteration with JSON format.
 
@@ -54,11 +265,32 @@ class JsonCheckpointSaver(object):
 
     * `filename` : str
         Name of the file to save.
+
+    * `asynchronous` : bool, default=False
+        Write on a background thread, keeping only the newest pending checkpoint.
+        Call `flush` to wait for the writes.
+
+    * `fsync` : str or float, default="never"
+        When to force checkpoints to disk: "always", "never", or at most
+        once every `fsync` seconds. See `write_atomic`.
+
+    Each checkpoint is written to a temporary file and renamed over the
+    previous one, which is kept as `<filename>.prev`. It holds a sequence
+    number "seq" and a "checksum" of the other fields. Read it back with
+    `load_json_checkpoint`, which picks the newest valid one.
     """
-    def __init__(self, checkpoint_path, filename):
+    def __init__(self, checkpoint_path, filename, asynchronous=False, fsync="never"):
         self.checkpoint_path = checkpoint_path
         self.filename = filename
         self.savefile = os.path.join(self.checkpoint_path, self.filename)
+        self.asynchronous = asynchronous
+        self.fsync = FsyncPolicy(fsync)
+        self._writer = None
+        self.seq = 0
+        for path in _generations(self.savefile):
+            data = _read_json(path)
+            if data is not None:
+                self.seq = max(self.seq, data['seq'])
 
     def _convert_fields(self, result_field):
         """
@@ -70,16 +302,7 @@ class JsonCheckpointSaver(object):
         * `result_field` : list
             Field consisting of numpy types to be converted.
         """
-        converted_field = []
-        for dim in result_field:
-            if isinstance(dim, numbers.Integral):
-                converted_field.append(int(dim))
-            elif isinstance(dim, numbers.Real):
-                converted_field.append(float(dim))
-            else:
-                converted_field.append(dim)
-
-        return converted_field
+        return _convert_fields(result_field)
 
     def __call__(self, res):
         """
@@ -96,5 +319,827 @@ class JsonCheckpointSaver(object):
         data['func_vals'] = self._convert_fields(res.func_vals.tolist())
         data['x_iters'] = [self._convert_fields(x) for x in res.x_iters]
 
-        with open(self.savefile, 'w') as outfile:
-            json.dump(data, outfile)
+        self._submit(data)
+
+    def _write(self, data):
+        self.seq += 1
+        data = dict(data, seq=self.seq)
+        data['checksum'] = _json_checksum(data)
+
+        def write(tmpfile):
+            with open(tmpfile, 'w') as outfile:
+                json.dump(data, outfile)
+
+        write_atomic(self.savefile, write, self.fsync())
+
+
+class JsonLinesCheckpointSaver(_AsyncSaver):
+    """
+    Append one compact JSON record per evaluation after each iteration.
+
+    Unlike `JsonCheckpointSaver`, which rewrites every evaluation at each
+    iteration, only the new evaluations are converted and written, so the
+    cost of a checkpoint does not grow with the run. Each line holds
+    "iteration", "x", "y" and "timestamp". The file can be followed while
+    the run goes on with `load_json_lines`, and is loaded by
+    `hyperspace.kepler.load_json_results` when named `*.jsonl`.
+
+    Parameters
+    ----------
+    * `checkpoint_path` [str]:
+        location where checkpoint will be saved to;
+
+    * `filename` [str]:
+        Name of the file to append to, e.g. `hyperspace00.jsonl`.
+
+    * `asynchronous` [bool, default=False]:
+        Append on a background thread, batching the records pending
+        while it writes. Call `flush` to wait for the writes.
+
+    * `fsync` [str or float, default="never"]:
+        When to force appends to disk, see `FsyncPolicy`.
+    """
+    def __init__(self, checkpoint_path, filename, asynchronous=False, fsync="never"):
+        self.checkpoint_path = checkpoint_path
+        self.filename = filename
+        self.savefile = os.path.join(self.checkpoint_path, self.filename)
+        self.asynchronous = asynchronous
+        self.fsync = FsyncPolicy(fsync)
+        self._writer = None
+
+        # Drop a line cut short by a crash, so that new lines stay readable.
+        records, offset = load_json_lines(self.savefile)
+        if os.path.exists(self.savefile) and os.path.getsize(self.savefile) > offset:
+            with open(self.savefile, 'r+b') as handle:
+                handle.truncate(offset)
+
+        self.n_saved = len(records)
+
+    def __call__(self, res):
+        """
+        Parameters
+        ----------
+        * `res` [`OptimizeResult`, scipy object]:
+            The optimization as a OptimizeResult object.
+        """
+        now = time.time()
+        lines = []
+        for i in range(self.n_saved, len(res.func_vals)):
+            record = {'iteration': i, 'x': _convert_fields(res.x_iters[i]),
+                      'y': float(res.func_vals[i]), 'timestamp': now}
+            lines.append(json.dumps(record, separators=(',', ':')) + '\n')
+
+        if lines:
+            self.n_saved = len(res.func_vals)
+            self._submit(lines)
+
+    def _write(self, lines):
+        with open(self.savefile, 'a') as outfile:
+            outfile.writelines(lines)
+            if self.fsync():
+                outfile.flush()
+                os.fsync(outfile.fileno())
+
+    def _coalesce(self, pending, lines):
+        return pending + lines
+
+
+def load_json_lines(savefile, offset=0):
+    """
+    Read the records of a file written by `JsonLinesCheckpointSaver`.
+
+    Stops at the first incomplete or invalid line, e.g. one still being
+    written. Pass the returned offset back in to read only the records
+    appended since, to follow a running study.
+
+    Parameters
+    ----------
+    * `savefile` [str]
+
+    * `offset` [int, default=0]:
+        Byte offset to start reading from.
+
+    Returns
+    -------
+    * `records` [list of dicts]
+
+    * `offset` [int]:
+        Byte offset just past the last complete record.
+    """
+    records = []
+    for record, end in iter_json_lines(savefile, offset):
+        records.append(record)
+        offset = end
+
+    return records, offset
+
+
+def iter_json_lines(savefile, offset=0):
+    """
+    Yield each record of a file written by `JsonLinesCheckpointSaver`, one line at a time.
+
+    See `load_json_lines`.
+
+    Yields
+    ------
+    * `record` [dict]
+
+    * `offset` [int]:
+        Byte offset just past the record.
+    """
+    if not os.path.exists(savefile):
+        return
+
+    with open(savefile, 'rb') as handle:
+        handle.seek(offset)
+        for line in handle:
+            if not line.endswith(b'\n'):
+                return
+            try:
+                record = json.loads(line.decode('utf-8'))
+            except ValueError:
+                return
+            offset += len(line)
+            yield record, offset
+
+
+def _convert_fields(values):
+    """
+    Convert numpy types to python objects, so that they serialize to JSON.
+    """
+    converted = []
+    for value in values:
+        if isinstance(value, numbers.Integral):
+            converted.append(int(value))
+        elif isinstance(value, numbers.Real):
+            converted.append(float(value))
+        else:
+            converted.append(value)
+
+    return converted
+
+
+class IncrementalCheckpointSaver(_AsyncSaver):
+    """
+    Append each new evaluation to a checkpoint log after each iteration.
+
+    Unlike `CheckpointSaver`, the cost of a checkpoint does not grow with the
+    number of iterations: only the new (x, y, timing) records are written.
+    Fitted surrogates are only saved by `snapshot`, on demand or every
+    `snapshot_every` iterations.
+
+    The log is `<filename>.log` in `checkpoint_path`, and is read back with
+    `load_checkpoint_log`. An existing log is appended to, so a resumed run
+    carries on where the previous one stopped. What a resumed optimizer
+    needs beyond the evaluations, the state of its random number generator
+    and the fitted kernel of its latest Gaussian process, is replaced in
+    `<filename>.state` at each iteration, see `load_checkpoint_state`.
+
+    Given a `subspace_id`, the saver records the log's entry in the
+    `CheckpointManifest` of `checkpoint_path` on `flush`, and at most once
+    every `record_every` seconds while running. The state also holds the
+    offset of the log it was saved with, so a log is only resumed up to
+    whichever of the two is further, and never past the saved state.
+
+    Parameters
+    ----------
+    * `checkpoint_path` [str]:
+        location where checkpoint will be saved to;
+
+    * `filename` [str]:
+        Name of the checkpoint, without extension.
+
+    * `snapshot_every` [int, default=None]:
+        Also snapshot the surrogates every `snapshot_every` iterations.
+
+    * `asynchronous` [bool, default=False]:
+        Append on a background thread, batching the records pending
+        while it writes. Call `flush` to wait for the writes.
+
+    * `rank` [int, default=None]:
+        Rank running the optimizer, recorded with each evaluation.
+
+    * `fsync` [str or float, default="never"]:
+        When to force the appended records and the state to disk: "always",
+        "never", or at most once every `fsync` seconds. See `FsyncPolicy`.
+
+    * `subspace_id` [int, default=None]:
+        Subspace checkpointed, under which the log is recorded in the manifest.
+
+    * `record_every` [str or float, default=60]:
+        When to record the log's entry in the manifest besides `flush`:
+        "always", "never", or at most once every `record_every` seconds,
+        as for `fsync`.
+    """
+    def __init__(self, checkpoint_path, filename, snapshot_every=None, asynchronous=False, rank=None,
+                 fsync="never", subspace_id=None, record_every=60):
+        self.checkpoint_path = checkpoint_path
+        self.filename = filename
+        self.savefile = os.path.join(self.checkpoint_path, self.filename + '.log')
+        self.snapshotfile = os.path.join(self.checkpoint_path, self.filename + '.models')
+        self.statefile = os.path.join(self.checkpoint_path, self.filename + '.state')
+        self.snapshot_every = snapshot_every
+        self.asynchronous = asynchronous
+        self.rank = rank
+        self.fsync = FsyncPolicy(fsync)
+        self.subspace_id = subspace_id
+        self.record_every = FsyncPolicy(record_every)
+        self._writer = None
+        self.n_calls = 0
+
+        # Records past the manifest's entry and the state were not saved with the state.
+        end = None
+        if subspace_id is not None:
+            entry = CheckpointManifest(checkpoint_path).lookup(subspace_id)
+            if entry is not None and entry['file'] == os.path.basename(self.savefile):
+                end = _resume_offset(self.savefile, entry['offset'])
+
+        # Drop a record cut short by a crash, so that new records stay readable.
+        records, offset = _read_log(self.savefile, end)
+        if os.path.exists(self.savefile) and os.path.getsize(self.savefile) > offset:
+            with open(self.savefile, 'r+b') as handle:
+                handle.truncate(offset)
+
+        self.n_saved = len(records)
+        self.n_written = len(records)
+        self.offset = offset
+        self.recorded = None
+        self.last_time = time.time()
+
+    def __call__(self, res):
+        """
+        Parameters
+        ----------
+        * `res` [`OptimizeResult`, scipy object]:
+            The optimization as a OptimizeResult object.
+        """
+        now = time.time()
+        n_new = len(res.func_vals) - self.n_saved
+        records = []
+        if n_new > 0:
+            # Evaluations told together share the time since the last call.
+            eval_seconds = (now - self.last_time) / n_new
+            for i in range(self.n_saved, len(res.func_vals)):
+                records.append({
+                    'iteration': i,
+                    'x': list(res.x_iters[i]),
+                    'y': res.func_vals[i],
+                    'timestamp': now,
+                    'eval_seconds': eval_seconds,
+                    'rank': self.rank,
+                })
+            self.n_saved = len(res.func_vals)
+
+        self._submit((records, _optimizer_state(res)))
+
+        self.last_time = now
+        self.n_calls += 1
+        if self.snapshot_every and self.n_calls % self.snapshot_every == 0:
+            self.snapshot(res)
+
+    def snapshot(self, res):
+        """
+        Save the fitted surrogates of `res` next to the log.
+
+        Parameters
+        ----------
+        * `res` [`OptimizeResult`, scipy object]:
+            The optimization as a OptimizeResult object.
+        """
+        dump({'n_evaluations': len(res.func_vals), 'models': res.models}, self.snapshotfile)
+
+    def _write(self, payload):
+        records, state = payload
+        fsync = self.fsync()
+        if records:
+            with open(self.savefile, 'ab') as handle:
+                for record in records:
+                    pickle.dump(record, handle, protocol=pickle.HIGHEST_PROTOCOL)
+                self.offset = handle.tell()
+                self.n_written += len(records)
+                if fsync:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+
+        # The rename alone keeps the state whole, no need for a `.prev` on every iteration.
+        state = dict(state, offset=self.offset)
+        write_atomic(self.statefile, lambda path: _dump_pickle(state, path), fsync, keep_previous=False)
+        if records and self.record_every():
+            self._record(fsync)
+
+    def flush(self):
+        """
+        Wait for the pending checkpoint writes to finish, and record the log in the manifest.
+        """
+        super(IncrementalCheckpointSaver, self).flush()
+        self._record(self.fsync())
+
+    def _record(self, fsync=False):
+        entry = self.manifest_entry()
+        if self.subspace_id is None or self.n_written == 0 or entry == self.recorded:
+            return
+        CheckpointManifest(self.checkpoint_path).record(self.subspace_id, entry, fsync)
+        self.recorded = entry
+
+    def manifest_entry(self):
+        """
+        Where the written log stands, for `CheckpointManifest.record`.
+
+        Call `flush` first when writing asynchronously.
+        """
+        return {'file': os.path.basename(self.savefile), 'offset': self.offset, 'iteration': self.n_written}
+
+    def _coalesce(self, pending, payload):
+        # Every record is kept, only the newest state is.
+        return pending[0] + payload[0], payload[1]
+
+
+def _optimizer_state(res):
+    """
+    What a resumed optimizer needs beyond the evaluations of `res`.
+    """
+    rng = res.get('random_state')
+    kernel = None
+    if res.get('models'):
+        kernel = getattr(res.models[-1], 'kernel_', None)
+
+    return {
+        'n_evaluations': len(res.func_vals),
+        'rng_state': rng.get_state() if isinstance(rng, np.random.RandomState) else None,
+        'tell_state': res.get('tell_state'),
+        'kernel': kernel,
+    }
+
+
+def _dump_pickle(obj, path):
+    with open(path, 'wb') as handle:
+        pickle.dump(obj, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_checkpoint_state(savefile):
+    """
+    Read the optimizer state written next to a checkpoint log by `IncrementalCheckpointSaver`.
+
+    Parameters
+    ----------
+    * `savefile` [str]:
+        Path to the `.state` file.
+
+    Returns
+    -------
+    * `state` [dict or None]:
+        Keys "n_evaluations", the number of evaluations logged when the
+        state was saved, "offset", the offset of the log just past them,
+        "rng_state", the state of the optimizer's `RandomState`,
+        "tell_state", the state of the optimizer at its last tell if known,
+        see `tell_recorded`, and "kernel", the fitted kernel of the latest
+        Gaussian process or `None` for other surrogates. `None` if there
+        is no readable state.
+    """
+    for path in (savefile, savefile + '.prev'):
+        try:
+            with open(path, 'rb') as handle:
+                return pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+            continue
+
+    return None
+
+
+def load_checkpoint_log(savefile, offset=None):
+    """
+    Read the records of a checkpoint log written by `IncrementalCheckpointSaver`.
+
+    A last record cut short by a crash is ignored.
+
+    Parameters
+    ----------
+    * `savefile` [str]:
+        Path to the `.log` file.
+
+    * `offset` [int, optional]:
+        Only read the records before this offset, e.g. the offset of the
+        log's manifest entry, see `CheckpointManifest`. Records the log's
+        state was saved with are read even past `offset`.
+
+    Returns
+    -------
+    * `records` [list of dicts]:
+        One record per evaluation with keys "iteration", "x", "y",
+        "timestamp", "eval_seconds" and "rank", in order. Logs written
+        before ranks were recorded have no "rank".
+    """
+    if offset is not None:
+        offset = _resume_offset(savefile, offset)
+    records, _ = _read_log(savefile, offset)
+    return records
+
+
+def _resume_offset(savefile, offset):
+    """
+    The further of `offset` and the offset saved with the state of log `savefile`.
+    """
+    state = load_checkpoint_state(savefile[:-len('.log')] + '.state')
+    if state is not None and state.get('offset') is not None:
+        return max(offset, state['offset'])
+    return offset
+
+
+def _read_log(savefile, end=None):
+    """
+    Records of a checkpoint log before `end`, and the offset just past the last complete record.
+    """
+    records = []
+    offset = 0
+    if not os.path.exists(savefile):
+        return records, offset
+
+    with open(savefile, 'rb') as handle:
+        while end is None or offset < end:
+            try:
+                record = pickle.load(handle)
+            except EOFError:
+                break
+            except (pickle.UnpicklingError, ValueError, TypeError, AttributeError, IndexError):
+                break
+            records.append(record)
+            offset = handle.tell()
+
+    return records, offset
+
+
+class CheckpointManifest(object):
+    """
+    Index of the checkpoint of each subspace in a checkpoint directory.
+
+    Maps each subspace id to its checkpoint file, the byte offset just past
+    its last record and the number of evaluations in it, as of the last
+    update. Resuming then takes a single lookup per subspace, without
+    listing the directory.
+
+    While a search runs, whoever checkpoints a subspace records its entry
+    with `record`, in a file of its own under `manifest.d`, so that ranks
+    never write the same file. At the end, a single writer, usually rank 0,
+    merges these entries into `manifest.json` with `compact`. A lookup
+    takes the most recent of the two, so a search that crashed before
+    `compact` is indexed all the same.
+
+    Parameters
+    ----------
+    * `checkpoint_path` [str]:
+        Directory holding the checkpoints.
+    """
+    filename = 'manifest.json'
+    journal = 'manifest.d'
+
+    def __init__(self, checkpoint_path):
+        self.checkpoint_path = checkpoint_path
+        self.savefile = os.path.join(checkpoint_path, self.filename)
+        self.journalpath = os.path.join(checkpoint_path, self.journal)
+        self._entries = None
+
+    @property
+    def entries(self):
+        """
+        Entries by subspace id, read from disk on first use.
+        """
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.savefile, 'r') as infile:
+                    data = json.load(infile)
+                self._entries = {int(subspace_id): entry for subspace_id, entry in data['subspaces'].items()}
+            except (OSError, ValueError, KeyError, AttributeError):
+                pass
+
+        return self._entries
+
+    def lookup(self, subspace_id):
+        """
+        Entry of a subspace, with keys "file", "offset" and "iteration", or `None`.
+
+        The entry recorded last, whether merged into `manifest.json` or not.
+
+        Parameters
+        ----------
+        * `subspace_id` [int]
+        """
+        entry = self.entries.get(subspace_id)
+        recorded = _read_entry(self._journalfile(subspace_id))
+        if recorded is not None and (entry is None or recorded['iteration'] >= entry['iteration']):
+            return recorded
+        return entry
+
+    def subspaces(self):
+        """
+        Ids of the subspaces with an entry, merged or recorded.
+
+        Lists `manifest.d`, which is empty after `compact`.
+        """
+        subspaces = set(self.entries)
+        if os.path.isdir(self.journalpath):
+            for file in os.listdir(self.journalpath):
+                if file.endswith('.json'):
+                    subspaces.add(int(file[:-len('.json')]))
+        return subspaces
+
+    def current(self):
+        """
+        Latest entry of every subspace, merged or recorded, by subspace id.
+        """
+        return {subspace_id: self.lookup(subspace_id) for subspace_id in self.subspaces()}
+
+    def record(self, subspace_id, entry, fsync=False):
+        """
+        Record the entry of one subspace as its checkpoint is written.
+
+        Only the writer of the subspace's checkpoint should record its entry.
+
+        Parameters
+        ----------
+        * `subspace_id` [int]
+
+        * `entry` [dict]:
+            See `IncrementalCheckpointSaver.manifest_entry`.
+
+        * `fsync` [bool, default=False]:
+            Sync the entry to disk.
+        """
+        os.makedirs(self.journalpath, exist_ok=True)
+
+        def write(tmpfile):
+            with open(tmpfile, 'w') as outfile:
+                json.dump(entry, outfile)
+
+        write_atomic(self._journalfile(subspace_id), write, fsync, keep_previous=False)
+
+    def compact(self, fsync=False):
+        """
+        Merge the recorded entries into `manifest.json`, and remove them.
+
+        Parameters
+        ----------
+        * `fsync` [bool, default=False]:
+            Sync the manifest to disk.
+        """
+        recorded = self.current()
+        self.update(recorded, fsync)
+        for subspace_id in recorded:
+            journalfile = self._journalfile(subspace_id)
+            if os.path.exists(journalfile):
+                os.remove(journalfile)
+
+    def _journalfile(self, subspace_id):
+        return os.path.join(self.journalpath, '{:02d}.json'.format(subspace_id))
+
+    def update(self, entries, fsync=False):
+        """
+        Add or replace entries and write the manifest.
+
+        Parameters
+        ----------
+        * `entries` [dict]:
+            Entries by subspace id, see `IncrementalCheckpointSaver.manifest_entry`.
+
+        * `fsync` [bool, default=False]:
+            Sync the manifest to disk.
+        """
+        self.entries.update(entries)
+        data = {'subspaces': {str(subspace_id): entry for subspace_id, entry in sorted(self.entries.items())}}
+
+        def write(tmpfile):
+            with open(tmpfile, 'w') as outfile:
+                json.dump(data, outfile)
+
+        write_atomic(self.savefile, write, fsync)
+
+
+def _read_entry(path):
+    """
+    Manifest entry recorded in `path`, `None` if there is none.
+    """
+    try:
+        with open(path, 'r') as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return None
+
+
+class FsyncPolicy(object):
+    """
+    When to force checkpoint writes to disk.
+
+    Calling the policy tells whether the write about to happen should be synced.
+
+    Parameters
+    ----------
+    * `fsync` [str or float]:
+        - "always": sync every write. Survives power loss, slowest.
+        - "never": leave it to the operating system. Still survives the
+          process being killed.
+        - a number of seconds: sync a write if the last synced write is
+          at least that old.
+    """
+    def __init__(self, fsync="never"):
+        if isinstance(fsync, FsyncPolicy):
+            fsync = fsync.fsync
+
+        if fsync not in ("always", "never") and not (isinstance(fsync, numbers.Real) and fsync >= 0):
+            raise ValueError("Invalid fsync policy {}. Use \"always\", \"never\" "
+                             "or a number of seconds.".format(fsync))
+
+        self.fsync = fsync
+        self.last_sync = None
+
+    def __call__(self):
+        if self.fsync == "always":
+            return True
+        if self.fsync == "never":
+            return False
+
+        now = time.time()
+        if self.last_sync is None or now - self.last_sync >= self.fsync:
+            self.last_sync = now
+            return True
+        return False
+
+
+def write_atomic(savefile, write, fsync=False, keep_previous=True):
+    """
+    Replace `savefile` so that readers see either the old or the new file, never a partial one.
+
+    `write` fills a temporary file in the same directory, which is then renamed
+    over `savefile`. The previous `savefile` is kept as `<savefile>.prev`, hard
+    linked (or copied) beforehand so that `savefile` exists at all times.
+
+    Parameters
+    ----------
+    * `savefile` [str]
+
+    * `write` [callable]:
+        Called with the path of the temporary file.
+
+    * `fsync` [bool, default=False]:
+        Sync the file and the directory to disk before returning.
+
+    * `keep_previous` [bool, default=True]:
+        Keep the previous `savefile` as `<savefile>.prev`.
+    """
+    directory = os.path.dirname(savefile) or '.'
+    fd, tmpfile = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(savefile), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmpfile)
+        if fsync:
+            with open(tmpfile, 'rb+') as handle:
+                os.fsync(handle.fileno())
+
+        if keep_previous and os.path.exists(savefile):
+            _keep_previous(savefile)
+        os.replace(tmpfile, savefile)
+    except BaseException:
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
+        raise
+
+    if fsync:
+        dirfd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dirfd)
+        finally:
+            os.close(dirfd)
+
+
+def _keep_previous(savefile):
+    """
+    Replace `<savefile>.prev` with the current `savefile`, leaving `savefile` in place.
+    """
+    directory = os.path.dirname(savefile) or '.'
+    fd, linkfile = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(savefile), suffix='.tmp')
+    os.close(fd)
+    try:
+        os.remove(linkfile)
+        try:
+            os.link(savefile, linkfile)
+        except OSError:
+            # File systems without hard links.
+            shutil.copy2(savefile, linkfile)
+        os.replace(linkfile, savefile + '.prev')
+    except BaseException:
+        if os.path.exists(linkfile):
+            os.remove(linkfile)
+        raise
+
+
+def load_checkpoint(savefile):
+    """
+    Newest valid checkpoint written by `CheckpointSaver`.
+
+    Looks at `savefile` and the previous generation `<savefile>.prev`, and
+    skips any that is truncated or fails its checksum. Files written before
+    checkpoints carried a trailer are loaded as they are.
+
+    Parameters
+    ----------
+    * `savefile` [str]
+
+    Returns
+    -------
+    * `result` [`OptimizeResult` or None]:
+        `None` if there is no valid checkpoint.
+    """
+    candidates = []
+    for path in _generations(savefile):
+        seq, body = _read_trailer(path)
+        if body is not None:
+            candidates.append((seq, body))
+
+    if candidates:
+        # Compressed streams would read on into the trailer.
+        return load(io.BytesIO(max(candidates, key=lambda candidate: candidate[0])[1]))
+
+    try:
+        return load(savefile)
+    except Exception:
+        return None
+
+
+def load_json_checkpoint(savefile):
+    """
+    Newest valid checkpoint written by `JsonCheckpointSaver`.
+
+    Looks at `savefile` and the previous generation `<savefile>.prev`, and
+    skips any that is truncated or fails its checksum. Files written before
+    checkpoints carried a checksum are loaded as they are.
+
+    Parameters
+    ----------
+    * `savefile` [str]
+
+    Returns
+    -------
+    * `data` [dict or None]:
+        `None` if there is no valid checkpoint.
+    """
+    candidates = []
+    for path in _generations(savefile):
+        data = _read_json(path)
+        if data is not None:
+            candidates.append((data['seq'], data))
+
+    if candidates:
+        return max(candidates, key=lambda candidate: candidate[0])[1]
+
+    try:
+        with open(savefile, 'r') as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return None
+
+
+def _generations(savefile):
+    """
+    Existing checkpoint files for `savefile`, newest first.
+    """
+    return [path for path in (savefile, savefile + '.prev') if os.path.exists(path)]
+
+
+def _read_trailer(path):
+    """
+    Sequence number of a `CheckpointSaver` file, and its `skopt.dump` stream,
+    `None` unless the file is valid.
+    """
+    try:
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        length, = struct.unpack('>Q', data[-8:])
+        if length > len(data) - 8:
+            return 0, None
+        trailer = json.loads(data[-8 - length:-8].decode('utf-8'))
+        body = data[:-8 - length]
+        if hashlib.sha256(body).hexdigest() != trailer['sha256']:
+            return 0, None
+        return trailer['seq'], body
+    except (OSError, struct.error, ValueError, KeyError, TypeError):
+        return 0, None
+
+
+def _json_checksum(data):
+    fields = {key: value for key, value in data.items() if key != 'checksum'}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _read_json(path):
+    """
+    Contents of a `JsonCheckpointSaver` file, `None` unless it carries a valid checksum.
+    """
+    try:
+        with open(path, 'r') as infile:
+            data = json.load(infile)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or 'seq' not in data or data.get('checksum') != _json_checksum(data):
+        return None
+
+    return data
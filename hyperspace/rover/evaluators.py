@@ -0,0 +1,200 @@
+"""Evaluating batches of points for an optimizer"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Stop(object):
+    """Message telling group workers to return."""
+
+
+class SerialEvaluator(object):
+    """
+    Evaluate points one after another on the calling rank.
+
+    Parameters
+    ----------
+    * `objective` [function]:
+        User defined function which calls a learner
+        and returns a metric of interest.
+    """
+    def __init__(self, objective):
+        self.objective = objective
+        self.n_workers = 1
+
+    def map(self, points, *args):
+        """
+        Evaluate the objective at each point.
+
+        Parameters
+        ----------
+        * `points` [list of lists, shape=(n_points, n_dims)]
+
+        * `args`:
+            Extra positional arguments passed to the objective after each point.
+
+        Returns
+        -------
+        * `func_vals` [list, shape=(n_points,)]
+        """
+        return [self.objective(point, *args) for point in points]
+
+    def close(self):
+        pass
+
+
+class PoolEvaluator(object):
+    """
+    Evaluate points concurrently in a local process pool.
+
+    The objective is sent to the pool's processes, so it has to be
+    picklable, e.g. a function defined at the top level of a module.
+
+    Parameters
+    ----------
+    * `objective` [function]:
+        User defined function which calls a learner
+        and returns a metric of interest.
+
+    * `n_workers` [int]:
+        Number of concurrent evaluations.
+
+    * `executor` [concurrent.futures.Executor, optional]:
+        Executor to submit evaluations to. Defaults to a
+        `ProcessPoolExecutor` with `n_workers` processes.
+    """
+    def __init__(self, objective, n_workers, executor=None):
+        self.objective = objective
+        self.n_workers = n_workers
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=n_workers)
+        self.executor = executor
+
+    def map(self, points, *args):
+        """
+        Evaluate the objective at each point.
+
+        Parameters
+        ----------
+        * `points` [list of lists, shape=(n_points, n_dims)]
+
+        * `args`:
+            Extra positional arguments passed to the objective after each point.
+
+        Returns
+        -------
+        * `func_vals` [list, shape=(n_points,)]
+        """
+        args = [[arg] * len(points) for arg in args]
+        return list(self.executor.map(self.objective, points, *args))
+
+    def close(self):
+        self.executor.shutdown()
+
+
+class GroupEvaluator(object):
+    """
+    Spread evaluations over the ranks of an MPI communicator.
+
+    Rank 0 of `comm` leads: it calls `map` and `close`. Every other
+    rank of `comm` calls `serve` and evaluates the points it is sent
+    until the leader calls `close`.
+
+    Parameters
+    ----------
+    * `objective` [function]:
+        User defined function which calls a learner
+        and returns a metric of interest.
+
+    * `comm` [mpi4py.MPI.Comm]:
+        Communicator of the ranks sharing a subspace.
+
+    * `local` [SerialEvaluator or PoolEvaluator, optional]:
+        Evaluates each rank's share of the points. Defaults to one point
+        per rank at a time.
+    """
+    def __init__(self, objective, comm, local=None):
+        self.objective = objective
+        self.comm = comm
+        if local is None:
+            local = SerialEvaluator(objective)
+        self.local = local
+        self.n_workers = comm.Get_size() * local.n_workers
+
+    def map(self, points, *args):
+        """
+        Evaluate the objective at each point, `n_workers` points at a time.
+
+        Parameters
+        ----------
+        * `points` [list of lists, shape=(n_points, n_dims)]
+
+        * `args`:
+            Extra positional arguments passed to the objective after each point.
+
+        Returns
+        -------
+        * `func_vals` [list, shape=(n_points,)]
+        """
+        size = self.comm.Get_size()
+        func_vals = []
+        for start in range(0, len(points), self.n_workers):
+            chunk = points[start:start + self.n_workers]
+            tasks = [(chunk[rank::size], args) for rank in range(size)]
+            chunk_vals = self._evaluate(tasks)
+            # Undo the strided split of the chunk over ranks.
+            ordered = [None] * len(chunk)
+            for rank, vals in enumerate(chunk_vals):
+                ordered[rank::size] = vals
+            func_vals.extend(ordered)
+
+        return func_vals
+
+    def _evaluate(self, tasks):
+        task = self.comm.scatter(tasks, root=0)
+        func_vals = self.local.map(task[0], *task[1]) if task[0] else []
+        return self.comm.gather(func_vals, root=0)
+
+    def serve(self):
+        """
+        Evaluate points sent by the leader until it calls `close`.
+        """
+        while True:
+            task = self.comm.scatter(None, root=0)
+            if isinstance(task, _Stop):
+                break
+            func_vals = self.local.map(task[0], *task[1]) if task[0] else []
+            self.comm.gather(func_vals, root=0)
+
+    def close(self):
+        """
+        Release the workers waiting in `serve`.
+        """
+        if self.comm.Get_size() > 1:
+            self.comm.scatter([_Stop()] * self.comm.Get_size(), root=0)
+
+
+def create_executor(n_workers, backend="processes"):
+    """
+    Create a local pool of workers.
+
+    Parameters
+    ----------
+    * `n_workers` [int]:
+        Number of workers in the pool.
+
+    * `backend` [str, default="processes"]:
+        - "processes": a `ProcessPoolExecutor`. The work has to be picklable.
+        - "threads": a `ThreadPoolExecutor`. Suits objectives that release the
+          GIL or wait on something else.
+
+    Returns
+    -------
+    * `executor` [concurrent.futures.Executor]
+    """
+    if backend == "processes":
+        return ProcessPoolExecutor(max_workers=n_workers)
+    elif backend == "threads":
+        return ThreadPoolExecutor(max_workers=n_workers)
+    else:
+        raise ValueError("Invalid backend {}. Read the documentation for "
+                         "supported backends.".format(backend))
@@ -0,0 +1,235 @@
+"""Sharing observations between the optimizers of different ranks"""
+import numpy as np
+
+
+# MPI message tag
+EXCHANGE = 13
+
+
+class IncumbentExchange(object):
+    """
+    Periodic exchange of each rank's best observations.
+
+    Every `every` iterations, each rank sends the `n_best` best points of the
+    subspace it is optimizing to all the other ranks with `allgather`. Each
+    rank then tells its optimizer the received points that fall inside its
+    own subspace, giving its surrogate extra observations at no extra
+    objective cost. Injected points show up in the rank's results.
+
+    The exchange is collective: every rank of `comm` calls `step` at each
+    iteration and `finish` once it is done optimizing all its subspaces.
+    Ranks finishing early keep matching the exchanges of the others in
+    `finish`, so ranks may run different numbers of iterations.
+
+    Parameters
+    ----------
+    * `comm` [mpi4py.MPI.Comm]:
+        Communicator of the ranks taking part, one per subspace being optimized.
+
+    * `every` [int, default=10]:
+        Number of iterations between exchanges.
+
+    * `n_best` [int, default=1]:
+        Number of best points each rank sends.
+    """
+    def __init__(self, comm, every=10, n_best=1):
+        if every < 1:
+            raise ValueError('every must be at least 1, got {}.'.format(every))
+
+        if n_best < 1:
+            raise ValueError('n_best must be at least 1, got {}.'.format(n_best))
+
+        self.comm = comm
+        self.every = every
+        self.n_best = n_best
+        self.n_iterations = 0
+        self.n_exchanges = 0
+        self.n_injected = 0
+
+    def step(self, optimizer):
+        """
+        Count an iteration of `optimizer`, exchanging incumbents every `every` iterations.
+
+        Parameters
+        ----------
+        * `optimizer` [skopt.Optimizer]:
+            Optimizer of the subspace the rank is working on.
+
+        Returns
+        -------
+        * `n_injected` [int]:
+            Number of points told to `optimizer`.
+        """
+        self.n_iterations += 1
+        if self.n_iterations % self.every:
+            return 0
+
+        best = self._best(optimizer)
+        gathered = self.comm.allgather((False, best))
+        self.n_exchanges += 1
+        return self._inject(optimizer, gathered)
+
+    def finish(self):
+        """
+        Keep taking part in exchanges until every rank has finished.
+        """
+        while True:
+            gathered = self.comm.allgather((True, []))
+            if all(done for done, _ in gathered):
+                break
+
+    def _best(self, optimizer):
+        """
+        The `n_best` best observations of the optimizer.
+        """
+        order = np.argsort(optimizer.yi, kind="mergesort")[:self.n_best]
+        return [(optimizer.Xi[i], optimizer.yi[i]) for i in order]
+
+    def _inject(self, optimizer, gathered):
+        """
+        Tell `optimizer` the received points within its space that it has not seen.
+        """
+        seen = set(tuple(x) for x in optimizer.Xi)
+        rank = self.comm.Get_rank()
+
+        points = []
+        func_vals = []
+        for source, (_, best) in enumerate(gathered):
+            if source == rank:
+                continue
+            for x, y in best:
+                if x in optimizer.space and tuple(x) not in seen:
+                    seen.add(tuple(x))
+                    points.append(x)
+                    func_vals.append(y)
+
+        if points:
+            optimizer.tell(points, func_vals)
+            self.n_injected += len(points)
+
+        return len(points)
+
+
+class NeighbourExchange(object):
+    """
+    Periodic exchange of observations between neighbouring subspaces.
+
+    Subspaces whose ids differ in a single bit split one hyperparameter
+    differently and overlap along it. Every `every` iterations, each rank
+    sends each neighbour its new observations that fall inside the
+    neighbour's subspace, point to point, and tells its optimizer the
+    observations it receives. Each rank only talks to its neighbours on the
+    hypercube of subspaces, rather than to every other rank.
+
+    Ranks stop exchanging with a neighbour once either of them calls
+    `finish`, so neighbours may run different numbers of iterations.
+
+    Parameters
+    ----------
+    * `comm` [mpi4py.MPI.Comm]:
+        Communicator of the ranks taking part, one per subspace.
+
+    * `hyperspace` [HyperspacePartition]:
+        All subspaces of the search.
+
+    * `subspace_id` [int]:
+        Subspace optimized by this rank.
+
+    * `every` [int, default=10]:
+        Number of iterations between exchanges.
+    """
+    def __init__(self, comm, hyperspace, subspace_id, every=10):
+        if every < 1:
+            raise ValueError('every must be at least 1, got {}.'.format(every))
+
+        self.comm = comm
+        self.every = every
+        self.subspace_id = subspace_id
+        self.n_iterations = 0
+        self.n_exchanges = 0
+        self.n_injected = 0
+
+        owners = comm.allgather(subspace_id)
+        if len(set(owners)) != len(owners):
+            raise ValueError('Each rank exchanging with its neighbours needs a subspace of its own.')
+
+        ranks = {owner: rank for rank, owner in enumerate(owners)}
+        self.neighbours = {}
+        for dim in range(len(hyperspace.low_spaces)):
+            neighbour = subspace_id ^ (1 << dim)
+            if neighbour in ranks:
+                self.neighbours[ranks[neighbour]] = hyperspace[neighbour]
+
+        self.n_sent = {rank: 0 for rank in self.neighbours}
+        self.received = set()
+
+    def step(self, optimizer):
+        """
+        Count an iteration of `optimizer`, exchanging observations every `every` iterations.
+
+        Parameters
+        ----------
+        * `optimizer` [skopt.Optimizer]:
+            Optimizer of the rank's subspace.
+
+        Returns
+        -------
+        * `n_injected` [int]:
+            Number of points told to `optimizer`.
+        """
+        self.n_iterations += 1
+        if self.n_iterations % self.every:
+            return 0
+
+        return self._exchange(optimizer, done=False)
+
+    def finish(self):
+        """
+        Tell the remaining neighbours that this rank is done.
+        """
+        self._exchange(None, done=True)
+
+    def _exchange(self, optimizer, done):
+        """
+        Send new observations in the overlap to each neighbour, and receive theirs.
+        """
+        requests = []
+        for rank, space in self.neighbours.items():
+            points = []
+            if optimizer is not None:
+                start = self.n_sent[rank]
+                for x, y in zip(optimizer.Xi[start:], optimizer.yi[start:]):
+                    # Only forward our own evaluations.
+                    if tuple(x) not in self.received and x in space:
+                        points.append((x, y))
+                self.n_sent[rank] = len(optimizer.Xi)
+            requests.append(self.comm.isend((done, points), dest=rank, tag=EXCHANGE))
+
+        messages = {rank: self.comm.recv(source=rank, tag=EXCHANGE) for rank in self.neighbours}
+        for request in requests:
+            request.wait()
+
+        self.n_exchanges += 1
+        for rank, (neighbour_done, _) in messages.items():
+            if done or neighbour_done:
+                del self.neighbours[rank]
+
+        if optimizer is None:
+            return 0
+
+        seen = set(tuple(x) for x in optimizer.Xi)
+        points = []
+        func_vals = []
+        for _, received in messages.values():
+            for x, y in received:
+                if x in optimizer.space and tuple(x) not in seen:
+                    seen.add(tuple(x))
+                    self.received.add(tuple(x))
+                    points.append(x)
+                    func_vals.append(y)
+
+        if points:
+            optimizer.tell(points, func_vals)
+            self.n_injected += len(points)
+
+        return len(points)
@@ -0,0 +1,140 @@
+"""Handing out subspaces to ranks on demand"""
+from collections import deque
+
+
+# MPI message tags
+REQUEST = 11
+WORK = 12
+
+
+class WorkUnit(object):
+    """
+    A chunk of optimization iterations on one subspace.
+
+    The optimizer travels with the unit, so whichever rank runs the next
+    chunk picks up the full history of the subspace.
+
+    Parameters
+    ----------
+    * `subspace_id` [int]:
+        Index of the hyperspace.
+
+    * `n_remaining` [int]:
+        Number of objective evaluations left for the subspace.
+
+    * `optimizer` [skopt.Optimizer, optional]:
+        Optimizer state. `None` until the first chunk is run.
+    """
+    def __init__(self, subspace_id, n_remaining, optimizer=None):
+        self.subspace_id = subspace_id
+        self.n_remaining = n_remaining
+        self.optimizer = optimizer
+        self.n_chunks = 0
+
+    def __repr__(self):
+        return "WorkUnit(subspace_id={}, n_remaining={})".format(self.subspace_id, self.n_remaining)
+
+
+class SubspaceScheduler(object):
+    """
+    Coordinator handing out work units to worker ranks on demand.
+
+    Each worker starts with a queue of subspaces from `assignment`. Unfinished
+    units returned by workers go to a shared queue, and are handed out first,
+    to whichever worker asks next. A worker whose own queue is empty steals
+    the last pending unit of the worker with the longest queue. Workers with
+    nothing to do wait until every unit is finished before they are told to
+    stop, since a unit still running may come back unfinished.
+
+    Parameters
+    ----------
+    * `comm` [mpi4py.MPI.Comm]:
+        Communicator. The coordinator is rank 0, workers are ranks 1 to size - 1.
+
+    * `assignment` [SubspaceAssignment]:
+        Initial placement of subspaces on workers. Must be assigned over
+        `size - 1` workers.
+
+    * `n_iterations` [int]:
+        Number of objective evaluations per subspace.
+    """
+    def __init__(self, comm, assignment, n_iterations):
+        self.comm = comm
+        self.n_workers = comm.Get_size() - 1
+        self.queues = [deque(WorkUnit(subspace_id, n_iterations)
+                             for subspace_id in assignment.subspaces(worker))
+                       for worker in range(self.n_workers)]
+        self.returned = deque()
+        self.n_running = 0
+        self.n_steals = 0
+
+    def _next_unit(self, worker):
+        """
+        Pop the next unit for `worker`: a returned unit, else one of its own,
+        stealing if its own queue is empty.
+        """
+        if self.returned:
+            return self.returned.popleft()
+
+        if self.queues[worker]:
+            return self.queues[worker].popleft()
+
+        victim = max(range(self.n_workers), key=lambda w: len(self.queues[w]))
+        if self.queues[victim]:
+            self.n_steals += 1
+            return self.queues[victim].pop()
+
+        return None
+
+    def serve(self):
+        """
+        Hand out work until every worker has been told to stop.
+        """
+        from mpi4py import MPI
+
+        n_active = self.n_workers
+        waiting = []
+        while n_active > 0:
+            status = MPI.Status()
+            unit = self.comm.recv(source=MPI.ANY_SOURCE, tag=REQUEST, status=status)
+            waiting.append(status.Get_source())
+
+            if unit is not None:
+                self.n_running -= 1
+                if unit.n_remaining > 0:
+                    self.returned.append(unit)
+
+            while waiting:
+                next_unit = self._next_unit(waiting[0] - 1)
+                if next_unit is not None:
+                    self.n_running += 1
+                    self.comm.send(next_unit, dest=waiting.pop(0), tag=WORK)
+                elif self.n_running == 0:
+                    # Every unit is finished.
+                    for source in waiting:
+                        self.comm.send(None, dest=source, tag=WORK)
+                    n_active -= len(waiting)
+                    waiting = []
+                else:
+                    break
+
+
+def request_work(comm, unit=None):
+    """
+    Return a unit to the coordinator and ask for the next one.
+
+    Parameters
+    ----------
+    * `comm` [mpi4py.MPI.Comm]:
+        Communicator whose rank 0 runs `SubspaceScheduler.serve`.
+
+    * `unit` [WorkUnit, optional]:
+        The unit just worked on, if any.
+
+    Returns
+    -------
+    * `unit` [WorkUnit or None]:
+        Next unit of work, or `None` when there is nothing left to do.
+    """
+    comm.send(unit, dest=0, tag=REQUEST)
+    return comm.recv(source=0, tag=WORK)
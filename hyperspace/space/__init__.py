@@ -3,6 +3,7 @@ from .skopt.space import HyperReal
 from .skopt.space import HyperCategorical
 from .skopt.mapping_space import create_hyperspace
 from .skopt.mapping_space import create_hyperbounds
+from .skopt.mapping_space import HyperspacePartition
 
 from .robo.space import RoboInteger
 from .robo.space import RoboReal
@@ -18,6 +19,7 @@ __all__ = (
     "HyperCategorical",
     "HyperInteger",
     "HyperReal",
+    "HyperspacePartition",
     "RoboInteger",
     "RoboReal"
 )
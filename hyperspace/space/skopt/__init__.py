@@ -3,6 +3,7 @@ from .space import HyperReal
 from .space import HyperCategorical
 from .mapping_space import create_hyperspace
 from .mapping_space import create_hyperbounds
+from .mapping_space import HyperspacePartition
 
 
 __all__ = (
@@ -10,5 +11,6 @@ __all__ = (
     "create_hyperspace",
     "HyperCategorical",
     "HyperInteger",
+    "HyperspacePartition",
     "HyperReal"
 )
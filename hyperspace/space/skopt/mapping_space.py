@@ -171,6 +171,39 @@ def check_hyperbounds(dimension, transform=None):
                      "supported types.".format(dimension))
 
 
+def _fold_space(low_spaces, high_spaces, subspace_id):
+    """
+    Decodes a single hyperspace from its subspace id.
+
+    Bit `index` of `subspace_id` selects the lower space of hyperparameter
+    `index` when set, and the upper space otherwise.
+
+    Parameters
+    ----------
+    * `low_spaces` [list, shape=(n_spaces,)]:
+        lower spaces defined by hyperspace classes.
+
+    * `high_spaces` [list, shape=(n_spaces,)]:
+        upper spaces defined by hyperspace classes.
+
+    * `subspace_id` [int]:
+        Index of the hyperspace, in [0, 2**n_spaces).
+
+    Returns
+    -------
+    * `space` [list, shape=(n_spaces,)]:
+        Search space for the given subspace id.
+    """
+    space = []
+    for index in range(len(low_spaces)):
+        if subspace_id & (1 << index):
+            space.append(low_spaces[index])
+        else:
+            space.append(high_spaces[index])
+
+    return space
+
+
 def fold_spaces(low_spaces, high_spaces):
     """
     Creates all possible combinations of hyperspaces.
@@ -193,25 +226,117 @@ def fold_spaces(low_spaces, high_spaces):
         raise ValueError(("low_spaces and high_spaces must have the same length. "
                          "Got {} and {} respectively.".format(len(low_spaces), len(high_spaces))))
 
-    indices = len(low_spaces)
-    num_hyperspaces = 2**indices
-    hyperspace = [[] for i in range(num_hyperspaces)]
-
+    num_hyperspaces = 2**len(low_spaces)
+    hyperspace = []
     for space in range(num_hyperspaces):
-        for index in range(indices):
-            bit_tester = 1 << index
-            if space & bit_tester:
-                hyperspace[space].insert(index, low_spaces[index])
-            else:
-                hyperspace[space].insert(index, high_spaces[index])
+        hyperspace.append(_fold_space(low_spaces, high_spaces, space))
 
     return hyperspace
 
 
+class HyperspacePartition(object):
+    """
+    Lazy, index-addressable collection of hyperspaces.
+
+    Holds the lower and upper halves of each hyperparameter and builds the
+    Scikit-Optimize Space for a subspace only when it is indexed, so that a
+    rank can build its own subspace in O(n_hyperparameters) rather than
+    materializing all 2**n_hyperparameters of them.
+
+    Subspaces are ordered exactly as in `create_hyperspace`.
+
+    Parameters
+    ----------
+    * `hyperparameters` [list, shape=(n_hyperparameters,)]
+
+    Example usage:
+        hyperspace = HyperspacePartition([(2, 10), (10.0**-2, 10.0**0)])
+        space = hyperspace[rank]
+    """
+    def __init__(self, hyperparameters):
+        self.hyperparameters = hyperparameters
+        self.low_spaces = []
+        self.high_spaces = []
+        for hparam in hyperparameters:
+            low, high = check_dimension(hparam)
+            self.low_spaces.append(low)
+            self.high_spaces.append(high)
+
+        self._low_bounds = None
+        self._high_bounds = None
+
+    def __len__(self):
+        return 2**len(self.low_spaces)
+
+    def __getitem__(self, subspace_id):
+        """
+        Create the Space for a single subspace.
+
+        Parameters
+        ----------
+        * `subspace_id` [int]:
+            Index of the hyperspace. Negative indices count from the end.
+        """
+        subspace_id = self._check_index(subspace_id)
+        return Space(_fold_space(self.low_spaces, self.high_spaces, subspace_id))
+
+    def __iter__(self):
+        for subspace_id in range(len(self)):
+            yield self[subspace_id]
+
+    def __repr__(self):
+        return "HyperspacePartition(n_hyperparameters={}, n_subspaces={})" \
+               "".format(len(self.low_spaces), len(self))
+
+    def _check_index(self, subspace_id):
+        """
+        Validate a subspace id, wrapping negative indices.
+        """
+        if not isinstance(subspace_id, numbers.Integral):
+            raise TypeError("Subspace ids must be integers, got {}.".format(type(subspace_id)))
+
+        num_hyperspaces = len(self)
+        if subspace_id < 0:
+            subspace_id += num_hyperspaces
+
+        if not 0 <= subspace_id < num_hyperspaces:
+            raise IndexError("Subspace id out of range for {} hyperspaces.".format(num_hyperspaces))
+
+        return int(subspace_id)
+
+    def bounds(self, subspace_id):
+        """
+        Get the bounds of a single subspace for sampling.
+
+        Parameters
+        ----------
+        * `subspace_id` [int]:
+            Index of the hyperspace.
+
+        Returns
+        -------
+        * `bounds` [list of tuples, shape=(n_hyperparameters,)]
+            - Matches the bounds in `create_hyperbounds`.
+        """
+        subspace_id = self._check_index(subspace_id)
+        if self._low_bounds is None:
+            self._low_bounds = []
+            self._high_bounds = []
+            for hparam in self.hyperparameters:
+                low, high = check_hyperbounds(hparam)
+                self._low_bounds.append(low)
+                self._high_bounds.append(high)
+
+        return _fold_space(self._low_bounds, self._high_bounds, subspace_id)
+
+
 def create_hyperspace(hyperparameters):
     """
     Converts hyperparameter lists to Scikit-Optimize Space instances.
 
+    Builds every subspace up front. Use `HyperspacePartition` to
+    build only the subspaces you need.
+
     Parameters
     ----------
     * `hyperparameters` [list, shape=(n_hyperparameters,)]
@@ -222,20 +347,7 @@ def create_hyperspace(hyperparameters):
         - All combinations of hyperspaces. Each list within hyperspace
           is a search space to be distributed across 2**n_spaces nodes.
     """
-    hparams_low = []
-    hparams_high = []
-    for hparam in hyperparameters:
-        low, high = check_dimension(hparam)
-        hparams_low.append(low)
-        hparams_high.append(high)
-
-    all_spaces = fold_spaces(hparams_low, hparams_high)
-
-    hyperspace = []
-    for space in all_spaces:
-        hyperspace.append(Space(space))
-
-    return hyperspace
+    return list(HyperspacePartition(hyperparameters))
 
 
 def create_hyperbounds(hyperparameters):
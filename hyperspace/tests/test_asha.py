@@ -0,0 +1,89 @@
+import os
+import tempfile
+
+import pytest
+import numpy as np
+from sklearn.utils.testing import assert_equal
+
+from skopt import load
+
+from hyperspace.space import HyperspacePartition
+from hyperspace.rover.asha import AsyncSuccessiveHalving
+from hyperspace.hyperdrive.hyperbelt import asha
+
+
+def objective(params, budget):
+    x, y = params
+    return (x - 0.3)**2 + (y - 0.6)**2 + 1.0 / budget
+
+
+@pytest.mark.fast_test
+def test_asha_promotion():
+    """
+    Tests that a configuration is promoted as soon as it is in the top 1/eta of its rung.
+    """
+    hyperspace = HyperspacePartition([(0.0, 1.0), (0.0, 1.0)])
+    scheduler = AsyncSuccessiveHalving(hyperspace, max_iter=9, eta=3, n_configs=10)
+    assert_equal(scheduler.budgets, [1, 3, 9])
+
+    jobs = [scheduler.next_job() for _ in range(3)]
+    assert_equal([job.rung for job in jobs], [0, 0, 0])
+    assert_equal([job.subspace_id for job in jobs], [0, 1, 2])
+    for job, loss in zip(jobs, [0.5, 0.1, 0.9]):
+        scheduler.report(job, loss)
+
+    promoted = scheduler.next_job()
+    assert_equal((promoted.trial_id, promoted.rung, promoted.budget), (1, 1, 3))
+
+    # Nothing else is in the top third yet, so a new configuration starts.
+    job = scheduler.next_job()
+    assert_equal((job.trial_id, job.rung), (3, 0))
+    assert_equal(scheduler.n_pending, 2)
+    assert not scheduler.finished
+
+
+@pytest.mark.fast_test
+def test_asha_runs_out():
+    """
+    Tests that every configuration starts, and promotions go on until none is left.
+    """
+    hyperspace = HyperspacePartition([(0.0, 1.0), (0.0, 1.0)])
+    scheduler = AsyncSuccessiveHalving(hyperspace, max_iter=9, eta=3, n_configs=9)
+
+    job = scheduler.next_job()
+    while job is not None:
+        scheduler.report(job, (objective(job.x, job.budget), 0.1))
+        job = scheduler.next_job()
+
+    assert scheduler.finished
+    assert_equal([len(rung) for rung in scheduler.rungs], [9, 3, 1])
+
+    results = scheduler.results()
+    assert_equal(sorted(results), [0, 1, 2, 3])
+    rungs = np.concatenate([result.rungs for result in results.values()])
+    budgets = np.concatenate([result.budgets for result in results.values()])
+    assert_equal(sorted(rungs.tolist()), [0] * 9 + [1] * 3 + [2])
+    assert_equal(set(budgets[rungs == 2]), {9})
+
+
+@pytest.mark.fast_test
+def test_asha_local():
+    """
+    Tests that a local pool of workers evaluates every job and saves each subspace.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        asha(objective, [(0.0, 1.0), (0.0, 1.0)], path, max_iter=9, eta=3,
+             n_configs=12, verbose=False, n_workers=3, backend="threads")
+
+        files = sorted(os.listdir(path))
+        assert_equal(files, ['hyperspace00', 'hyperspace01', 'hyperspace02', 'hyperspace03'])
+        results = [load(os.path.join(path, file)) for file in files]
+        assert_equal(sum(len(result.func_vals) for result in results), 12 + 4 + 1)
+        for result in results:
+            assert_equal(len(result.x_iters), len(result.rungs))
+
+
+if __name__=='__main__':
+    test_asha_promotion()
+    test_asha_runs_out()
+    test_asha_local()
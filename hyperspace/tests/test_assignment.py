@@ -0,0 +1,96 @@
+import pytest
+from sklearn.utils.testing import assert_equal
+
+from hyperspace.rover.assignment import BlockAssignment
+from hyperspace.rover.assignment import RoundRobinAssignment
+from hyperspace.rover.assignment import CostWeightedAssignment
+from hyperspace.rover.assignment import check_assignment
+
+
+def _check_covers(assignment, n_subspaces, size):
+    """
+    Every subspace has at least one rank, and every rank has at least one subspace.
+    """
+    assignment.assign(n_subspaces, size)
+    queued = sorted(s for rank in range(size) for s in assignment.subspaces(rank))
+    assert_equal(sorted(set(queued)), list(range(n_subspaces)))
+    for rank in range(size):
+        assert len(assignment.subspaces(rank)) > 0
+    for subspace_id in range(n_subspaces):
+        assert len(assignment.ranks(subspace_id)) > 0
+
+
+@pytest.mark.fast_test
+def test_block_assignment():
+    """
+    Tests contiguous blocks of subspaces and of ranks.
+    """
+    assignment = BlockAssignment().assign(8, 8)
+    assert_equal([assignment.subspaces(rank) for rank in range(8)], [[i] for i in range(8)])
+
+    assignment = BlockAssignment().assign(8, 3)
+    assert_equal([assignment.subspaces(rank) for rank in range(3)], [[0, 1], [2, 3, 4], [5, 6, 7]])
+
+    assignment = BlockAssignment().assign(4, 8)
+    assert_equal([assignment.ranks(s) for s in range(4)], [[0, 1], [2, 3], [4, 5], [6, 7]])
+
+    for size in range(1, 20):
+        _check_covers(BlockAssignment(), 8, size)
+
+
+@pytest.mark.fast_test
+def test_roundrobin_assignment():
+    """
+    Tests that subspaces are dealt out to ranks in turn.
+    """
+    assignment = RoundRobinAssignment().assign(8, 3)
+    assert_equal([assignment.subspaces(rank) for rank in range(3)], [[0, 3, 6], [1, 4, 7], [2, 5]])
+
+    assignment = RoundRobinAssignment().assign(4, 6)
+    assert_equal([assignment.ranks(s) for s in range(4)], [[0, 4], [1, 5], [2], [3]])
+
+    for size in range(1, 20):
+        _check_covers(RoundRobinAssignment(), 8, size)
+
+
+@pytest.mark.fast_test
+def test_cost_weighted_assignment():
+    """
+    Tests that expensive subspaces get their own rank, or extra ranks.
+    """
+    costs = [8, 1, 1, 1, 1, 1, 1, 1]
+    assignment = CostWeightedAssignment(costs).assign(8, 2)
+    assert_equal(assignment.subspaces(0), [0])
+    assert_equal(sorted(assignment.subspaces(1)), list(range(1, 8)))
+
+    assignment = CostWeightedAssignment([4, 1]).assign(2, 5)
+    assert_equal(assignment.ranks(0), [0, 1, 2, 3])
+    assert_equal(assignment.ranks(1), [4])
+
+    for size in range(1, 20):
+        _check_covers(CostWeightedAssignment(costs), 8, size)
+
+    with pytest.raises(ValueError):
+        CostWeightedAssignment([1, 2]).assign(8, 2)
+
+
+@pytest.mark.fast_test
+def test_check_assignment():
+    """
+    Tests converting assignment descriptions.
+    """
+    assert isinstance(check_assignment("block"), BlockAssignment)
+    assert isinstance(check_assignment("roundrobin"), RoundRobinAssignment)
+
+    assignment = CostWeightedAssignment([1, 2])
+    assert check_assignment(assignment) is assignment
+
+    with pytest.raises(ValueError):
+        check_assignment("random")
+
+
+if __name__=='__main__':
+    test_block_assignment()
+    test_roundrobin_assignment()
+    test_cost_weighted_assignment()
+    test_check_assignment()
@@ -0,0 +1,95 @@
+import os
+import asyncio
+import tempfile
+
+import pytest
+from sklearn.utils.testing import assert_equal
+
+from skopt import load
+from skopt.space import Space
+
+from hyperspace import async_hyperdrive
+from hyperspace.hyperdrive.skopt.models import create_optimizer
+from hyperspace.hyperdrive.skopt.models import ask_pending
+from hyperspace.hyperdrive.skopt.async_hyperdrive import _submit
+
+
+class _InFlight(object):
+    """
+    Counts evaluations in flight.
+    """
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+
+async def _objective(params, in_flight):
+    in_flight.current += 1
+    in_flight.peak = max(in_flight.peak, in_flight.current)
+    await asyncio.sleep(0.01)
+    in_flight.current -= 1
+    return sum((x - 1.0)**2 for x in params)
+
+
+@pytest.mark.fast_test
+def test_async_hyperdrive():
+    """
+    Tests that every subspace spends its budget within the concurrency limit.
+    """
+    in_flight = _InFlight()
+
+    async def objective(params):
+        return await _objective(params, in_flight)
+
+    with tempfile.TemporaryDirectory() as results_path:
+        async_hyperdrive(objective, [(-2.0, 2.0), (-2.0, 2.0)], results_path, model="RAND",
+                         n_iterations=6, max_concurrency=3, backend="local")
+
+        assert_equal(sorted(os.listdir(results_path)), ['hyperspace{:02d}'.format(i) for i in range(4)])
+        for filename in os.listdir(results_path):
+            result = load(os.path.join(results_path, filename))
+            assert_equal(len(result.func_vals), 6)
+
+    assert in_flight.peak <= 3
+    assert in_flight.peak > 1
+
+
+@pytest.mark.fast_test
+def test_ask_pending():
+    """
+    Tests that points in flight are not proposed again.
+    """
+    space = Space([(-2.0, 2.0), (-2.0, 2.0)])
+    for strategy in ["cl_min", "cl_mean", "cl_max", "kb"]:
+        optimizer = create_optimizer(space, "GP", n_initial_points=3, random_state=0)
+        optimizer.tell([[0.0, 0.0], [1.0, 1.0], [-1.0, 1.0]], [2.0, 0.0, 4.0])
+
+        pending = [optimizer.ask()]
+        pending.append(ask_pending(optimizer, pending, strategy))
+        assert pending[0] != pending[1]
+        assert_equal(len(optimizer.Xi), 3)
+
+    with pytest.raises(ValueError):
+        ask_pending(optimizer, pending, "qei")
+
+
+@pytest.mark.fast_test
+def test_cancelled_evaluation_frees_slot():
+    """
+    Tests that an evaluation cancelled before it starts still frees its slot.
+    """
+    async def run():
+        semaphore = asyncio.Semaphore(1)
+        await semaphore.acquire()
+        task = _submit(lambda params: sum(params), [1.0, 2.0], semaphore)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return semaphore.locked()
+
+    assert not asyncio.run(run())
+
+
+if __name__=='__main__':
+    test_async_hyperdrive()
+    test_ask_pending()
+    test_cancelled_evaluation_frees_slot()
@@ -0,0 +1,56 @@
+import tempfile
+
+import numpy as np
+import pytest
+from sklearn.utils.testing import assert_equal
+
+from hyperspace.rover.cache import config_key
+from hyperspace.rover.cache import EvaluationCache
+from hyperspace.rover.cache import CachedObjective
+
+
+class _Counter(object):
+    """
+    Objective counting its evaluations.
+    """
+    def __init__(self):
+        self.n_calls = 0
+
+    def __call__(self, params, budget=1):
+        self.n_calls += 1
+        return budget * sum(params)
+
+
+@pytest.mark.fast_test
+def test_config_key():
+    """
+    Tests that numpy and python values encode the same.
+    """
+    assert_equal(config_key([1, 0.5, "relu"]), config_key([np.int64(1), np.float64(0.5), "relu"]))
+    assert config_key([1, 0.5]) != config_key([1, 0.5000001])
+    assert config_key([1, 2]) != config_key([1], 2)
+
+
+@pytest.mark.fast_test
+def test_cached_objective():
+    """
+    Tests that a configuration evaluated on one rank is looked up on another.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        counter = _Counter()
+        first = CachedObjective(counter, EvaluationCache(path))
+        second = CachedObjective(counter, EvaluationCache(path))
+
+        assert_equal(first([1, 2]), 3)
+        assert_equal(first([1, 2]), 3)
+        assert_equal(second([np.int64(1), np.int64(2)]), 3)
+        assert_equal(second([1, 2], 2), 6)
+
+        assert_equal(counter.n_calls, 2)
+        assert_equal((first.n_hits, first.n_misses), (1, 1))
+        assert_equal((second.n_hits, second.n_misses), (1, 1))
+
+
+if __name__=='__main__':
+    test_config_key()
+    test_cached_objective()
@@ -0,0 +1,518 @@
+import os
+import json
+import pickle
+import time
+import tempfile
+
+import pytest
+import numpy as np
+from sklearn.utils.testing import assert_equal
+
+from skopt import dump
+from skopt import load
+from skopt.space import Space
+
+from hyperspace.kepler import _load_checkpoint
+from hyperspace.kepler import load_checkpoints
+from hyperspace.kepler import load_json_results
+from hyperspace.rover import checkpoints
+from hyperspace.rover.checkpoints import IncrementalCheckpointSaver
+from hyperspace.rover.checkpoints import JsonCheckpointSaver
+from hyperspace.rover.checkpoints import JsonLinesCheckpointSaver
+from hyperspace.rover.checkpoints import load_json_lines
+from hyperspace.rover.checkpoints import BackgroundWriter
+from hyperspace.rover.checkpoints import CheckpointSaver
+from hyperspace.rover.checkpoints import FsyncPolicy
+from hyperspace.rover.checkpoints import CheckpointManifest
+from hyperspace.rover.checkpoints import load_checkpoint
+from hyperspace.rover.checkpoints import load_json_checkpoint
+from hyperspace.rover.checkpoints import load_checkpoint_log
+from hyperspace.rover.evaluators import SerialEvaluator
+from hyperspace.hyperdrive.skopt.models import batch_minimize
+from hyperspace.hyperdrive.skopt.models import create_optimizer
+from hyperspace.hyperdrive.skopt.hyperdrive import _initial_points
+from hyperspace.space import HyperspacePartition
+
+
+class _BcastComm(object):
+    """Stands in for an MPI communicator, broadcasting `value` to ranks other than 0."""
+    def __init__(self, rank, value=None):
+        self.rank = rank
+        self.value = value
+
+    def Get_rank(self):
+        return self.rank
+
+    def bcast(self, obj, root=0):
+        return obj if self.rank == root else self.value
+
+
+def _run(saver, optimizer, n_iterations):
+    """
+    Ask-and-tell loop checkpointing every iteration.
+    """
+    for _ in range(n_iterations):
+        x = optimizer.ask()
+        result = optimizer.tell(x, sum(x))
+        saver(result)
+    return result
+
+
+@pytest.mark.fast_test
+def test_incremental_checkpoint():
+    """
+    Tests that each evaluation is logged once, and that the log rebuilds the result.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = IncrementalCheckpointSaver(path, 'hyperspace03')
+        optimizer = create_optimizer(space, "RAND", random_state=0)
+        result = _run(saver, optimizer, 5)
+
+        records = load_checkpoint_log(os.path.join(path, 'hyperspace03.log'))
+        assert_equal([record['iteration'] for record in records], list(range(5)))
+        assert_equal([record['x'] for record in records], result.x_iters)
+
+        checkpoint = _load_checkpoint(path, 3)
+        assert_equal(checkpoint.x_iters, result.x_iters)
+        assert_equal(list(checkpoint.func_vals), list(result.func_vals))
+        assert_equal(checkpoint.fun, result.fun)
+        assert checkpoint.models is None
+
+        saver.snapshot(result)
+        assert_equal(_load_checkpoint(path, 3).models, result.models)
+
+
+@pytest.mark.fast_test
+def test_incremental_checkpoint_resume():
+    """
+    Tests that a resumed run appends after the evaluations it was told,
+    and that a record cut short by a crash is dropped.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = IncrementalCheckpointSaver(path, 'hyperspace00')
+        _run(saver, create_optimizer(space, "RAND", random_state=0), 3)
+
+        with open(saver.savefile, 'ab') as handle:
+            handle.write(b'\x80\x04\x95')
+
+        checkpoint = _load_checkpoint(path, 0)
+        assert_equal(len(checkpoint.func_vals), 3)
+
+        saver = IncrementalCheckpointSaver(path, 'hyperspace00')
+        optimizer = create_optimizer(space, "RAND", random_state=1)
+        optimizer.tell(checkpoint.x_iters, list(checkpoint.func_vals))
+        _run(saver, optimizer, 2)
+
+        records = load_checkpoint_log(saver.savefile)
+        assert_equal([record['iteration'] for record in records], list(range(5)))
+        assert_equal([record['x'] for record in records], optimizer.Xi)
+
+
+@pytest.mark.fast_test
+def test_incremental_checkpoint_state():
+    """
+    Tests that a resumed subspace gets back its random state, latest kernel
+    and a non negative number of random starts.
+    """
+    hyperspace = HyperspacePartition([(0.0, 1.0), (0.0, 1.0)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = IncrementalCheckpointSaver(path, 'hyperspace01')
+        optimizer = create_optimizer(hyperspace[1], "GP", n_initial_points=3, random_state=0)
+        result = _run(saver, optimizer, 12)
+
+        init_points, init_response, n_rand, resume = _initial_points(hyperspace, 1, None, None,
+                                                                     _load_checkpoint(path, 1))
+        assert_equal(len(init_response), 12)
+        assert_equal(n_rand, 0)
+        assert_equal(resume['kernel'], result.models[-1].kernel_)
+        np.testing.assert_array_equal(resume['rng_state'][1], optimizer.rng.get_state()[1])
+
+        resumed = create_optimizer(hyperspace[1], "GP", n_rand + len(init_points), 1, resume['kernel'])
+        resumed.tell(init_points, list(init_response))
+        resumed.rng.set_state(resume['rng_state'])
+        assert_equal(resumed.rng.randint(1000), optimizer.rng.randint(1000))
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("model", ["RF", "GP"])
+def test_resume_proposes_same_points(model):
+    """
+    Tests that a run interrupted and resumed from its checkpoint proposes
+    the same points as a run that was never interrupted.
+    """
+    hyperspace = HyperspacePartition([(0.0, 1.0), (0.0, 1.0)])
+    evaluator = SerialEvaluator(lambda x: (x[0] - 0.3)**2 + (x[1] - 0.6)**2)
+    continuous = batch_minimize(evaluator, hyperspace[1], model=model, n_calls=14, random_state=0)
+    with tempfile.TemporaryDirectory() as path:
+        batch_minimize(evaluator, hyperspace[1], model=model, n_calls=12, random_state=0,
+                       callback=[IncrementalCheckpointSaver(path, 'hyperspace01')])
+
+        init_points, init_response, n_rand, resume = _initial_points(hyperspace, 1, None, None,
+                                                                     _load_checkpoint(path, 1))
+        resumed = batch_minimize(evaluator, hyperspace[1], model=model, n_calls=2,
+                                 x_init=init_points, y_init=init_response, n_random_starts=n_rand,
+                                 random_state=0, **resume)
+
+    # A resumed Gaussian process starts fitting from the saved kernel, so
+    # its proposals only match up to the precision of the fit.
+    np.testing.assert_allclose(resumed.x_iters, continuous.x_iters, atol=1e-4)
+
+
+@pytest.mark.fast_test
+def test_background_writer():
+    """
+    Tests that writes pending while the thread is busy are coalesced.
+    """
+    written = []
+
+    def write(payload):
+        time.sleep(0.05)
+        written.append(payload)
+
+    writer = BackgroundWriter(write)
+    for i in range(5):
+        writer.submit(i)
+    writer.flush()
+    assert_equal(written[-1], 4)
+    assert len(written) < 5
+
+    written[:] = []
+    writer = BackgroundWriter(write, coalesce=lambda pending, new: pending + new)
+    for i in range(5):
+        writer.submit([i])
+    writer.close()
+    assert_equal(sum(written, []), list(range(5)))
+
+
+@pytest.mark.fast_test
+def test_asynchronous_checkpoints():
+    """
+    Tests that asynchronous savers write the same checkpoints once flushed.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = IncrementalCheckpointSaver(path, 'hyperspace01', asynchronous=True)
+        json_saver = JsonCheckpointSaver(path, 'hyperspace01.json', asynchronous=True)
+        optimizer = create_optimizer(space, "RAND", random_state=0)
+        for _ in range(8):
+            x = optimizer.ask()
+            result = optimizer.tell(x, sum(x))
+            saver(result)
+            json_saver(result)
+        saver.flush()
+        json_saver.flush()
+
+        records = load_checkpoint_log(saver.savefile)
+        assert_equal([record['x'] for record in records], result.x_iters)
+        with open(json_saver.savefile) as infile:
+            assert_equal(len(json.load(infile)['x_iters']), 8)
+
+
+@pytest.mark.fast_test
+def test_atomic_checkpoints():
+    """
+    Tests that a corrupted checkpoint falls back to the previous generation.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = CheckpointSaver(path, 'hyperspace02', fsync="always")
+        json_saver = JsonCheckpointSaver(path, 'hyperspace02.json', fsync=0.5)
+        optimizer = create_optimizer(space, "RAND", random_state=0)
+        for _ in range(3):
+            x = optimizer.ask()
+            result = optimizer.tell(x, sum(x))
+            saver(result)
+            json_saver(result)
+
+        assert_equal(sorted(os.listdir(path)), ['hyperspace02', 'hyperspace02.json', 'hyperspace02.json.prev',
+                                                'hyperspace02.prev'])
+        assert_equal(len(load_checkpoint(saver.savefile).func_vals), 3)
+        assert_equal(load_json_checkpoint(json_saver.savefile)['seq'], 3)
+
+        # A write cut short leaves a truncated newest generation.
+        for savefile in [saver.savefile, json_saver.savefile]:
+            with open(savefile, 'rb+') as handle:
+                handle.truncate(os.path.getsize(savefile) // 2)
+
+        assert_equal(len(load_checkpoint(saver.savefile).func_vals), 2)
+        assert_equal(len(load_json_checkpoint(json_saver.savefile)['x_iters']), 2)
+
+        # Sequence numbers carry on from the checkpoints on disk.
+        assert_equal(CheckpointSaver(path, 'hyperspace02').seq, 2)
+        assert_equal(JsonCheckpointSaver(path, 'hyperspace02.json').seq, 2)
+
+
+@pytest.mark.fast_test
+def test_compressed_checkpoints():
+    """
+    Tests that compressed checkpoints load, falling back to the previous generation.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = CheckpointSaver(path, 'hyperspace02', compress=3)
+        result = _run(saver, create_optimizer(space, "RAND", random_state=0), 3)
+
+        checkpoint = load_checkpoint(saver.savefile)
+        assert_equal(checkpoint.x_iters, result.x_iters)
+        np.testing.assert_array_equal(checkpoint.func_vals, result.func_vals)
+
+        with open(saver.savefile, 'rb+') as handle:
+            handle.truncate(os.path.getsize(saver.savefile) // 2)
+        assert_equal(len(load_checkpoint(saver.savefile).func_vals), 2)
+
+
+@pytest.mark.fast_test
+def test_fsync_policy():
+    """
+    Tests syncing at most once per interval.
+    """
+    assert FsyncPolicy("always")()
+    assert not FsyncPolicy("never")()
+
+    policy = FsyncPolicy(60)
+    assert policy()
+    assert not policy()
+
+    with pytest.raises(ValueError):
+        FsyncPolicy("sometimes")
+
+
+@pytest.mark.fast_test
+def test_atomic_replace_keeps_savefile():
+    """
+    Tests that the checkpoint exists at every rename, and that logs follow the fsync policy.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = CheckpointSaver(path, 'hyperspace02')
+        incremental = IncrementalCheckpointSaver(path, 'hyperspace03', fsync="always")
+        optimizer = create_optimizer(space, "RAND", random_state=0)
+
+        replace, fsync = checkpoints.os.replace, checkpoints.os.fsync
+        exists = []
+        synced = []
+
+        def checked_replace(src, dst):
+            exists.append(os.path.exists(saver.savefile))
+            replace(src, dst)
+
+        def counted_fsync(fd):
+            synced.append(fd)
+            fsync(fd)
+
+        checkpoints.os.replace = checked_replace
+        checkpoints.os.fsync = counted_fsync
+        try:
+            _run(saver, optimizer, 1)
+            exists = []
+            result = _run(saver, optimizer, 2)
+            incremental(result)
+        finally:
+            checkpoints.os.replace, checkpoints.os.fsync = replace, fsync
+
+        assert all(exists)
+        assert_equal(len(load_checkpoint(saver.savefile + '.prev').func_vals), 2)
+        # The log, the state file and its directory.
+        assert_equal(len(synced), 3)
+
+
+@pytest.mark.fast_test
+def test_checkpoint_manifest():
+    """
+    Tests that checkpoints are found through the manifest, or by their exact name.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = IncrementalCheckpointSaver(path, 'subspace7_run2')
+        _run(saver, create_optimizer(space, "RAND", random_state=0), 4)
+        assert_equal(saver.manifest_entry(), {'file': 'subspace7_run2.log',
+                                              'offset': os.path.getsize(saver.savefile),
+                                              'iteration': 4})
+
+        # Other digits in file names used to be mistaken for the subspace id.
+        _run(IncrementalCheckpointSaver(path, 'hyperspace12'), create_optimizer(space, "RAND"), 2)
+        assert _load_checkpoint(path, 1) is None
+        assert _load_checkpoint(path, 7) is None
+        assert_equal(len(_load_checkpoint(path, 12).func_vals), 2)
+
+        CheckpointManifest(path).update({7: saver.manifest_entry()})
+        assert_equal(CheckpointManifest(path).lookup(7)['iteration'], 4)
+        assert CheckpointManifest(path).lookup(12) is None
+        assert_equal(len(_load_checkpoint(path, 7).func_vals), 4)
+
+
+@pytest.mark.fast_test
+def test_manifest_recorded_while_running():
+    """
+    Tests that the manifest indexes checkpoints as they are written, and that
+    loading stops at the recorded offset.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = IncrementalCheckpointSaver(path, 'hyperspace03', subspace_id=3)
+        _run(saver, create_optimizer(space, "RAND", random_state=0), 3)
+
+        # Only the first write is recorded until the saver is flushed, but
+        # the evaluations saved with the state are still resumed.
+        manifest = CheckpointManifest(path)
+        assert_equal(manifest.lookup(3)['iteration'], 1)
+        assert_equal(len(_load_checkpoint(path, 3).func_vals), 3)
+        assert_equal(len(os.listdir(manifest.journalpath)), 1)
+
+        # A run stopped here has not merged the manifest.
+        saver.flush()
+        assert not os.path.exists(manifest.savefile)
+        assert_equal(manifest.lookup(3), saver.manifest_entry())
+        assert_equal(manifest.subspaces(), {3})
+        with pytest.raises(ValueError):
+            load_checkpoints(path, 2)
+
+        # A record appended after the entry was recorded is not resumed from.
+        with open(saver.savefile, 'ab') as handle:
+            pickle.dump({'iteration': 3, 'x': [0.5, 1], 'y': 1.5}, handle)
+        assert_equal(len(load_checkpoint_log(saver.savefile)), 4)
+        assert_equal(len(_load_checkpoint(path, 3).func_vals), 3)
+        assert_equal(IncrementalCheckpointSaver(path, 'hyperspace03', subspace_id=3).n_saved, 3)
+        assert_equal(os.path.getsize(saver.savefile), saver.offset)
+
+        manifest.compact()
+        assert_equal(os.listdir(manifest.journalpath), [])
+        assert_equal(CheckpointManifest(path).lookup(3)['iteration'], 3)
+        assert_equal(len(_load_checkpoint(path, 3).func_vals), 3)
+
+
+@pytest.mark.fast_test
+def test_load_checkpoints():
+    """
+    Tests that checkpoints written by any number of ranks reshard onto fewer or more ranks.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        for subspace_id in range(4):
+            saver = IncrementalCheckpointSaver(path, 'hyperspace{:02d}'.format(subspace_id))
+            _run(saver, create_optimizer(space, "RAND", random_state=subspace_id), subspace_id + 1)
+
+        checkpoints = load_checkpoints(path, 4)
+        assert_equal(sorted(checkpoints), [0, 1, 2, 3])
+
+        checkpoints = [load_checkpoints(path, 4, rank, 2) for rank in range(2)]
+        assert_equal([sorted(rank_checkpoints) for rank_checkpoints in checkpoints], [[0, 1], [2, 3]])
+        assert_equal(len(checkpoints[1][3].func_vals), 4)
+
+        # Only the first rank of each group loads the subspace's history.
+        checkpoints = [load_checkpoints(path, 4, rank, 8) for rank in range(8)]
+        assert_equal([sorted(rank_checkpoints) for rank_checkpoints in checkpoints],
+                     [[0], [], [1], [], [2], [], [3], []])
+
+        checkpoints = load_checkpoints(path, 8, 0, 8)
+        assert checkpoints[0] is not None
+        assert_equal(sorted(load_checkpoints(path, 8, 7, 8)), [7])
+        assert load_checkpoints(path, 8, 7, 8)[7] is None
+
+        with pytest.raises(ValueError):
+            load_checkpoints(path, 2)
+
+        # With a communicator, other ranks load from the entries found by rank 0.
+        assert_equal(sorted(load_checkpoints(path, 4, comm=_BcastComm(0))), [0, 1, 2, 3])
+        entries = {subspace_id: {'file': 'hyperspace{:02d}.log'.format(subspace_id), 'offset': None,
+                                 'iteration': None} for subspace_id in range(4)}
+        with pytest.raises(ValueError):
+            load_checkpoints(path, 4, 1, 2, comm=_BcastComm(1, {**entries, 9: entries[0]}))
+        checkpoints = load_checkpoints(path, 4, 1, 2, comm=_BcastComm(1, entries))
+        assert_equal(len(checkpoints[3].func_vals), 4)
+
+        # Subspaces without an entry are not looked for.
+        del entries[3]
+        assert load_checkpoints(path, 4, 1, 2, comm=_BcastComm(1, entries))[3] is None
+
+
+@pytest.mark.fast_test
+def test_json_lines_checkpoint():
+    """
+    Tests that each evaluation is appended once, and that a running file can be followed.
+    """
+    space = Space([(0.0, 1.0), (0, 5)])
+    with tempfile.TemporaryDirectory() as path:
+        saver = JsonLinesCheckpointSaver(path, 'hyperspace00.jsonl')
+        optimizer = create_optimizer(space, "RAND", random_state=0)
+        _run(saver, optimizer, 3)
+
+        records, offset = load_json_lines(saver.savefile)
+        assert_equal([record['iteration'] for record in records], [0, 1, 2])
+        assert_equal([record['x'] for record in records], optimizer.Xi)
+
+        # A line cut short is skipped by readers, and dropped by the next saver.
+        with open(saver.savefile, 'a') as outfile:
+            outfile.write('{"iteration":3,"x":[0.')
+        assert_equal(load_json_lines(saver.savefile, offset), ([], offset))
+
+        saver = JsonLinesCheckpointSaver(path, 'hyperspace00.jsonl', asynchronous=True)
+        _run(saver, optimizer, 2)
+        saver.flush()
+
+        new_records, _ = load_json_lines(saver.savefile, offset)
+        assert_equal([record['iteration'] for record in new_records], [3, 4])
+
+        result, = load_json_results(path)
+        assert_equal(result.x_iters, optimizer.Xi)
+        np.testing.assert_array_equal(result.func_vals, optimizer.yi)
+        assert_equal(result.fun, min(optimizer.yi))
+        assert_equal(result.func_vals.dtype, np.float64)
+
+        # An empty file and a file with no valid checkpoint do not stop the others loading.
+        open(os.path.join(path, 'hyperspace01.jsonl'), 'w').close()
+        with open(os.path.join(path, 'hyperspace02'), 'w') as outfile:
+            outfile.write('{"x": [0.')
+        with pytest.warns(UserWarning):
+            results = load_json_results(path, sort=True, reverse_sort=True)
+        assert_equal([len(result.func_vals) for result in results], [5, 0])
+        assert results[1].fun is None
+
+
+@pytest.mark.fast_test
+def test_json_lines_round_trip():
+    """
+    Tests that a JSON lines result matches the pickled result, types included.
+    """
+    space = Space([(0.0, 1.0), (0, 5), ["a", "b"]])
+    with tempfile.TemporaryDirectory() as path:
+        saver = JsonLinesCheckpointSaver(path, 'hyperspace00.jsonl')
+        optimizer = create_optimizer(space, "RAND", random_state=0)
+        for _ in range(4):
+            x = optimizer.ask()
+            pickled = optimizer.tell(x, x[0] + x[1])
+            saver(pickled)
+
+        result, = load_json_results(path)
+        dump(pickled, os.path.join(path, 'hyperspace00.pkl'))
+        pickled = load(os.path.join(path, 'hyperspace00.pkl'))
+
+        assert_equal(result.x_iters, pickled.x_iters)
+        assert_equal(result.x, pickled.x)
+        assert_equal(result.fun, pickled.fun)
+        np.testing.assert_array_equal(result.func_vals, pickled.func_vals)
+        for point, pickled_point in zip(result.x_iters + [result.x], pickled.x_iters + [pickled.x]):
+            assert_equal([type(value) for value in point], [type(value) for value in pickled_point])
+        assert_equal(type(result.fun), type(pickled.fun))
+        assert_equal(result.func_vals.dtype, pickled.func_vals.dtype)
+
+
+if __name__=='__main__':
+    test_incremental_checkpoint()
+    test_incremental_checkpoint_resume()
+    test_incremental_checkpoint_state()
+    test_resume_proposes_same_points("RF")
+    test_resume_proposes_same_points("GP")
+    test_background_writer()
+    test_asynchronous_checkpoints()
+    test_atomic_checkpoints()
+    test_compressed_checkpoints()
+    test_fsync_policy()
+    test_atomic_replace_keeps_savefile()
+    test_checkpoint_manifest()
+    test_manifest_recorded_while_running()
+    test_load_checkpoints()
+    test_json_lines_checkpoint()
+    test_json_lines_round_trip()
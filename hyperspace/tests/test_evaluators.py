@@ -0,0 +1,78 @@
+import pytest
+from sklearn.utils.testing import assert_equal
+
+from skopt.space import Space
+
+from hyperspace.rover.evaluators import SerialEvaluator
+from hyperspace.rover.evaluators import PoolEvaluator
+from hyperspace.rover.evaluators import create_executor
+from hyperspace.hyperdrive.skopt.models import batch_minimize
+
+
+def objective(params, scale=1.0):
+    """
+    Quadratic bowl, defined at module level so process pools can pickle it.
+    """
+    return scale * sum((x - 1.0)**2 for x in params)
+
+
+@pytest.mark.fast_test
+def test_serial_evaluator():
+    """
+    Tests evaluating points one after another.
+    """
+    evaluator = SerialEvaluator(objective)
+    points = [[1.0, 1.0], [2.0, 1.0], [3.0, 3.0]]
+
+    assert_equal(evaluator.map(points), [0.0, 1.0, 8.0])
+    assert_equal(evaluator.map(points, 2.0), [0.0, 2.0, 16.0])
+
+
+@pytest.mark.fast_test
+def test_pool_evaluator():
+    """
+    Tests that the process pool keeps the order of the points.
+    """
+    evaluator = PoolEvaluator(objective, n_workers=2)
+    points = [[float(i), 1.0] for i in range(5)]
+
+    assert_equal(evaluator.map(points), SerialEvaluator(objective).map(points))
+    assert_equal(evaluator.map(points, 2.0), SerialEvaluator(objective).map(points, 2.0))
+    evaluator.close()
+
+
+@pytest.mark.fast_test
+def test_create_executor():
+    """
+    Tests process and thread pools give the same evaluations.
+    """
+    points = [[float(i), 1.0] for i in range(5)]
+    for backend in ["processes", "threads"]:
+        evaluator = PoolEvaluator(objective, 2, create_executor(2, backend))
+        assert_equal(evaluator.map(points), SerialEvaluator(objective).map(points))
+        evaluator.close()
+
+    with pytest.raises(ValueError):
+        create_executor(2, "mpi")
+
+
+@pytest.mark.fast_test
+def test_batch_minimize():
+    """
+    Tests that batches are evaluated until the budget is spent.
+    """
+    space = Space([(-2.0, 2.0), (-2.0, 2.0)])
+    evaluator = PoolEvaluator(objective, n_workers=3)
+    result = batch_minimize(evaluator, space, model="RAND", n_calls=10,
+                            n_random_starts=4, random_state=0)
+    evaluator.close()
+
+    assert_equal(len(result.func_vals), 10)
+    assert_equal(result.fun, min(result.func_vals))
+
+
+if __name__=='__main__':
+    test_serial_evaluator()
+    test_pool_evaluator()
+    test_create_executor()
+    test_batch_minimize()
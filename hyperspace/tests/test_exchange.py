@@ -0,0 +1,113 @@
+import pytest
+from sklearn.utils.testing import assert_equal
+
+from skopt.space import Space
+
+from hyperspace.rover.exchange import IncumbentExchange
+from hyperspace.rover.exchange import NeighbourExchange
+from hyperspace.space import HyperspacePartition
+from hyperspace.hyperdrive.skopt.models import create_optimizer
+
+
+class _FakeComm(object):
+    """Stands in for rank 0 of an MPI communicator, with canned messages from the other ranks."""
+    def __init__(self, others):
+        self.others = others
+        self.sent = []
+
+    def Get_rank(self):
+        return 0
+
+    def allgather(self, message):
+        self.sent.append(message)
+        return [message] + self.others
+
+
+class _Request(object):
+    def wait(self):
+        pass
+
+
+class _FakeNeighbourComm(object):
+    """Stands in for the rank optimizing subspace 0 of four, with canned messages from its neighbours."""
+    def __init__(self, messages):
+        self.messages = messages
+        self.sent = {}
+
+    def Get_rank(self):
+        return 0
+
+    def allgather(self, subspace_id):
+        return [subspace_id, 1, 2, 3]
+
+    def isend(self, message, dest, tag):
+        self.sent.setdefault(dest, []).append(message)
+        return _Request()
+
+    def recv(self, source, tag):
+        return self.messages[source].pop(0)
+
+
+@pytest.mark.fast_test
+def test_incumbent_exchange():
+    """
+    Tests that received points inside the subspace are told once, every `every` iterations.
+    """
+    space = Space([(0.0, 1.0), (0.0, 1.0)])
+    optimizer = create_optimizer(space, "RAND", random_state=0)
+    optimizer.tell([[0.5, 0.5], [0.1, 0.1]], [2.0, 1.0])
+
+    others = [(False, [([0.2, 0.3], 0.5)]), (False, [([2.0, 2.0], 0.1)]), (True, [])]
+    comm = _FakeComm(others)
+    exchange = IncumbentExchange(comm, every=2, n_best=1)
+
+    assert_equal(exchange.step(optimizer), 0)
+    assert_equal(comm.sent, [])
+
+    assert_equal(exchange.step(optimizer), 1)
+    assert_equal(comm.sent, [(False, [([0.1, 0.1], 1.0)])])
+    assert_equal(optimizer.Xi[-1], [0.2, 0.3])
+    assert_equal(len(optimizer.Xi), 3)
+
+    # Points already seen are not told again.
+    exchange.step(optimizer)
+    assert_equal(exchange.step(optimizer), 0)
+    assert_equal(exchange.n_injected, 1)
+    assert_equal(exchange.n_exchanges, 2)
+
+    with pytest.raises(ValueError):
+        IncumbentExchange(comm, every=0)
+
+
+@pytest.mark.fast_test
+def test_neighbour_exchange():
+    """
+    Tests that only observations in the overlap go to the subspaces differing in one bit.
+    """
+    hyperspace = HyperspacePartition([(0.0, 1.0), (0.0, 1.0)])
+    space = hyperspace[0]
+    optimizer = create_optimizer(space, "RAND", random_state=0)
+    # Subspace 0 is the upper half of both dimensions, and overlaps subspaces 1 and 2 near the middle.
+    optimizer.tell([[0.9, 0.9], [0.45, 0.9], [0.9, 0.45]], [1.0, 2.0, 3.0])
+
+    messages = {1: [(False, [([0.5, 0.55], 0.5)]), (True, [])],
+                2: [(True, [])]}
+    comm = _FakeNeighbourComm(messages)
+    exchange = NeighbourExchange(comm, hyperspace, 0, every=1)
+    assert_equal(sorted(exchange.neighbours), [1, 2])
+
+    assert_equal(exchange.step(optimizer), 1)
+    assert_equal(comm.sent[1], [(False, [([0.45, 0.9], 2.0)])])
+    assert_equal(comm.sent[2], [(False, [([0.9, 0.45], 3.0)])])
+    assert_equal(sorted(exchange.neighbours), [1])
+
+    # Received points are not sent back.
+    exchange.step(optimizer)
+    assert_equal(comm.sent[1][1], (False, []))
+    assert_equal(exchange.neighbours, {})
+    assert_equal(exchange.n_injected, 1)
+
+
+if __name__=='__main__':
+    test_incumbent_exchange()
+    test_neighbour_exchange()
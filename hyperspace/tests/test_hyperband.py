@@ -0,0 +1,152 @@
+import pytest
+import numpy as np
+from sklearn.utils.testing import assert_equal
+
+from skopt.space import Space
+
+from hyperspace.hyperdrive.hyperbelt import hyperband
+from hyperspace.hyperdrive.hyperbelt.hyperband import _sample
+from hyperspace.hyperdrive.hyperbelt import Continuation
+from hyperspace.rover.evaluators import PoolEvaluator
+from hyperspace.rover.evaluators import create_executor
+
+
+def objective(params, budget):
+    x, y = params
+    return (x - 0.3)**2 + (y - 0.6)**2 + 1.0 / budget
+
+
+@pytest.mark.fast_test
+def test_hyperband_brackets():
+    """
+    Tests that every bracket runs, with the number of configurations and
+    budget of each rung given by the Hyperband schedule.
+    """
+    space = Space([(0.0, 1.0), (0.0, 1.0)])
+    result = hyperband(objective, space, max_iter=27, eta=3, verbose=False)
+
+    assert_equal(sorted(set(result.brackets)), [0, 1, 2, 3])
+    schedule = {3: [(27, 1), (9, 3), (3, 9), (1, 27)],
+                2: [(12, 3), (4, 9), (1, 27)],
+                1: [(6, 9), (2, 27)],
+                0: [(4, 27)]}
+    for bracket, rungs in schedule.items():
+        for rung, (n_configs, budget) in enumerate(rungs):
+            mask = (result.brackets == bracket) & (result.rungs == rung)
+            assert_equal(int(mask.sum()), n_configs)
+            assert_equal(set(result.budgets[mask]), {budget})
+
+    assert_equal(len(result.x_iters), len(result.func_vals))
+    assert_equal(len(result.x_iters), len(result.brackets))
+
+
+@pytest.mark.fast_test
+def test_hyperband_promotion():
+    """
+    Tests that each rung evaluates the best configurations of the rung before it.
+    """
+    space = Space([(0.0, 1.0), (0.0, 1.0)])
+    result = hyperband(objective, space, max_iter=27, eta=3, verbose=False)
+
+    x_iters = np.asarray(result.x_iters)
+    for bracket in range(4):
+        for rung in range(bracket):
+            below = (result.brackets == bracket) & (result.rungs == rung)
+            above = (result.brackets == bracket) & (result.rungs == rung + 1)
+            order = np.argsort(result.func_vals[below], kind="mergesort")
+            best = x_iters[below][order[:int(above.sum())]]
+            np.testing.assert_array_equal(x_iters[above], best)
+
+    # Brackets draw different configurations.
+    first = x_iters[(result.brackets == 3) & (result.rungs == 0)][0]
+    assert not np.any(np.all(x_iters[result.brackets == 0] == first, axis=1))
+
+
+@pytest.mark.fast_test
+def test_hyperband_model():
+    """
+    Tests that a surrogate proposes the configurations of later brackets, on the same schedule.
+    """
+    space = Space([(0.0, 1.0), (0.0, 1.0)])
+    random = hyperband(objective, space, max_iter=9, eta=3, verbose=False)
+    result = hyperband(objective, space, max_iter=9, eta=3, verbose=False, model="GP")
+
+    np.testing.assert_array_equal(result.brackets, random.brackets)
+    np.testing.assert_array_equal(result.budgets, random.budgets)
+
+    # The first bracket has nothing to fit on yet.
+    first = result.brackets == 2
+    np.testing.assert_array_equal(np.asarray(result.x_iters)[first], np.asarray(random.x_iters)[first])
+    assert not np.array_equal(np.asarray(result.x_iters)[~first], np.asarray(random.x_iters)[~first])
+
+    with pytest.raises(ValueError):
+        hyperband(objective, space, max_iter=9, model="TPE")
+
+
+@pytest.mark.fast_test
+def test_sample_highest_budget():
+    """
+    Tests that the surrogate is fitted on the highest budget with enough evaluations.
+    """
+    space = Space([(0.0, 1.0)])
+    good = [[0.1], [0.15], [0.2], [0.9]]
+    observations = {1: (good, [0.0, 0.0, 0.0, 1.0]),
+                    3: ([[0.8], [0.85], [0.9]], [0.0, 0.0, 1.0]),
+                    9: ([[0.5]], [0.0])}
+
+    rng = np.random.RandomState(0)
+    points = _sample(space, 3, rng, observations, model="GP", min_points=3)
+    assert_equal(len(points), 3)
+    assert all(point[0] > 0.5 for point in points)
+
+    # Too few evaluations everywhere, draw at random.
+    points = _sample(space, 3, np.random.RandomState(0), observations, model="GP", min_points=5)
+    assert_equal(points, space.rvs(3, random_state=np.random.RandomState(0)))
+
+
+def resumable(params, budget, state):
+    """Trains from the epoch its state reached, returning the new state."""
+    start = 0 if state is None else state['epochs']
+    assert start < budget
+    history = ([] if state is None else state['history']) + [(start, budget)]
+    return objective(params, budget), {'epochs': budget, 'history': history, 'x': params}
+
+
+@pytest.mark.fast_test
+def test_hyperband_continuation():
+    """
+    Tests that promoted configurations resume from the state of their previous rung.
+    """
+    space = Space([(0.0, 1.0), (0.0, 1.0)])
+    calls = []
+
+    def tracked(params, budget, state):
+        value, state = resumable(params, budget, state)
+        calls.append(state)
+        return value, state
+
+    result = hyperband(tracked, space, max_iter=27, eta=3, verbose=False, continuation=True)
+    plain = hyperband(objective, space, max_iter=27, eta=3, verbose=False)
+
+    np.testing.assert_array_equal(result.func_vals, plain.func_vals)
+    np.testing.assert_array_equal(result.budgets, plain.budgets)
+    for state, x, rung in zip(calls, result.x_iters, result.rungs):
+        np.testing.assert_array_equal(state['x'], x)
+        assert_equal(len(state['history']), rung + 1)
+        # Each rung picks up where the one before stopped.
+        starts = [start for start, _ in state['history']]
+        assert_equal(starts[1:], [end for _, end in state['history'][:-1]])
+
+    with create_executor(2, "threads") as executor:
+        evaluator = PoolEvaluator(Continuation(resumable), 2, executor)
+        pooled = hyperband(resumable, space, max_iter=27, eta=3, verbose=False,
+                           evaluator=evaluator, continuation=True)
+    np.testing.assert_array_equal(pooled.func_vals, plain.func_vals)
+
+
+if __name__=='__main__':
+    test_hyperband_brackets()
+    test_hyperband_promotion()
+    test_hyperband_model()
+    test_sample_highest_budget()
+    test_hyperband_continuation()
@@ -0,0 +1,199 @@
+import os
+import pickle
+import tempfile
+
+import pytest
+import numpy as np
+from sklearn.utils.testing import assert_equal
+
+from skopt import dump
+from skopt.space import Space
+
+from hyperspace import hyperdrive
+from hyperspace.kepler import load_results
+from hyperspace.kepler import LazyResult
+from hyperspace.kepler import export_study
+from hyperspace.kepler import load_study
+from hyperspace.kepler import open_study
+from hyperspace.rover.checkpoints import IncrementalCheckpointSaver
+from hyperspace.hyperdrive.skopt.models import create_optimizer
+
+
+def _save_results(path, n_subspaces=3):
+    """
+    Dump one small GP result per subspace, as `hyperdrive` does.
+    """
+    space = Space([(0.0, 1.0), (0.0, 1.0)])
+    results = []
+    for subspace_id in range(n_subspaces):
+        optimizer = create_optimizer(space, "GP", n_initial_points=3, random_state=subspace_id)
+        points = space.rvs(4, random_state=subspace_id)
+        result = optimizer.tell(points, [sum(x) + subspace_id for x in points])
+        dump(result, os.path.join(path, 'hyperspace{:02d}'.format(subspace_id)))
+        results.append(result)
+    return results
+
+
+@pytest.mark.fast_test
+def test_load_results_fields():
+    """
+    Tests that only the requested fields are kept, in a pool or not.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        saved = _save_results(path)
+        for n_jobs in [1, 2]:
+            results = load_results(path, fields=["x", "fun"], n_jobs=n_jobs)
+            assert_equal([sorted(result.keys()) for result in results], [["fun", "x"]] * 3)
+            assert_equal([result.x for result in results], [result.x for result in saved])
+
+        results = load_results(path, sort=True, reverse_sort=True, fields=["x"])
+        assert_equal([result.fun for result in results], sorted([result.fun for result in saved])[::-1])
+
+
+@pytest.mark.fast_test
+def test_load_results_shared_directory():
+    """
+    Tests that checkpoint logs next to the results are not loaded as results.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        saved = _save_results(path)
+        for subspace_id, result in enumerate(saved):
+            logfile = os.path.join(path, 'hyperspace{:02d}.log'.format(subspace_id))
+            with open(logfile, 'wb') as handle:
+                for i, (x, y) in enumerate(zip(result.x_iters, result.func_vals)):
+                    pickle.dump({'iteration': i, 'x': x, 'y': y}, handle)
+
+        results = load_results(path, sort=True)
+        assert_equal(len(results), 3)
+        assert_equal([result.fun for result in results], sorted(result.fun for result in saved))
+
+
+def sphere(params):
+    return sum(x**2 for x in params)
+
+
+@pytest.mark.fast_test
+def test_load_results_checkpoints_path():
+    """
+    Tests loading the results of a run checkpointing into its results directory.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        hyperdrive(sphere, [(-1.0, 1.0), (-1.0, 1.0)], path, model="RAND", n_iterations=5,
+                   checkpoints_path=path, n_workers=1, backend="threads")
+        assert any(file.endswith('.state') for file in os.listdir(path))
+        saver = IncrementalCheckpointSaver(path, 'hyperspace00')
+        saver.snapshot(load_results(path)[0])
+
+        results = load_results(path, sort=True)
+        assert_equal(len(results), 4)
+        assert all(len(result.func_vals) == 5 for result in results)
+
+
+@pytest.mark.fast_test
+def test_load_results_lazy():
+    """
+    Tests that lazy results load the whole result on first access to a missing field.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        saved = _save_results(path)
+        results = load_results(path, lazy=True)
+        assert all(isinstance(result, LazyResult) for result in results)
+        assert 'models' not in results[0]
+        assert not results[0].loaded
+
+        assert_equal(list(results[0].func_vals), list(saved[0].func_vals))
+        assert not results[0].loaded
+
+        assert_equal(len(results[0].models), len(saved[0].models))
+        assert results[0].loaded
+        assert_equal(results[0]['space'], saved[0].space)
+
+        with pytest.raises(AttributeError):
+            results[1].not_a_field
+        assert results[1].loaded
+
+
+def _save_study(path):
+    """
+    Results and checkpoints of two subspaces with a categorical hyperparameter.
+    """
+    space = Space([(0.0, 1.0), (1, 5), ["a", "bb", "c"]])
+    results_path = os.path.join(path, 'results')
+    checkpoints_path = os.path.join(path, 'checkpoints')
+    os.makedirs(results_path)
+    os.makedirs(checkpoints_path)
+    for subspace_id in range(2):
+        filename = 'hyperspace{:02d}'.format(subspace_id)
+        saver = IncrementalCheckpointSaver(checkpoints_path, filename, rank=subspace_id + 4)
+        optimizer = create_optimizer(space, "RAND", random_state=subspace_id)
+        for _ in range(3 + subspace_id):
+            x = optimizer.ask()
+            result = optimizer.tell(x, x[0] + x[1])
+            saver(result)
+        dump(result, os.path.join(results_path, filename))
+    return results_path, checkpoints_path
+
+
+@pytest.mark.fast_test
+def test_export_study():
+    """
+    Tests that every evaluation becomes a typed row, with timing and rank from the checkpoints.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        results_path, checkpoints_path = _save_study(path)
+
+        for savefile in ['study.npz', 'study']:
+            export_study(results_path, os.path.join(path, savefile), checkpoints_path)
+            study = load_study(os.path.join(path, savefile), mmap=True)
+            assert_equal(len(study), 7)
+            assert_equal(study.hyperparameters, ['x0', 'x1', 'x2'])
+            assert_equal([study[name].dtype.kind for name in study.hyperparameters], ['f', 'i', 'U'])
+            assert_equal(list(study['subspace_id']), [0, 0, 0, 1, 1, 1, 1])
+            assert_equal(list(study['iteration']), [0, 1, 2, 0, 1, 2, 3])
+            assert_equal(list(study['rank']), [4, 4, 4, 5, 5, 5, 5])
+            assert np.all(study['eval_seconds'] >= 0)
+            np.testing.assert_array_equal(study['y'], study['x0'] + study['x1'])
+
+            top = study.top(2)
+            assert_equal(list(top['y']), sorted(study['y'])[:2])
+            assert_equal(list(study.incumbents()[1]), list(np.minimum.accumulate(study['y'][3:])))
+
+        study = export_study(results_path, os.path.join(path, 'bare.npz'))
+        assert_equal(list(study['rank']), [-1] * 7)
+        assert np.all(np.isnan(study['timestamp']))
+
+
+@pytest.mark.fast_test
+def test_open_study():
+    """
+    Tests that a study directory opens as memory-mapped X and y, with categories encoded.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        results_path, checkpoints_path = _save_study(path)
+        study_path = os.path.join(path, 'study')
+        exported = export_study(results_path, study_path, checkpoints_path)
+
+        study = open_study(study_path)
+        assert isinstance(study.X, np.memmap)
+        assert isinstance(study.y, np.memmap)
+        assert_equal(study.X.shape, (7, 3))
+        np.testing.assert_array_equal(study.y, exported.y)
+        np.testing.assert_array_equal(study.X[:, 0], exported['x0'])
+
+        categories = study.categories['x2']
+        assert_equal(sorted(categories), categories)
+        decoded = [categories[int(code)] for code in study.X[:, 2]]
+        assert_equal(decoded, list(exported['x2']))
+
+        assert not isinstance(open_study(study_path, mmap=False).X, np.memmap)
+        with pytest.raises(ValueError):
+            open_study(results_path)
+
+
+if __name__=='__main__':
+    test_load_results_fields()
+    test_load_results_shared_directory()
+    test_load_results_checkpoints_path()
+    test_load_results_lazy()
+    test_export_study()
+    test_open_study()
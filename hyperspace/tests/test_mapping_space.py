@@ -10,6 +10,8 @@ from hyperspace.space import HyperCategorical
 from hyperspace.space.skopt.mapping_space import check_dimension
 from hyperspace.space.skopt.mapping_space import fold_spaces
 from hyperspace.space.skopt.mapping_space import create_hyperspace
+from hyperspace.space.skopt.mapping_space import create_hyperbounds
+from hyperspace.space.skopt.mapping_space import HyperspacePartition
 
 
 @pytest.mark.fast_test
@@ -159,9 +161,44 @@ def test_create_hyperspace(integer=(0, 10), real=(20.0, 30), cat=['a', 'b', 'c',
     assert_equal(hyperspace2, test_hyperspace2)
 
 
+@pytest.mark.fast_test
+def test_hyperspace_partition(integer=(0, 10), real=(20.0, 30), cat=['a', 'b', 'c', 'd']):
+    """
+    Tests that lazily built hyperspaces match create_hyperspace.
+    """
+    hparams = [integer, real, cat]
+    hyperspace = create_hyperspace(hparams)
+    partition = HyperspacePartition(hparams)
+
+    assert_equal(len(partition), len(hyperspace))
+    assert_equal(list(partition), hyperspace)
+    for subspace_id in range(len(hyperspace)):
+        assert_equal(partition[subspace_id], hyperspace[subspace_id])
+
+    assert_equal(partition[-1], hyperspace[-1])
+
+    with pytest.raises(IndexError):
+        partition[len(hyperspace)]
+
+
+@pytest.mark.fast_test
+def test_hyperspace_partition_bounds(integer=(0, 10), real=(20.0, 30)):
+    """
+    Tests that lazily built bounds match create_hyperbounds.
+    """
+    hparams = [integer, real]
+    hyperbounds = create_hyperbounds(hparams)
+    partition = HyperspacePartition(hparams)
+
+    for subspace_id in range(len(hyperbounds)):
+        assert_equal(partition.bounds(subspace_id), hyperbounds[subspace_id])
+
+
 if __name__=='__main__':
     check_int()
     check_real()
     check_categorical()
     test_fold_spaces()
     test_create_hyperspace()
+    test_hyperspace_partition()
+    test_hyperspace_partition_bounds()
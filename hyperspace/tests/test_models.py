@@ -0,0 +1,110 @@
+import pytest
+from sklearn.utils.testing import assert_equal
+
+from skopt.space import Space
+
+from hyperspace.rover.evaluators import SerialEvaluator
+from hyperspace.hyperdrive.skopt.models import ask_batch
+from hyperspace.hyperdrive.skopt.models import batch_minimize
+from hyperspace.hyperdrive.skopt.models import create_optimizer
+from hyperspace.hyperdrive.skopt.models import ModelRetention
+from hyperspace.hyperdrive.skopt.models import prune_models
+
+
+def objective(params):
+    return sum((x - 1.0)**2 for x in params)
+
+
+def _fitted_optimizer(model="GP"):
+    space = Space([(-2.0, 2.0), (-2.0, 2.0)])
+    optimizer = create_optimizer(space, model, n_initial_points=4, random_state=0)
+    points = space.rvs(6, random_state=0)
+    optimizer.tell(points, [objective(x) for x in points])
+    return optimizer
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("strategy", ["cl_min", "cl_mean", "cl_max", "kb"])
+def test_ask_batch(strategy):
+    """
+    Tests that a batch holds distinct points and leaves the optimizer untouched.
+    """
+    optimizer = _fitted_optimizer()
+    n_observed = len(optimizer.yi)
+
+    points = ask_batch(optimizer, 4, strategy)
+
+    assert_equal(len(points), 4)
+    assert_equal(len(set(tuple(x) for x in points)), 4)
+    assert_equal(len(optimizer.yi), n_observed)
+
+
+@pytest.mark.fast_test
+def test_batch_minimize_batch_size():
+    """
+    Tests that batches larger than the number of workers spend the same budget.
+    """
+    space = Space([(-2.0, 2.0), (-2.0, 2.0)])
+    result = batch_minimize(SerialEvaluator(objective), space, model="GP", n_calls=13,
+                            n_points=4, n_random_starts=4, strategy="kb", random_state=0)
+
+    assert_equal(len(result.func_vals), 13)
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("keep_models, n_models", [("all", 9), ("last", 1), ("none", 0), (3, 3)])
+def test_model_retention(keep_models, n_models):
+    """
+    Tests that the result and the optimizer keep a bounded number of surrogates.
+    """
+    space = Space([(-2.0, 2.0), (-2.0, 2.0)])
+    result = batch_minimize(SerialEvaluator(objective), space, model="GP", n_calls=12,
+                            n_points=1, n_random_starts=4, strategy="kb", random_state=0,
+                            callback=[ModelRetention(keep_models)])
+
+    assert_equal(len(result.func_vals), 12)
+    assert_equal(len(result.models), max(n_models, 1))
+
+    prune_models(result.models, ModelRetention(keep_models).n_keep)
+    assert_equal(len(result.models), n_models)
+
+    with pytest.raises(ValueError):
+        ModelRetention("first")
+
+
+@pytest.mark.fast_test
+def test_ask_batch_without_models():
+    """
+    Tests that the kriging believer refits a surrogate when the models were dropped.
+    """
+    optimizer = _fitted_optimizer()
+    del optimizer.models[:]
+
+    points = ask_batch(optimizer, 3, "kb")
+    assert_equal(len(set(tuple(x) for x in points)), 3)
+
+
+@pytest.mark.fast_test
+def test_create_optimizer_kernel():
+    """
+    Tests that a restored kernel seeds the surrogate without doubling its noise term.
+    """
+    fitted = _fitted_optimizer()
+    kernel = fitted.models[-1].kernel_
+
+    optimizer = create_optimizer(fitted.space, "GP", 4, random_state=0, kernel=kernel)
+    assert_equal(optimizer.base_estimator_.kernel, kernel.k1)
+
+    optimizer.tell(fitted.Xi, fitted.yi)
+    assert_equal(optimizer.models[-1].kernel_.k2.__class__.__name__, "WhiteKernel")
+    assert_equal(optimizer.models[-1].kernel_.k1.__class__, kernel.k1.__class__)
+
+
+if __name__=='__main__':
+    for strategy in ["cl_min", "cl_mean", "cl_max", "kb"]:
+        test_ask_batch(strategy)
+    test_batch_minimize_batch_size()
+    for keep_models, n_models in [("all", 9), ("last", 1), ("none", 0), (3, 3)]:
+        test_model_retention(keep_models, n_models)
+    test_ask_batch_without_models()
+    test_create_optimizer_kernel()
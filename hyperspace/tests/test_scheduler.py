@@ -0,0 +1,132 @@
+import tempfile
+
+import pytest
+from sklearn.utils.testing import assert_equal
+
+from hyperspace.space import HyperspacePartition
+from hyperspace.rover.assignment import BlockAssignment
+from hyperspace.rover.evaluators import SerialEvaluator
+from hyperspace.rover.scheduler import SubspaceScheduler
+from hyperspace.rover.scheduler import WorkUnit
+from hyperspace.hyperdrive.skopt.hyperdrive import _run_work_unit
+
+
+class _FakeComm(object):
+    """Stands in for an MPI communicator of a given size."""
+    def __init__(self, size):
+        self.size = size
+
+    def Get_size(self):
+        return self.size
+
+
+class _ScriptedComm(_FakeComm):
+    """
+    Communicator whose `recv` plays the requests of `script`, a function
+    yielding (source, unit) pairs and reading what was sent so far.
+    """
+    def __init__(self, size, script):
+        super().__init__(size)
+        self.sent = []
+        self.requests = script(self)
+
+    def recv(self, source=None, tag=None, status=None):
+        source, unit = next(self.requests)
+        status.Set_source(source)
+        return unit
+
+    def send(self, unit, dest=None, tag=None):
+        self.sent.append((dest, unit))
+
+
+@pytest.mark.fast_test
+def test_scheduler_queues():
+    """
+    Tests that workers start on their own subspaces.
+    """
+    assignment = BlockAssignment().assign(8, 2)
+    scheduler = SubspaceScheduler(_FakeComm(3), assignment, n_iterations=20)
+
+    assert_equal(scheduler._next_unit(0).subspace_id, 0)
+    assert_equal(scheduler._next_unit(1).subspace_id, 4)
+    assert_equal(scheduler._next_unit(0).n_remaining, 20)
+
+
+@pytest.mark.fast_test
+def test_scheduler_work_stealing():
+    """
+    Tests that an idle worker steals from the back of the longest queue.
+    """
+    assignment = BlockAssignment().assign(4, 2)
+    scheduler = SubspaceScheduler(_FakeComm(3), assignment, n_iterations=20)
+
+    own = [scheduler._next_unit(0).subspace_id for _ in range(2)]
+    assert_equal(own, [0, 1])
+
+    stolen = scheduler._next_unit(0)
+    assert_equal(stolen.subspace_id, 3)
+    assert_equal(scheduler.n_steals, 1)
+
+    assert_equal(scheduler._next_unit(1).subspace_id, 2)
+    assert scheduler._next_unit(0) is None
+    assert scheduler._next_unit(1) is None
+
+
+@pytest.mark.fast_test
+def test_scheduler_serve_returned_units():
+    """
+    Tests that a returned unit goes to any idle worker, and that idle workers
+    are only stopped once every unit is finished.
+    """
+    def script(comm):
+        yield 1, None
+        yield 2, None
+        first, second = comm.sent[0][1], comm.sent[1][1]
+        first.n_remaining = 0
+        yield 1, first
+        # Worker 1 waits rather than stopping while the second unit runs.
+        assert_equal(len(comm.sent), 2)
+        second.n_remaining = 10
+        yield 2, second
+        assert_equal(comm.sent[-1], (1, second))
+        second.n_remaining = 0
+        yield 1, second
+
+    assignment = BlockAssignment().assign(2, 2)
+    comm = _ScriptedComm(3, script)
+    scheduler = SubspaceScheduler(comm, assignment, n_iterations=20)
+    scheduler.serve()
+
+    assert_equal([(dest, None if unit is None else unit.subspace_id) for dest, unit in comm.sent],
+                 [(1, 0), (2, 1), (1, 1), (2, None), (1, None)])
+
+
+@pytest.mark.fast_test
+def test_work_unit_initial_points():
+    """
+    Tests that the sampler's initial points are evaluated by the unit's
+    evaluator, count against its chunk, and reach the callbacks.
+    """
+    evaluated = []
+    def objective(x):
+        evaluated.append(x)
+        return sum(x)
+
+    seen = []
+    hyperspace = HyperspacePartition([(0.0, 1.0), (0.0, 1.0)])
+    unit = WorkUnit(0, 12)
+    with tempfile.TemporaryDirectory() as path:
+        _run_work_unit(None, hyperspace, unit, SerialEvaluator(objective), "RAND", 5, False,
+                       [lambda res: seen.append(len(res.func_vals))], path, None,
+                       "lhs", 3, 0)
+
+    assert_equal(len(evaluated), 5)
+    assert_equal(seen, [3, 4, 5])
+    assert_equal(unit.n_remaining, 7)
+
+
+if __name__=='__main__':
+    test_scheduler_queues()
+    test_scheduler_work_stealing()
+    test_scheduler_serve_returned_units()
+    test_work_unit_initial_points()